@@ -0,0 +1,5 @@
+# Benchmarks for hipku. `python -m benchmarks` runs the suite of per-stage
+# encode and decode benchmarks; the other modules can be run on their own,
+# e.g.
+#
+#     python -m benchmarks.decode
@@ -0,0 +1,60 @@
+# Run the benchmark suite:
+#
+#     python -m benchmarks --json before.json
+#     git checkout other-branch
+#     python -m benchmarks --compare before.json
+
+import argparse
+import json
+import platform
+import sys
+
+from benchmarks.suite import run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Benchmark each stage of Hipku.encode and Hipku.decode.')
+    parser.add_argument('--size', type=int, default=5000, help='addresses or haiku per corpus')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per stage')
+    parser.add_argument('--seed', type=int, default=0, help='seed for generating the corpora')
+    parser.add_argument('--stage', action='append', dest='stages', metavar='NAME',
+                        help='only run this stage; can be repeated')
+    parser.add_argument('--json', metavar='FILE', help='write the results to FILE as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='compare ops/s against results saved with --json')
+    args = parser.parse_args(argv)
+
+    results = {
+        'python': platform.python_implementation() + ' ' + platform.python_version(),
+        'size': args.size,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': run(args.size, args.repeat, args.seed, args.stages)
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+    for corpus_name, stages in results['results'].items():
+        print(corpus_name)
+        for stage_name, result in stages.items():
+            line = '  %-14s %12.0f ops/s  p50 %8.2f us  p99 %8.2f us  peak %9d B' % (
+                stage_name, result['ops_per_second'], result['p50_us'], result['p99_us'],
+                result['peak_memory_bytes'])
+            try:
+                before = baseline[corpus_name][stage_name]['ops_per_second']
+                line += '  %.2fx' % (result['ops_per_second'] / before)
+            except (TypeError, KeyError):
+                pass
+            print(line)
+
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(results, json_file, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import timeit
+
+from hipku import Hipku
+from benchmarks.corpora import ipv4_corpus, ipv6_corpus
+
+
+def encode_then_encode(ips):
+    return b''.join([Hipku.encode(ip).encode('ascii') for ip in ips])
+
+
+def encode_bytes(ips):
+    return b''.join([Hipku.encode_bytes(ip) for ip in ips])
+
+
+def encode_into(ips):
+    # Reuse one buffer, as a writer flushing it to a socket or file would
+    buffer = bytearray(len(ips) * 152)
+    offset = 0
+    for ip in ips:
+        offset += Hipku.encode_into(ip, buffer, offset)
+    return memoryview(buffer)[:offset]
+
+
+def run(size=20000, repeat=5):
+    results = {}
+    for name, corpus in (('ipv4', ipv4_corpus(size)), ('ipv6', ipv6_corpus(size))):
+        timings = {}
+        for label, function in (('encode', encode_then_encode), ('encode_bytes', encode_bytes),
+                                ('encode_into', encode_into)):
+            seconds = min(timeit.repeat(lambda: function(corpus), number=1, repeat=repeat))
+            timings[label] = size / seconds
+        results[name] = timings
+    return results
+
+
+def main():
+    for name, timings in run().items():
+        print('%s: %s' % (name, ', '.join('%s %.0f ops/s (%.2fx)' % (label, rate, rate / timings['encode'])
+                                          for label, rate in timings.items())))
+
+
+if __name__ == '__main__':
+    main()
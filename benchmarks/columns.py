@@ -0,0 +1,36 @@
+import timeit
+
+from hipku import Hipku
+from benchmarks.corpora import ipv4_corpus
+
+
+def run(size=100000, repeat=3):
+    # Rows per second for a column of IPv4 addresses, encoding each row
+    # with Hipku.encode against encode_arrow. Address strings repeat, as
+    # they do in logs; integers are all distinct.
+    import pyarrow
+
+    ips = ipv4_corpus(size // 10) * 10
+    values = [int.from_bytes(bytes(map(int, ip.split('.'))), 'big') for ip in ipv4_corpus(size, seed=1)]
+    results = {}
+    for name, items, column in (('strings', ips, pyarrow.array(ips)),
+                                ('integers', values, pyarrow.array(values, type=pyarrow.uint32()))):
+        if name == 'strings':
+            per_row = lambda: [Hipku.encode(ip) for ip in items]
+        else:
+            per_row = lambda: [Hipku.encode_int(value, 4) for value in items]
+        timings = {}
+        for label, function in (('per_row', per_row), ('encode_arrow', lambda: Hipku.encode_arrow(column))):
+            timings[label] = size / min(timeit.repeat(function, number=1, repeat=repeat))
+        results[name] = timings
+    return results
+
+
+def main():
+    for name, timings in run().items():
+        print('%s: per row %.0f rows/s, encode_arrow %.0f rows/s (%.1fx)' % (
+            name, timings['per_row'], timings['encode_arrow'], timings['encode_arrow'] / timings['per_row']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import random
+
+from hipku import Hipku
+
+# Words that can be slipped into a haiku without stopping it decoding
+FILLER_WORDS = ['the', 'a', 'and', 'of', 'in', 'so', 'oh', 'quite']
+
+
+def ipv4_corpus(size, seed=0):
+    rng = random.Random(seed)
+    return ['.'.join(str(rng.randrange(256)) for _ in range(4)) for _ in range(size)]
+
+
+def ipv6_corpus(size, seed=0):
+    rng = random.Random(seed)
+    return [':'.join(format(rng.randrange(65536), 'x') for _ in range(8)) for _ in range(size)]
+
+
+def abbreviated_ipv6_corpus(size, seed=0):
+    # IPv6 addresses with a run of at least two zero hextets replaced by
+    # '::', as RFC 5952 formats them
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        prefix = rng.randrange(1, 5)
+        suffix = rng.randrange(1, 7 - prefix)
+        hextets = [format(rng.randrange(65536), 'x') for _ in range(prefix + suffix)]
+        corpus.append(':'.join(hextets[:prefix]) + '::' + ':'.join(hextets[prefix:]))
+    return corpus
+
+
+def noisy_haiku_corpus(size, seed=0):
+    # Haiku with filler words, odd spacing, punctuation and case, as
+    # typed in by people. The decoder only skips extra words near the start
+    # of a haiku, so filler is only kept where it still decodes to the
+    # right address; otherwise just the formatting is disturbed.
+    rng = random.Random(seed)
+    ips = ipv4_corpus(size, seed) + ipv6_corpus(size, seed)
+    rng.shuffle(ips)
+    corpus = []
+    for ip in ips[:size]:
+        expected = Hipku.decode(Hipku.encode(ip))
+        words = Hipku.encode(ip).split()
+        for attempt in range(6):
+            noisy = list(words)
+            if attempt < 5:
+                for _ in range(rng.randrange(1, 3)):
+                    noisy.insert(rng.randrange(8), rng.choice(FILLER_WORDS))
+            noisy = [word.upper() if rng.random() < 0.1 else word for word in noisy]
+            haiku = ''.join(word + rng.choice([' ', '  ', '\n', ', ', '; ']) for word in noisy)
+            try:
+                if Hipku.decode(haiku) == expected:
+                    break
+            except ValueError:
+                pass
+        corpus.append(haiku)
+    return corpus
+
+
+
+def typo_haiku_corpus(size, typos=1, seed=0):
+    # Haiku with typos: letters dropped, added, changed or swapped in
+    # random words. Returns (haiku, address) pairs.
+    rng = random.Random(seed)
+    ips = ipv4_corpus(size, seed) + ipv6_corpus(size, seed)
+    rng.shuffle(ips)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    corpus = []
+    for ip in ips[:size]:
+        words = Hipku.encode(ip).split(' ')
+        for _ in range(typos):
+            i = rng.randrange(len(words))
+            word = words[i]
+            j = rng.randrange(len(word))
+            edit = rng.randrange(4)
+            if edit == 0 and len(word) > 1:
+                word = word[:j] + word[j + 1:]
+            elif edit == 1:
+                word = word[:j] + rng.choice(letters) + word[j:]
+            elif edit == 2:
+                word = word[:j] + rng.choice(letters) + word[j + 1:]
+            elif j + 1 < len(word):
+                word = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+            words[i] = word
+        corpus.append((' '.join(words), Hipku.decode(Hipku.encode(ip))))
+    return corpus
+
+def corpora(size, seed=0):
+    return {
+        'ipv4': ipv4_corpus(size, seed),
+        'ipv6': ipv6_corpus(size, seed),
+        'ipv6_abbreviated': abbreviated_ipv6_corpus(size, seed),
+        'noisy_haiku': noisy_haiku_corpus(size, seed)
+    }
@@ -0,0 +1,56 @@
+import timeit
+
+from hipku import Hipku
+from benchmarks.corpora import ipv4_corpus, ipv6_corpus
+
+
+def linear_scan_factors(word_array, ipv6):
+    # The original decoder: scan every dictionary entry for every word
+    factor_array = []
+    position = 0
+    for dictionary in Hipku.get_key(ipv6):
+        factor = None
+        while factor is None:
+            if position >= len(word_array):
+                raise ValueError('Decoding error: one or more dictionary words missing from input haiku')
+            for j in range(len(dictionary)):
+                entry_length = len(dictionary[j].split(' '))
+                if position + entry_length > len(word_array):
+                    continue
+                if dictionary[j] == ' '.join(word_array[position:position + entry_length]):
+                    factor = j
+                    position += entry_length - 1
+                    break
+            position += 1
+        factor_array.append(factor)
+    return factor_array
+
+
+def linear_scan_decode(haiku):
+    word_array = Hipku.split_haiku(haiku)
+    ipv6 = Hipku.haiku_is_ipv6(word_array)
+    factor_array = linear_scan_factors(word_array, ipv6)
+    return Hipku.get_ip_string(Hipku.get_octets(factor_array, ipv6), ipv6)
+
+
+def run(size=2000, repeat=5):
+    results = {}
+    for name, corpus in (('ipv4', ipv4_corpus(size)), ('ipv6', ipv6_corpus(size))):
+        haikus = [Hipku.encode(ip) for ip in corpus]
+        timings = {}
+        for label, decode in (('linear_scan', linear_scan_decode), ('reverse_index', Hipku.decode)):
+            seconds = min(timeit.repeat(lambda: [decode(haiku) for haiku in haikus], number=1, repeat=repeat))
+            timings[label] = size / seconds
+        results[name] = timings
+    return results
+
+
+def main():
+    for name, timings in run().items():
+        speedup = timings['reverse_index'] / timings['linear_scan']
+        print('%s: linear scan %.0f ops/s, reverse index %.0f ops/s (%.1fx)' % (
+            name, timings['linear_scan'], timings['reverse_index'], speedup))
+
+
+if __name__ == '__main__':
+    main()
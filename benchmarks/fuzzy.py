@@ -0,0 +1,37 @@
+import time
+
+from hipku import Hipku
+from benchmarks.corpora import typo_haiku_corpus
+
+
+def run(size=500, seed=0):
+    # Throughput of decode_fuzzy, and how often it finds the right address,
+    # for haiku with no typos, one typo and two typos
+    results = {}
+    for typos in (0, 1, 2):
+        corpus = typo_haiku_corpus(size, typos, seed)
+        right = wrong = failed = 0
+        start = time.perf_counter()
+        for haiku, expected in corpus:
+            try:
+                ip_string, corrections, confidence = Hipku.decode_fuzzy(haiku)
+            except ValueError:
+                failed += 1
+                continue
+            if ip_string == expected:
+                right += 1
+            else:
+                wrong += 1
+        seconds = time.perf_counter() - start
+        results[typos] = {'ops_per_second': size / seconds, 'right': right, 'wrong': wrong, 'failed': failed}
+    return results
+
+
+def main():
+    for typos, result in run().items():
+        print('%d typos: %.0f ops/s, %d right, %d wrong, %d failed' % (
+            typos, result['ops_per_second'], result['right'], result['wrong'], result['failed']))
+
+
+if __name__ == '__main__':
+    main()
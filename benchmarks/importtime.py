@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+# Run in a fresh interpreter, so each sample pays the whole cost of
+# importing hipku and then encoding the first address of a family
+_first_encode = '''
+import time
+start = time.perf_counter()
+from hipku import Hipku
+imported = time.perf_counter()
+Hipku.encode(%r)
+print(imported - start, time.perf_counter() - imported)
+'''
+
+
+def importtime(env, args):
+    # Returns the self and cumulative microseconds python -X importtime
+    # reports for the hipku module
+    result = subprocess.run([sys.executable] + args + ['-X', 'importtime', '-c', 'import hipku'],
+                            env=env, capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == 'hipku':
+            return int(fields[0].split(':')[1]), int(fields[1])
+    raise RuntimeError('hipku not found in -X importtime output')
+
+
+def first_encode(env, args, ip):
+    result = subprocess.run([sys.executable] + args + ['-c', _first_encode % ip],
+                            env=env, capture_output=True, text=True, check=True)
+    import_seconds, encode_seconds = result.stdout.split()
+    return float(import_seconds), float(encode_seconds)
+
+
+def run(repeat=10):
+    # 'source' compiles hipku.py on every start, as when bytecode can't be
+    # written. 'cached' loads it from a warmed bytecode cache.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    results = {}
+    with tempfile.TemporaryDirectory() as prefix:
+        for mode, args in (('source', ['-B']), ('cached', ['-X', 'pycache_prefix=' + prefix])):
+            importtime(env, args)
+            samples = [importtime(env, args) for _ in range(repeat)]
+            ipv4 = [first_encode(env, args, '127.0.0.1') for _ in range(repeat)]
+            ipv6 = [first_encode(env, args, '::1') for _ in range(repeat)]
+            results[mode] = {
+                'self_us': min(sample[0] for sample in samples),
+                'cumulative_us': min(sample[1] for sample in samples),
+                'first_ipv4_encode_us': min(sample[1] for sample in ipv4) * 1e6,
+                'first_ipv6_encode_us': min(sample[1] for sample in ipv6) * 1e6
+            }
+    return results
+
+
+def main():
+    for mode, result in run().items():
+        print('%s: import self %d us, cumulative %d us; first encode ipv4 %.0f us, ipv6 %.0f us' % (
+            mode, result['self_us'], result['cumulative_us'], result['first_ipv4_encode_us'],
+            result['first_ipv6_encode_us']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import random
+import timeit
+
+from hipku import Hipku
+
+
+def prefix_corpus(size, prefixes, seed=0):
+    # IPv6 addresses from a few /48s, as seen by a service whose clients
+    # are mostly on a handful of networks
+    rng = random.Random(seed)
+    networks = [['2001', 'db8', format(rng.randrange(65536), 'x')] for _ in range(prefixes)]
+    return [':'.join(rng.choice(networks) + [format(rng.randrange(65536), 'x') for _ in range(5)])
+            for _ in range(size)]
+
+
+def spread_corpus(size, seed=0):
+    # IPv6 addresses spread over a whole /32, so /48 prefixes rarely repeat
+    rng = random.Random(seed)
+    return [':'.join(['2001', 'db8'] + [format(rng.randrange(65536), 'x') for _ in range(6)])
+            for _ in range(size)]
+
+
+def run(size=20000, repeat=5, maxsize=4096):
+    results = {}
+    for name, corpus in (('one /48', prefix_corpus(size, 1)), ('16 /48s', prefix_corpus(size, 16)),
+                         ('spread over a /32', spread_corpus(size))):
+        timings = {}
+        Hipku.disable_ipv6_cache()
+        seconds = min(timeit.repeat(lambda: [Hipku.encode(ip) for ip in corpus], number=1, repeat=repeat))
+        timings['encode'] = size / seconds
+        Hipku.enable_ipv6_cache(maxsize)
+        seconds = min(timeit.repeat(lambda: [Hipku.encode(ip) for ip in corpus], number=1, repeat=repeat))
+        timings['cached'] = size / seconds
+        timings['stats'] = Hipku.ipv6_cache_stats()
+        Hipku.disable_ipv6_cache()
+        results[name] = timings
+    return results
+
+
+def main():
+    for name, timings in run().items():
+        print('%s: encode %.0f ops/s, with the prefix cache %.0f ops/s (%.2fx), %d hits, %d misses' % (
+            name, timings['encode'], timings['cached'], timings['cached'] / timings['encode'],
+            timings['stats']['hits'], timings['stats']['misses']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import io
+import os
+import time
+
+from hipku import Hipku
+from benchmarks.corpora import ipv6_corpus
+
+
+def worker_counts(maximum):
+    counts = []
+    workers = 1
+    while workers < maximum:
+        counts.append(workers)
+        workers *= 2
+    counts.append(maximum)
+    return counts
+
+
+def run(size=200000, max_workers=None, chunk_size=1 << 20):
+    text = ''.join(ip + '\n' for ip in ipv6_corpus(size))
+    haiku = io.StringIO()
+    Hipku.convert_stream(io.StringIO(text), haiku, 'encode', chunk_size=chunk_size)
+    haiku = haiku.getvalue()
+
+    results = []
+    for workers in worker_counts(max_workers or os.cpu_count() or 1):
+        timings = {'workers': workers}
+        for command, data in (('encode', text), ('decode', haiku)):
+            separator = '\n' if command == 'encode' else '\n\n'
+            start = time.perf_counter()
+            Hipku.convert_stream(io.StringIO(data), io.StringIO(), command, workers=workers,
+                                 chunk_size=chunk_size, separator=separator)
+            timings[command] = size / (time.perf_counter() - start)
+        results.append(timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure how convert_stream scales with worker processes '
+                                                 'on an IPv6 corpus.')
+    parser.add_argument('--size', type=int, default=200000)
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=1 << 20)
+    args = parser.parse_args()
+
+    results = run(args.size, args.max_workers, args.chunk_size)
+    for timings in results:
+        print('%2d workers: encode %8.0f addresses/s (%.2fx), decode %8.0f haiku/s (%.2fx)' % (
+            timings['workers'],
+            timings['encode'], timings['encode'] / results[0]['encode'],
+            timings['decode'], timings['decode'] / results[0]['decode']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import re
+import timeit
+
+from hipku import Hipku
+from benchmarks.corpora import abbreviated_ipv6_corpus, ipv4_corpus, ipv6_corpus
+
+_whitespace = re.compile(r'[\n\ ]')
+
+
+def regex_split_ip(ip, ipv6):
+    # The original parser: strip whitespace with a regex, split, pad
+    # abbreviated IPv6 addresses with pad_octets and convert each group
+    if ipv6:
+        separator = ':'
+        num_octets = 8
+    else:
+        separator = '.'
+        num_octets = 4
+    octet_array = _whitespace.sub('', ip).split(separator)
+    if len(octet_array) < num_octets:
+        octet_array = Hipku.pad_octets(octet_array, num_octets - len(octet_array))
+    if ipv6:
+        return [int(octet, 16) for octet in octet_array]
+    return [int(octet) for octet in octet_array]
+
+
+def run(size=20000, repeat=5):
+    # The two parsers take turns, so drift in the machine's speed affects
+    # both alike
+    results = {}
+    for name, corpus in (('ipv4', ipv4_corpus(size)), ('ipv6', ipv6_corpus(size)),
+                         ('ipv6_abbreviated', abbreviated_ipv6_corpus(size))):
+        ipv6 = ':' in corpus[0]
+        best = {}
+        for _ in range(repeat):
+            for label, split_ip in (('regex', regex_split_ip), ('parser', Hipku.split_ip)):
+                seconds = timeit.timeit(lambda: [split_ip(ip, ipv6) for ip in corpus], number=1)
+                best[label] = min(best.get(label, seconds), seconds)
+        results[name] = {label: size / seconds for label, seconds in best.items()}
+    return results
+
+
+def main():
+    for name, timings in run().items():
+        print('%s: regex and pad_octets %.0f ops/s, parser %.0f ops/s (%.2fx)' % (
+            name, timings['regex'], timings['parser'], timings['parser'] / timings['regex']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+import ipaddress
+import timeit
+
+from hipku import Hipku
+
+
+def encode_each(network):
+    return [(address, Hipku.encode_address(address)) for address in network]
+
+
+def run(repeat=3):
+    results = {}
+    for name, network in (('ipv4', ipaddress.ip_network('10.0.0.0/16')),
+                          ('ipv6', ipaddress.ip_network('2001:db8::/112'))):
+        timings = {}
+        for label, function in (('encode_address', encode_each), ('encode_network', Hipku.encode_network)):
+            seconds = min(timeit.repeat(lambda: list(function(network)), number=1, repeat=repeat))
+            timings[label] = network.num_addresses / seconds
+        results[name] = timings
+    return results
+
+
+def main():
+    for name, timings in run().items():
+        speedup = timings['encode_network'] / timings['encode_address']
+        print('%s: encode_address %.0f addresses/s, encode_network %.0f addresses/s (%.1fx)' % (
+            name, timings['encode_address'], timings['encode_network'], speedup))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from hipku import Hipku
+
+
+def write_log(path, size, seed=0):
+    # Write an access log of roughly size bytes. Addresses are drawn from a
+    # pool so they repeat, as they do in real logs.
+    rng = random.Random(seed)
+    pool = ['.'.join(str(rng.randrange(256)) for _ in range(4)) for _ in range(5000)]
+    pool += ['2001:db8:%x::%x' % (rng.randrange(65536), rng.randrange(65536)) for _ in range(5000)]
+    lines = []
+    for i in range(10000):
+        lines.append('%s - - [10/Oct/2026:13:55:%02d +0000] "GET /item/%d HTTP/1.1" 200 %d\n' % (
+            rng.choice(pool), i % 60, rng.randrange(100000), rng.randrange(10000)))
+    block = ''.join(lines).encode('ascii')
+    with open(path, 'wb') as log_file:
+        written = 0
+        while written < size:
+            log_file.write(block)
+            written += len(block)
+    return written
+
+
+def run(size_mb=64):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'access.log')
+        size = write_log(path, size_mb << 20)
+        with open(os.devnull, 'wb') as devnull:
+            start = time.perf_counter()
+            Hipku.rewrite_file(path, devnull)
+            seconds = time.perf_counter() - start
+    return {'bytes': size, 'seconds': seconds, 'mb_per_second': size / seconds / (1 << 20)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure Hipku.rewrite_file throughput on a synthetic access log.')
+    parser.add_argument('--size-mb', type=int, default=64)
+    args = parser.parse_args()
+    result = run(args.size_mb)
+    print('rewrote %.0f MB in %.2fs: %.1f MB/s' % (result['bytes'] / (1 << 20), result['seconds'], result['mb_per_second']))
+
+
+if __name__ == '__main__':
+    main()
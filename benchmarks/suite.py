@@ -0,0 +1,99 @@
+import gc
+import time
+import tracemalloc
+
+from hipku import Hipku
+from benchmarks.corpora import corpora
+
+
+def encode_stages(corpus):
+    # Each stage of Hipku.encode, with the arguments for every call worked
+    # out in advance by running the earlier stages
+    ipv6 = [Hipku.ip_is_ipv6(ip) for ip in corpus]
+    octets = [Hipku.split_ip(ip, v6) for ip, v6 in zip(corpus, ipv6)]
+    factors = [Hipku.factor_octets(octet_array, v6) for octet_array, v6 in zip(octets, ipv6)]
+    words = [Hipku.encode_words(factor_array, v6) for factor_array, v6 in zip(factors, ipv6)]
+
+    return [
+        ('ip_is_ipv6', Hipku.ip_is_ipv6, [(ip,) for ip in corpus]),
+        ('split_ip', Hipku.split_ip, list(zip(corpus, ipv6))),
+        ('factor_octets', Hipku.factor_octets, list(zip(octets, ipv6))),
+        ('encode_words', Hipku.encode_words, list(zip(factors, ipv6))),
+        ('write_haiku', Hipku.write_haiku, list(zip(words, ipv6))),
+        ('encode', Hipku.encode, [(ip,) for ip in corpus]),
+    ]
+
+
+def decode_stages(corpus):
+    # Each stage of Hipku.decode, set up the same way as encode_stages
+    words = [Hipku.split_haiku(haiku) for haiku in corpus]
+    ipv6 = [Hipku.haiku_is_ipv6(word_array) for word_array in words]
+    factors = [Hipku.get_factors(word_array, v6) for word_array, v6 in zip(words, ipv6)]
+    octets = [Hipku.get_octets(factor_array, v6) for factor_array, v6 in zip(factors, ipv6)]
+
+    return [
+        ('decode_canonical', Hipku.decode_canonical, [(haiku, not haiku.startswith('The ')) for haiku in corpus]),
+        ('split_haiku', Hipku.split_haiku, [(haiku,) for haiku in corpus]),
+        ('haiku_is_ipv6', Hipku.haiku_is_ipv6, [(word_array,) for word_array in words]),
+        ('get_factors', Hipku.get_factors, list(zip(words, ipv6))),
+        ('get_octets', Hipku.get_octets, list(zip(factors, ipv6))),
+        ('get_ip_string', Hipku.get_ip_string, list(zip(octets, ipv6))),
+        ('decode', Hipku.decode, [(haiku,) for haiku in corpus]),
+    ]
+
+
+def measure(function, arguments, repeat):
+    # Time every call separately for the latency percentiles, keeping the
+    # fastest of repeat runs for the throughput. Memory is measured in a
+    # separate run, since tracemalloc slows everything down.
+    latencies = []
+    best = None
+    for _ in range(repeat):
+        gc.disable()
+        run_latencies = []
+        clock = time.perf_counter_ns
+        for call in arguments:
+            start = clock()
+            function(*call)
+            run_latencies.append(clock() - start)
+        gc.enable()
+        total = sum(run_latencies)
+        if best is None or total < best:
+            best = total
+        latencies.extend(run_latencies)
+    latencies.sort()
+
+    # The peak is the most memory allocated during any one call
+    peak = 0
+    tracemalloc.start()
+    for call in arguments:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        function(*call)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        'ops_per_second': round(len(arguments) / (best / 1e9), 1),
+        'p50_us': round(latencies[len(latencies) // 2] / 1000, 3),
+        'p99_us': round(latencies[len(latencies) * 99 // 100] / 1000, 3),
+        'peak_memory_bytes': peak
+    }
+
+
+def run(size=5000, repeat=5, seed=0, names=None):
+    results = {}
+    for corpus_name, corpus in corpora(size, seed).items():
+        if corpus_name == 'noisy_haiku':
+            stages = decode_stages(corpus)
+        else:
+            stages = encode_stages(corpus)
+            # Also decode the canonical haiku for each address corpus
+            haikus = [Hipku.encode(ip) for ip in corpus]
+            stages += [(name, function, arguments) for name, function, arguments in decode_stages(haikus)]
+        results[corpus_name] = {}
+        for stage_name, function, arguments in stages:
+            if names and stage_name not in names:
+                continue
+            results[corpus_name][stage_name] = measure(function, arguments, repeat)
+    return results
@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+
+from hipku import Hipku
+from benchmarks.corpora import ipv4_corpus, ipv6_corpus
+
+
+def gil_enabled():
+    # Free-threaded builds can run without the GIL from Python 3.13
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is None or is_gil_enabled()
+
+
+def run(size=100000, threads=None):
+    # Items per second through encode_many and decode_many for each
+    # number of threads. Only a free-threaded build can scale past one.
+    if threads is None:
+        threads = [1, 2, 4, 8]
+        threads = [count for count in threads if count <= max(os.cpu_count() or 1, 2)]
+    ips = ipv4_corpus(size // 2) + ipv6_corpus(size - size // 2)
+    haikus = list(Hipku.encode_many(ips))
+    results = {}
+    for name, function, items in (('encode_many', Hipku.encode_many, ips),
+                                  ('decode_many', Hipku.decode_many, haikus)):
+        timings = {}
+        for count in threads:
+            start = time.perf_counter()
+            for _ in function(items, workers=count):
+                pass
+            timings[count] = size / (time.perf_counter() - start)
+        results[name] = timings
+    return results
+
+
+def main():
+    print('%s, GIL %s' % (sys.version.split()[0], 'enabled' if gil_enabled() else 'disabled'))
+    for name, timings in run().items():
+        base = timings[min(timings)]
+        print('%s: %s' % (name, ', '.join('%d threads %.0f/s (%.2fx)' % (count, rate, rate / base)
+                                          for count, rate in sorted(timings.items()))))
+
+
+if __name__ == '__main__':
+    main()
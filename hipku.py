@@ -1,5 +1,18 @@
 
+import bisect
+import collections
+import contextlib
+import io
+import itertools
+import json
+import mmap
+import os
 import re
+import struct
+import sys
+import threading
+import time
+from types import MappingProxyType
 
 class Hipku:
     """
@@ -10,24 +23,1345 @@ class Hipku:
     http://gabrielmartin.net/projects/hipku
     """
 
+    # Longest haiku text decode will accept, in characters. Set to None to
+    # disable the limit.
+    max_haiku_length = 4096
+
+    # Most edits decode_fuzzy will correct in one word. The deletion
+    # indexes it searches grow quickly with the distance.
+    max_fuzzy_distance = 3
+
     @staticmethod
     def encode(ip):
+        if _profiling:
+            profiler = Hipku.active_profiler()
+            if profiler is not None:
+                return Hipku.encode_profiled(ip, profiler)
         ipv6 = Hipku.ip_is_ipv6(ip)
         decimal_octet_array = Hipku.split_ip(ip, ipv6)
+        if not ipv6 and _ipv4_tables is not None:
+            return Hipku.encode_from_ipv4_tables(decimal_octet_array)
+        if ipv6 and _ipv6_fragment_cache is not None:
+            return Hipku.encode_from_ipv6_cache(decimal_octet_array)
         factored_octet_array = Hipku.factor_octets(decimal_octet_array, ipv6)
         encoded_word_array = Hipku.encode_words(factored_octet_array, ipv6)
         haiku_text = Hipku.write_haiku(encoded_word_array, ipv6)
         return haiku_text
 
     @staticmethod
-    def decode(haiku):
-        word_array = Hipku.split_haiku(haiku)
+    def decode(haiku, max_length=None, strict=False):
+        # Haiku written by encode are decoded by decode_canonical. Anything
+        # else goes through the tolerant split_haiku path, unless strict is
+        # set, in which case it's rejected.
+        if _profiling:
+            profiler = Hipku.active_profiler()
+            if profiler is not None:
+                return Hipku.decode_profiled(haiku, max_length, profiler, strict)
+        Hipku.check_haiku_length(haiku, max_length)
+        ip_string = Hipku.decode_canonical(haiku, not haiku.startswith('The '))
+        if ip_string is not None:
+            return ip_string
+        if strict:
+            raise ValueError('Decoding error: input haiku is not in the layout written by encode')
+        word_array = Hipku.split_haiku(haiku, max_length)
+        return Hipku.decode_words(word_array)
+
+    @staticmethod
+    def decode_canonical(haiku, ipv6):
+        # Decode a haiku laid out exactly as write_haiku lays it out, with
+        # a single match against the template and a lookup per word.
+        # Returns None if the haiku isn't in that layout.
+        pattern, slot_indexes, ip_format = Hipku.get_canonical_decoder(ipv6)
+        match = pattern.fullmatch(haiku)
+        if match is None:
+            return None
+        words = match.groups()
+        try:
+            octet_array = [slot_indexes[i][words[i]] + slot_indexes[i + 1][words[i + 1]]
+                           for i in range(0, len(words), 2)]
+        except KeyError:
+            return None
+        return ip_format % tuple(octet_array)
+
+    @staticmethod
+    def decode_words(word_array):
+        # Decode a haiku that has already been through split_haiku
         ipv6 = Hipku.haiku_is_ipv6(word_array)
         factor_array = Hipku.get_factors(word_array, ipv6)
         octet_array = Hipku.get_octets(factor_array, ipv6)
         ip_string = Hipku.get_ip_string(octet_array, ipv6)
         return ip_string
 
+    # Profiling. While a Profiler is active, encode and decode time each
+    # stage of their pipeline and record the number of calls and the total
+    # time per stage, per IP version. A Profiler is either active for the
+    # whole process, from enable_profiling, or for one thread, inside a
+    # profile block. When profiling is off the only cost is one check in
+    # encode and decode.
+    @staticmethod
+    def enable_profiling():
+        # Start profiling the whole process into a new Profiler, unless one
+        # is already active, and return it
+        global _profiler, _profiling
+        with _profiling_lock:
+            if _profiler is None:
+                _profiler = Profiler()
+            _profiling = True
+            return _profiler
+
+    @staticmethod
+    def disable_profiling():
+        global _profiler, _profiling
+        with _profiling_lock:
+            _profiler = None
+            _profiling = _profile_blocks > 0
+
+    @staticmethod
+    def profiling_snapshot():
+        # The active Profiler's counters, or None if profiling is off
+        profiler = Hipku.active_profiler()
+        if profiler is None:
+            return None
+        return profiler.snapshot()
+
+    @staticmethod
+    def active_profiler():
+        # The Profiler of the profile block this thread is in, if any,
+        # otherwise the process-wide one from enable_profiling, or None
+        profiler = getattr(_thread_profilers, 'profiler', None)
+        if profiler is None:
+            return _profiler
+        return profiler
+
+    @staticmethod
+    @contextlib.contextmanager
+    def profile():
+        # Profile just the calls made by this thread inside a with block:
+        #
+        #     with Hipku.profile() as profiler:
+        #         ...
+        #     profiler.snapshot()
+        #
+        # Blocks in other threads have their own Profilers, and may start
+        # and end in any order. Blocks can be nested in one thread.
+        global _profile_blocks, _profiling
+        previous = getattr(_thread_profilers, 'profiler', None)
+        profiler = Profiler()
+        _thread_profilers.profiler = profiler
+        with _profiling_lock:
+            _profile_blocks += 1
+            _profiling = True
+        try:
+            yield profiler
+        finally:
+            _thread_profilers.profiler = previous
+            with _profiling_lock:
+                _profile_blocks -= 1
+                _profiling = _profile_blocks > 0 or _profiler is not None
+
+    @staticmethod
+    def encode_profiled(ip, profiler):
+        clock = time.perf_counter
+        start = clock()
+        try:
+            ipv6 = Hipku.ip_is_ipv6(ip)
+        except (ValueError, TypeError):
+            profiler.record('unknown', 'ip_is_ipv6', clock() - start)
+            raise
+        family = 'ipv6' if ipv6 else 'ipv4'
+        profiler.record(family, 'ip_is_ipv6', clock() - start)
+
+        decimal_octet_array = profiler.time(family, 'split_ip', Hipku.split_ip, ip, ipv6)
+        if not ipv6 and _ipv4_tables is not None:
+            haiku_text = profiler.time(family, 'encode_from_ipv4_tables', Hipku.encode_from_ipv4_tables,
+                                       decimal_octet_array)
+        elif ipv6 and _ipv6_fragment_cache is not None:
+            haiku_text = profiler.time(family, 'encode_from_ipv6_cache', Hipku.encode_from_ipv6_cache,
+                                       decimal_octet_array)
+        else:
+            factored_octet_array = profiler.time(family, 'factor_octets', Hipku.factor_octets,
+                                                 decimal_octet_array, ipv6)
+            encoded_word_array = profiler.time(family, 'encode_words', Hipku.encode_words,
+                                               factored_octet_array, ipv6)
+            haiku_text = profiler.time(family, 'write_haiku', Hipku.write_haiku, encoded_word_array, ipv6)
+
+        profiler.record(family, 'encode', clock() - start)
+        return haiku_text
+
+    @staticmethod
+    def decode_profiled(haiku, max_length, profiler, strict=False):
+        clock = time.perf_counter
+        start = clock()
+
+        try:
+            Hipku.check_haiku_length(haiku, max_length)
+            ipv6 = not haiku.startswith('The ')
+            ip_string = Hipku.decode_canonical(haiku, ipv6)
+        except (ValueError, TypeError, AttributeError):
+            profiler.record('unknown', 'decode_canonical', clock() - start)
+            raise
+        canonical_end = clock()
+        if ip_string is not None:
+            family = 'ipv6' if ipv6 else 'ipv4'
+            profiler.record(family, 'decode_canonical', canonical_end - start)
+            profiler.record(family, 'decode', clock() - start)
+            return ip_string
+        if strict:
+            profiler.record('unknown', 'canonical_miss', canonical_end - start)
+            raise ValueError('Decoding error: input haiku is not in the layout written by encode')
+
+        # The IP version isn't known until haiku_is_ipv6, so the failed
+        # canonical decode and split_haiku are recorded once that has run
+        try:
+            word_array = Hipku.split_haiku(haiku, max_length)
+        except (ValueError, TypeError, AttributeError):
+            profiler.record('unknown', 'canonical_miss', canonical_end - start)
+            profiler.record('unknown', 'split_haiku', clock() - canonical_end)
+            raise
+
+        split_end = clock()
+        ipv6 = Hipku.haiku_is_ipv6(word_array)
+        family = 'ipv6' if ipv6 else 'ipv4'
+        profiler.record(family, 'canonical_miss', canonical_end - start)
+        profiler.record(family, 'split_haiku', split_end - canonical_end)
+        profiler.record(family, 'haiku_is_ipv6', clock() - split_end)
+
+        factor_array = profiler.time(family, 'get_factors', Hipku.get_factors, word_array, ipv6)
+        octet_array = profiler.time(family, 'get_octets', Hipku.get_octets, factor_array, ipv6)
+        ip_string = profiler.time(family, 'get_ip_string', Hipku.get_ip_string, octet_array, ipv6)
+
+        profiler.record(family, 'decode', clock() - start)
+        return ip_string
+
+    # Encoding and decoding of addresses that are already integers, packed
+    # bytes or ipaddress objects. These skip parsing and formatting the
+    # address text.
+    @staticmethod
+    def encode_int(value, version):
+        ipv6 = Hipku.version_is_ipv6(version)
+        factor_array = Hipku.factor_int(value, ipv6)
+        return Hipku.encode_factors(factor_array, ipv6)
+
+    @staticmethod
+    def encode_packed(packed):
+        if len(packed) == 16:
+            ipv6 = True
+            factor_array = list(packed)
+        elif len(packed) == 4:
+            ipv6 = False
+            factor_array = []
+            for octet in packed:
+                factor_array.append(octet >> 4)
+                factor_array.append(octet & 15)
+        else:
+            raise ValueError('Formatting error in IP Address input. Packed addresses must be 4 or 16 bytes long.')
+        return Hipku.encode_factors(factor_array, ipv6)
+
+    @staticmethod
+    def encode_address(address):
+        # address is an ipaddress.IPv4Address or ipaddress.IPv6Address
+        return Hipku.encode_int(int(address), address.version)
+
+    @staticmethod
+    def decode_to_int(haiku, max_length=None):
+        # Returns a tuple of the address as an integer and its IP version
+        word_array = Hipku.split_haiku(haiku, max_length)
+        ipv6 = Hipku.haiku_is_ipv6(word_array)
+        factor_array = Hipku.get_factors(word_array, ipv6)
+        if ipv6:
+            version = 6
+        else:
+            version = 4
+        return Hipku.combine_factors(factor_array, ipv6), version
+
+    @staticmethod
+    def decode_to_packed(haiku, max_length=None):
+        value, version = Hipku.decode_to_int(haiku, max_length)
+        if version == 6:
+            return value.to_bytes(16, 'big')
+        return value.to_bytes(4, 'big')
+
+    # Encoding to bytes. The haiku templates and their words are kept
+    # encoded as ASCII, so a haiku is made as bytes with one % format,
+    # without building a str and encoding it.
+    @staticmethod
+    def encode_bytes(ip):
+        ipv6 = Hipku.ip_is_ipv6(ip)
+        decimal_octet_array = Hipku.split_ip(ip, ipv6)
+        factor_array = Hipku.factor_octets(decimal_octet_array, ipv6)
+        haiku_format, slot_dictionaries = Hipku.get_bytes_template(ipv6)
+        return haiku_format % tuple([slot_dictionaries[i][factor_array[i]] for i in range(len(factor_array))])
+
+    @staticmethod
+    def encode_into(ip, buffer, offset=0):
+        # Write the haiku for ip into a writable buffer such as a bytearray
+        # or memoryview, starting at offset. Returns the number of bytes
+        # written. Raises ValueError rather than writing past the end of
+        # the buffer, since assigning to a bytearray slice would grow it.
+        if offset < 0:
+            raise ValueError('offset must not be negative, not %d' % offset)
+        data = Hipku.encode_bytes(ip)
+        end = offset + len(data)
+        if end > len(buffer):
+            raise ValueError('Buffer of %d bytes is too small for %d bytes at offset %d'
+                             % (len(buffer), len(data), offset))
+        buffer[offset:end] = data
+        return len(data)
+
+    @staticmethod
+    def get_bytes_template(ipv6):
+        # The compiled template as a bytes % format and its slot
+        # dictionaries as bytes. Built once per IP version.
+        bytes_template = _bytes_templates.get(ipv6)
+        if bytes_template is None:
+            template = Hipku.get_template(ipv6)
+            haiku_format = template[0].replace('%', '%%').format(*['%b'] * len(template[1])).encode('ascii')
+            slot_dictionaries = tuple(tuple(word.encode('ascii') for word in dictionary)
+                                      for dictionary in template[1])
+            bytes_template = (haiku_format, slot_dictionaries)
+            _bytes_templates[ipv6] = bytes_template
+        return bytes_template
+
+    # Encoding ranges of addresses. Consecutive addresses share all but
+    # their last few factors, so the range is walked like an odometer: the
+    # haiku is kept as a list of literal text and words, and each step only
+    # replaces the words for the factors that changed.
+    @staticmethod
+    def encode_range(start, end, step=1):
+        # Yield (address, haiku) for every step'th address from start to
+        # end, including end. start and end are address strings or
+        # ipaddress objects of the same IP version, and the addresses are
+        # yielded in the same form as start.
+        start_value, ipv6 = Hipku.address_to_int(start)
+        end_value, end_ipv6 = Hipku.address_to_int(end)
+        if ipv6 != end_ipv6:
+            raise ValueError('Formatting error in IP Address input. %s and %s are different IP versions.'
+                             % (start, end))
+        if isinstance(start, str):
+            make_address = None
+        else:
+            make_address = type(start)
+        return Hipku.walk_range(start_value, end_value, step, ipv6, make_address)
+
+    @staticmethod
+    def encode_network(network, step=1):
+        # Yield (address, haiku) for every step'th address in an
+        # ipaddress.IPv4Network or IPv6Network, including the network and
+        # broadcast addresses. Addresses are ipaddress objects.
+        start = network.network_address
+        return Hipku.walk_range(int(start), int(network.broadcast_address), step, start.version == 6, type(start))
+
+    @staticmethod
+    def walk_range(start_value, end_value, step, ipv6, make_address=None):
+        # Validate up front, so errors are raised by encode_range rather
+        # than on the first next()
+        if not isinstance(step, int) or step < 1:
+            raise ValueError('step must be a positive integer, not %r' % (step,))
+        if start_value > end_value:
+            raise ValueError('Formatting error in IP Address input. The range ends before it starts.')
+        return Hipku.walk_factors(start_value, end_value, step, ipv6, make_address)
+
+    @staticmethod
+    def walk_factors(start_value, end_value, step, ipv6, make_address):
+        if ipv6:
+            base = 256
+            ip_format = ':'.join(['%x'] * 8)
+        else:
+            base = 16
+            ip_format = '.'.join(['%d'] * 4)
+
+        # The haiku as alternating literal text and words, so the word for
+        # factor i is at parts[2 * i + 1]
+        template = Hipku.get_template(ipv6)
+        slot_dictionaries = template[1]
+        literals = [literal.replace('{{', '{').replace('}}', '}') for literal in template[0].split('{}')]
+        factor_array = Hipku.factor_int(start_value, ipv6)
+        parts = [literals[0]]
+        for i in range(len(factor_array)):
+            parts.append(slot_dictionaries[i][factor_array[i]])
+            parts.append(literals[i + 1])
+
+        # Steps too big for the address space end the range after one
+        # address
+        if step > end_value - start_value:
+            step = end_value - start_value + 1
+            step_factors = [0] * len(factor_array)
+        else:
+            step_factors = Hipku.factor_int(step, ipv6)
+        lowest = len(step_factors) - 1
+        while lowest > 0 and step_factors[lowest] == 0:
+            lowest -= 1
+        highest = 0
+        while highest < lowest and step_factors[highest] == 0:
+            highest += 1
+
+        value = start_value
+        while True:
+            if make_address is None:
+                if ipv6:
+                    address = ip_format % tuple(factor_array[i] * base + factor_array[i + 1] for i in range(0, 16, 2))
+                else:
+                    address = ip_format % (factor_array[0] * base + factor_array[1],
+                                           factor_array[2] * base + factor_array[3],
+                                           factor_array[4] * base + factor_array[5],
+                                           factor_array[6] * base + factor_array[7])
+            else:
+                address = make_address(value)
+            yield address, ''.join(parts)
+
+            value += step
+            if value > end_value:
+                return
+
+            # Add the step factors from the lowest changing factor up,
+            # stopping once there's no carry left and no step to add
+            carry = 0
+            i = lowest
+            while i >= 0 and (carry or i >= highest):
+                carry, factor = divmod(factor_array[i] + step_factors[i] + carry, base)
+                if factor != factor_array[i]:
+                    factor_array[i] = factor
+                    parts[2 * i + 1] = slot_dictionaries[i][factor]
+                i -= 1
+
+    @staticmethod
+    def address_to_int(address):
+        # Returns a tuple of an address string or ipaddress object as an
+        # integer and whether it's IPv6
+        if isinstance(address, str):
+            ipv6 = Hipku.ip_is_ipv6(address)
+            octet_array = Hipku.split_ip(address, ipv6)
+            if ipv6:
+                bits = 16
+            else:
+                bits = 8
+            value = 0
+            for octet in octet_array:
+                value = (value << bits) | octet
+            return value, ipv6
+        return int(address), Hipku.version_is_ipv6(address.version)
+
+    # Prefix search. The start of a haiku fixes the factors of the slots it
+    # covers and leaves the rest free, so it stands for whole networks
+    # rather than single addresses: one for each dictionary entry that the
+    # last word could be the start of.
+    @staticmethod
+    def match_prefix(words):
+        # words is the start of a haiku, as a string or a list of words.
+        # Lazily yields the ipaddress networks it can belong to, IPv4 ones
+        # first. The last word of a string is taken to be complete if
+        # anything but a letter follows it, e.g. 'The weary red dove.'.
+        if isinstance(words, str):
+            complete = words != '' and not (words[-1].isalpha() or words[-1] == '-')
+            word_array = Hipku.split_haiku(words)
+        else:
+            complete = False
+            word_array = Hipku.split_haiku(' '.join(words))
+        for ipv6 in (False, True):
+            yield from Hipku.match_prefix_words(word_array, complete, ipv6)
+
+    @staticmethod
+    def match_prefix_words(word_array, complete, ipv6):
+        # Imported here, since ipaddress is slow to import and only needed
+        # for prefix search
+        import ipaddress
+        tokens, slot_indexes = Hipku.get_prefix_index(ipv6)
+        reverse_key = Hipku.get_reverse_key(ipv6)
+        if ipv6:
+            bits = 8
+            network_class = ipaddress.IPv6Network
+        else:
+            bits = 4
+            network_class = ipaddress.IPv4Network
+        address_bits = len(reverse_key) * bits
+
+        def network(factor_array):
+            value = 0
+            for factor in factor_array:
+                value = (value << bits) | factor
+            prefix_length = len(factor_array) * bits
+            return network_class((value << (address_bits - prefix_length), prefix_length))
+
+        def walk(token, position, factor_array):
+            # Match word_array[position:] against tokens[token:], where each
+            # token is a literal word, or None for a word slot
+            if position == len(word_array):
+                yield network(factor_array)
+                return
+            if token == len(tokens):
+                return
+
+            remaining = word_array[position:]
+            literal = tokens[token]
+            if literal is not None:
+                if remaining[0] == literal or (len(remaining) == 1 and not complete
+                                               and literal.startswith(remaining[0])):
+                    yield from walk(token + 1, position + 1, factor_array)
+                return
+
+            # Entries that end before the words do fix this slot's factor
+            slot = len(factor_array)
+            word_index, entry_lengths = reverse_key[slot]
+            for entry_length in entry_lengths:
+                if position + entry_length < len(word_array):
+                    factor = word_index.get(' '.join(word_array[position:position + entry_length]))
+                    if factor is not None:
+                        yield from walk(token + 1, position + entry_length, factor_array + [factor])
+
+            # If the words end in this slot, every entry they're the start
+            # of is a candidate. The entries are sorted, so those are next
+            # to each other.
+            entries, entry_factors = slot_indexes[slot]
+            text = ' '.join(remaining)
+            candidates = []
+            for i in range(bisect.bisect_left(entries, text), len(entries)):
+                entry = entries[i]
+                if not entry.startswith(text):
+                    break
+                if not complete or len(entry) == len(text) or entry[len(text)] == ' ':
+                    candidates.append(entry_factors[i])
+            for factor in sorted(candidates):
+                yield network(factor_array + [factor])
+
+        return walk(0, 0, [])
+
+    @staticmethod
+    def get_prefix_index(ipv6):
+        # The haiku layout as a tuple of lowercase literal words, with None
+        # for each word slot, and each slot's entries in sorted order with
+        # their factors. Built once per IP version.
+        prefix_index = _prefix_indexes.get(ipv6)
+        if prefix_index is None:
+            octet = 'octet'
+            schema, non_words = Hipku.get_schema(ipv6, octet)
+            tokens = []
+            for entry in schema:
+                if entry == octet:
+                    tokens.append(None)
+                elif entry not in non_words:
+                    tokens.extend(entry.lower().split(' '))
+
+            slot_indexes = []
+            for dictionary in Hipku.get_key(ipv6):
+                entries = sorted(range(len(dictionary)), key=dictionary.__getitem__)
+                slot_indexes.append((tuple(dictionary[j] for j in entries), tuple(entries)))
+
+            prefix_index = (tuple(tokens), tuple(slot_indexes))
+            _prefix_indexes[ipv6] = prefix_index
+        return prefix_index
+
+    # Typo-tolerant decoding. Each slot's dictionary has an index of the
+    # strings left after deleting up to max_distance letters from its
+    # words. Two strings within max_distance edits of each other always
+    # share one of those, so the words close to a typo are found with a
+    # few dictionary lookups, and only those words have their edit
+    # distance computed.
+    @staticmethod
+    def decode_fuzzy(haiku, max_distance=2, max_length=None):
+        # Returns a tuple of the address, a list of (typed, corrected)
+        # pairs and a confidence between 0 and 1. Words that aren't in the
+        # haiku layout are skipped, so long as every slot can be matched
+        # to a word within max_distance edits.
+        Hipku.check_haiku_length(haiku, max_length)
+        if not 0 <= max_distance <= Hipku.max_fuzzy_distance:
+            raise ValueError('Decoding error: max_distance must be between 0 and %d' % Hipku.max_fuzzy_distance)
+        ip_string = Hipku.decode_canonical(haiku, not haiku.startswith('The '))
+        if ip_string is not None:
+            return ip_string, [], 1.0
+
+        # Try the likelier IP version without corrections first, as that's
+        # cheap. Otherwise try both, and keep the better match.
+        word_array = Hipku.split_haiku(haiku, max_length)
+        likely_ipv6 = Hipku.haiku_is_ipv6(word_array)
+        best = Hipku.match_fuzzy(word_array, likely_ipv6, 0)
+        if best is not None and best[0] == 0:
+            best += (likely_ipv6,)
+        else:
+            best = None
+            for ipv6 in (likely_ipv6, not likely_ipv6):
+                result = Hipku.match_fuzzy(word_array, ipv6, max_distance)
+                if result is not None and (best is None or result[0] < best[0]
+                                           or (result[0] == best[0] and result[3] > best[3])):
+                    best = result + (ipv6,)
+                if best is not None and best[0] == 0:
+                    break
+        if best is None:
+            raise ValueError('Decoding error: one or more dictionary words missing from input haiku')
+
+        cost, factor_array, corrections, confidence, ipv6 = best
+        octet_array = Hipku.get_octets(factor_array, ipv6)
+        return Hipku.get_ip_string(octet_array, ipv6), corrections, confidence
+
+    @staticmethod
+    def match_fuzzy(word_array, ipv6, max_distance):
+        # Line the words up with the slots of one IP version's layout at
+        # the lowest cost: the edit distances of the matched words, plus
+        # max_distance + 1 for each word that's skipped and isn't one of
+        # the layout's own words such as 'the'. Returns a tuple of the
+        # cost, the factors, the corrections and the confidence, or None
+        # if the slots can't all be matched.
+        tokens = Hipku.get_prefix_index(ipv6)[0]
+        literals = set(token for token in tokens if token is not None)
+        slot_indexes = Hipku.get_fuzzy_index(ipv6, max_distance)
+        reverse_key = Hipku.get_reverse_key(ipv6)
+        slots = len(reverse_key)
+        words = len(word_array)
+        skip_cost = max_distance + 1
+
+        # cost[slot][position] is the lowest cost of matching slots slot
+        # onward to words position onward, and choice records how. Slots
+        # share dictionaries, so lookups are kept for the whole haiku.
+        lookups = {}
+        cost = [[None] * (words + 1) for _ in range(slots + 1)]
+        choice = [[None] * (words + 1) for _ in range(slots)]
+        for position in range(words, -1, -1):
+            cost[slots][position] = 0
+            if position < words and word_array[position] not in literals:
+                cost[slots][position] = cost[slots][position + 1] + skip_cost
+
+        for slot in range(slots - 1, -1, -1):
+            entry_lengths = reverse_key[slot][1]
+            for position in range(words - 1, slot - 1, -1):
+                best = None
+                if cost[slot][position + 1] is not None:
+                    best = cost[slot][position + 1]
+                    if word_array[position] not in literals:
+                        best += skip_cost
+                    choice[slot][position] = None
+
+                for entry_length in entry_lengths:
+                    after = cost[slot + 1][position + entry_length] if position + entry_length <= words else None
+                    if after is None or (best is not None and after >= best):
+                        continue
+                    text = ' '.join(word_array[position:position + entry_length])
+                    matches = lookups.get((id(slot_indexes[slot]), text))
+                    if matches is None:
+                        matches = Hipku.fuzzy_lookup(slot_indexes[slot], reverse_key[slot][0], text, max_distance)
+                        lookups[(id(slot_indexes[slot]), text)] = matches
+                    if matches and (best is None or matches[0][0] + after < best):
+                        best = matches[0][0] + after
+                        choice[slot][position] = (entry_length, text, matches)
+                cost[slot][position] = best
+
+        if cost[0][0] is None:
+            return None
+
+        # Follow the choices to get the factors
+        factor_array = []
+        corrections = []
+        confidence = 1.0
+        position = 0
+        dictionaries = Hipku.get_key(ipv6)
+        for slot in range(slots):
+            while choice[slot][position] is None:
+                position += 1
+            entry_length, text, matches = choice[slot][position]
+            distance, factor = matches[0]
+            factor_array.append(factor)
+            if distance:
+                word = dictionaries[slot][factor]
+                corrections.append((text, word))
+
+                # Lose confidence for each edit, relative to the word's
+                # length, and share it between equally close words
+                ties = sum(1 for match in matches if match[0] == distance)
+                confidence *= (1 - distance / max(len(text), len(word))) / ties
+            position += entry_length
+
+        return cost[0][0], factor_array, corrections, confidence
+
+    @staticmethod
+    def fuzzy_lookup(slot_index, word_index, text, max_distance):
+        # Returns a list of (distance, factor) for the entries within
+        # max_distance edits of text, closest first
+        factor = word_index.get(text)
+        if factor is not None:
+            return [(0, factor)]
+
+        # Text further in length from every entry can't match, and making
+        # its deletions would take time and memory that grow with its
+        # length
+        deletion_index, shortest, longest = slot_index
+        if not shortest - max_distance <= len(text) <= longest + max_distance:
+            return []
+        candidates = set()
+        for deletion in Hipku.get_deletions(text, max_distance):
+            candidates.update(deletion_index.get(deletion, ()))
+        matches = []
+        for candidate, factor in candidates:
+            distance = Hipku.edit_distance(text, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, factor))
+        matches.sort()
+        return matches
+
+    @staticmethod
+    def get_fuzzy_index(ipv6, max_distance):
+        # Deletion indexes for each slot's dictionary, mapping each string
+        # left after up to max_distance deletions to the (entry, factor)
+        # pairs it came from, with the lengths of the dictionary's shortest
+        # and longest entries. Built once per IP version and distance, and
+        # shared by slots with the same dictionary.
+        fuzzy_index = _fuzzy_indexes.get((ipv6, max_distance))
+        if fuzzy_index is None:
+            built = {}
+            slot_indexes = []
+            for dictionary in Hipku.get_key(ipv6):
+                slot_index = built.get(id(dictionary))
+                if slot_index is None:
+                    deletion_index = {}
+                    for factor in range(len(dictionary)):
+                        for deletion in Hipku.get_deletions(dictionary[factor], max_distance):
+                            deletion_index.setdefault(deletion, []).append((dictionary[factor], factor))
+                    lengths = [len(entry) for entry in dictionary]
+                    slot_index = (deletion_index, min(lengths), max(lengths))
+                    built[id(dictionary)] = slot_index
+                slot_indexes.append(slot_index)
+            fuzzy_index = tuple(slot_indexes)
+            _fuzzy_indexes[(ipv6, max_distance)] = fuzzy_index
+        return fuzzy_index
+
+    @staticmethod
+    def get_deletions(word, max_distance):
+        # The set of strings made by deleting up to max_distance letters
+        deletions = {word}
+        current = {word}
+        for _ in range(max_distance):
+            current = set(candidate[:i] + candidate[i + 1:] for candidate in current for i in range(len(candidate)))
+            deletions |= current
+        return deletions
+
+    @staticmethod
+    def edit_distance(a, b, max_distance):
+        # Levenshtein distance, or max_distance + 1 once it's certain to be
+        # more than max_distance
+        if abs(len(a) - len(b)) > max_distance:
+            return max_distance + 1
+        previous = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            current = [i]
+            for j in range(1, len(b) + 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1,
+                                   previous[j - 1] + (a[i - 1] != b[j - 1])))
+            if min(current) > max_distance:
+                return max_distance + 1
+            previous = current
+        return previous[-1]
+
+    # Rewriting text. Every IPv4 or IPv6 address found in the text is
+    # replaced with its haiku on a single line, e.g. to make log files
+    # easier to read. Anything that looks like an address but isn't valid
+    # is left alone.
+    @staticmethod
+    def rewrite_text(text):
+        return Hipku.make_rewriter()(text)
+
+    @staticmethod
+    def rewrite_stream(infile, outfile, chunk_size=1 << 20):
+        # Rewrite a binary stream in chunks that end on a line break.
+        # Returns the number of bytes read.
+        rewrite = Hipku.make_rewriter()
+        size = 0
+        pending = b''
+        while True:
+            chunk = infile.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            chunk = pending + chunk
+            end = chunk.rfind(b'\n') + 1
+            pending = chunk[end:]
+            outfile.write(Hipku.rewrite_bytes(rewrite, chunk[:end]))
+        outfile.write(Hipku.rewrite_bytes(rewrite, pending))
+        return size
+
+    @staticmethod
+    def rewrite_file(path, outfile, chunk_size=1 << 20):
+        # Rewrite a file through a memory map, in chunks that end on a line
+        # break, writing bytes to outfile. Returns the size of the file.
+        rewrite = Hipku.make_rewriter()
+        with open(path, 'rb') as infile:
+            size = os.fstat(infile.fileno()).st_size
+            if size == 0:
+                return 0
+            with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                start = 0
+                while start < size:
+                    end = min(start + chunk_size, size)
+                    if end < size:
+                        # Extend the chunk to the next line break
+                        line_end = mapped.find(b'\n', end - 1)
+                        if line_end == -1:
+                            end = size
+                        else:
+                            end = line_end + 1
+                    outfile.write(Hipku.rewrite_bytes(rewrite, mapped[start:end]))
+                    start = end
+        return size
+
+    @staticmethod
+    def rewrite_bytes(rewrite, data):
+        # Bytes that aren't valid UTF-8 are carried through unchanged
+        text = data.decode('utf-8', 'surrogateescape')
+        return rewrite(text).encode('utf-8', 'surrogateescape')
+
+    @staticmethod
+    def make_rewriter(cache_size=4096):
+        # Return a function that rewrites the addresses in a string. Log
+        # files repeat the same addresses a lot, so recent haiku are kept
+        # in an LRUCache.
+        encode = Hipku.make_encoder()
+        cache = LRUCache(cache_size)
+
+        def replace(match):
+            ip = match.group()
+            haiku = cache.get(ip)
+            if haiku is None:
+                try:
+                    haiku = Hipku.to_single_line(encode(ip))
+                except (ValueError, IndexError):
+                    haiku = ip
+                cache.put(ip, haiku)
+            return haiku
+
+        def rewrite(text):
+            return _ip_scanner.sub(replace, text)
+
+        return rewrite
+
+    @staticmethod
+    def to_single_line(haiku):
+        # Put a haiku on one line, e.g. for log files. It still decodes to
+        # the same address.
+        return haiku.rstrip('\n').replace('\n', ' ')
+
+    @staticmethod
+    def version_is_ipv6(version):
+        if version == 6:
+            return True
+        elif version == 4:
+            return False
+        else:
+            raise ValueError('IP version must be 4 or 6, not %r' % (version,))
+
+    # Bulk encoding and decoding. These are generators so that large
+    # inputs can be streamed. errors decides what happens to an item that
+    # can't be converted: 'raise' stops the batch, 'skip' drops the item
+    # and 'yield' yields the exception in place of the result. Items can
+    # be converted in batches across threads, either in a pool of workers
+    # threads (0 for one per CPU) made for the call, or in a
+    # concurrent.futures executor. Results are still yielded in order.
+    @staticmethod
+    def encode_many(ips, errors='raise', executor=None, workers=None):
+        return Hipku.map_items(Hipku.make_encoder(), ips, errors, executor, workers)
+
+    @staticmethod
+    def decode_many(haikus, errors='raise', max_length=None, executor=None, workers=None):
+        def decode(haiku):
+            return Hipku.decode(haiku, max_length)
+        return Hipku.map_items(decode, haikus, errors, executor, workers)
+
+    @staticmethod
+    def convert_stream(infile, outfile, command, workers=1, chunk_size=1 << 20, separator='\n',
+                       terminator='\n', single_line=False, errors='raise', max_length=None, executor=None):
+        # Encode or decode the records in a text stream, writing each result
+        # to outfile followed by terminator. The input is split into chunks
+        # of about chunk_size characters that end on a separator. With more
+        # than one worker (None or 0 for one per CPU) the chunks are
+        # converted in a process pool, or in executor if one is given, e.g.
+        # a ThreadPoolExecutor on a free-threaded build. The output is
+        # still written in input order. errors is 'raise', 'skip', or
+        # 'report' to skip and write a message to stderr. Returns the
+        # number of records skipped.
+        if errors not in ('raise', 'skip', 'report'):
+            raise ValueError('errors must be one of "raise", "skip" or "report", not %r' % (errors,))
+        if not separator:
+            raise ValueError('The record separator must not be empty')
+        if not workers:
+            workers = os.cpu_count() or 1
+
+        arguments = (separator, terminator, single_line, errors, max_length)
+        chunks = _read_chunks(infile, separator, chunk_size)
+        failed = 0
+
+        def write(result):
+            # Write what was converted before raising a chunk's error, so
+            # the records ahead of a bad one still reach the output
+            output, messages, error = result
+            outfile.write(output)
+            if error is not None:
+                raise error
+            if errors == 'report':
+                for message in messages:
+                    sys.stderr.write('hipku: %s\n' % message)
+            return len(messages)
+
+        if workers == 1 and executor is None:
+            for chunk in chunks:
+                failed += write(_convert_chunk(command, chunk, *arguments))
+            return failed
+
+        # Keep a couple of chunks per worker in flight, so memory use stays
+        # bounded however large the input is. concurrent.futures is slow to
+        # import, so only programs that use a pool pay for it.
+        import concurrent.futures
+        with contextlib.ExitStack() as stack:
+            if executor is None:
+                executor = stack.enter_context(concurrent.futures.ProcessPoolExecutor(workers))
+            pending = collections.deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_convert_chunk, command, chunk, *arguments))
+                if len(pending) >= workers * 2:
+                    failed += write(pending.popleft().result())
+            while pending:
+                failed += write(pending.popleft().result())
+        return failed
+
+    @staticmethod
+    def make_encoder():
+        # Return an encode function that fills the compiled templates
+        # directly from the factors, skipping the word array
+        def encode(ip):
+            ipv6 = Hipku.ip_is_ipv6(ip)
+            decimal_octet_array = Hipku.split_ip(ip, ipv6)
+            factored_octet_array = Hipku.factor_octets(decimal_octet_array, ipv6)
+            return Hipku.encode_factors(factored_octet_array, ipv6)
+
+        return encode
+
+    # Array encoding. IPv4 addresses are given as unsigned 32-bit integers
+    # and IPv6 addresses as (high, low) pairs of unsigned 64-bit integers,
+    # e.g. a NumPy array of shape (n,) or (n, 2). With NumPy installed the
+    # factoring and word lookups are done for the whole array at once,
+    # otherwise each value is factored in Python. Returns a list of haiku.
+    @staticmethod
+    def encode_array(values, ipv6=None):
+        numpy = _import_numpy(required=False)
+        if numpy is None:
+            return Hipku.encode_array_python(values, ipv6)
+
+        values = numpy.asarray(values)
+        # An empty list comes out as a float array, so return early, as the
+        # pure Python path does
+        if values.size == 0:
+            return []
+        if ipv6 is None:
+            ipv6 = values.ndim == 2
+
+        factor_array = Hipku.factor_integer_array(values, ipv6)
+        key = Hipku.get_array_key(ipv6)
+        haiku_format = Hipku.get_template(ipv6)[0]
+
+        # Gather one column of words per key position, then lay out each row
+        columns = [key[i][factor_array[:, i]] for i in range(len(key))]
+        return [haiku_format.format(*row) for row in zip(*columns)]
+
+    @staticmethod
+    def encode_array_python(values, ipv6=None):
+        values = list(values)
+        if ipv6 is None:
+            ipv6 = len(values) > 0 and isinstance(values[0], (tuple, list))
+
+        haikus = []
+        for value in values:
+            if ipv6:
+                high, low = value
+                if high < 0 or low < 0 or high >> 64 or low >> 64:
+                    raise ValueError('Formatting error in IP Address input. Address in array is out of range.')
+                value = (high << 64) | low
+            factor_array = Hipku.factor_int(value, ipv6)
+            haikus.append(Hipku.encode_factors(factor_array, ipv6))
+        return haikus
+
+    @staticmethod
+    def factor_int(value, ipv6):
+        # Split an integer address into the same factors factor_octets
+        # produces: bytes for IPv6, nibbles for IPv4
+        if ipv6:
+            bits = 128
+        else:
+            bits = 32
+        if value < 0 or value >> bits:
+            raise ValueError('Formatting error in IP Address input. %d is not a %d-bit integer.' % (value, bits))
+
+        if ipv6:
+            return list(value.to_bytes(16, 'big'))
+        return [(value >> shift) & 15 for shift in range(28, -4, -4)]
+
+    @staticmethod
+    def factor_integer_array(values, ipv6):
+        # Vectorised factor_int: returns an (n, 8) array of nibbles for IPv4
+        # or an (n, 16) array of bytes for IPv6
+        numpy = _import_numpy()
+
+        if values.dtype.kind not in 'iu':
+            raise TypeError('IP address arrays must have an integer dtype, not %s' % values.dtype)
+        if ipv6:
+            if values.ndim != 2 or values.shape[1] != 2:
+                raise ValueError('IPv6 address arrays must have shape (n, 2), not %r' % (values.shape,))
+            dtype = numpy.uint64
+        else:
+            if values.ndim != 1:
+                raise ValueError('IPv4 address arrays must have shape (n,), not %r' % (values.shape,))
+            dtype = numpy.uint32
+
+        # Reject values that would wrap around when cast
+        if values.size:
+            if values.dtype.kind == 'i' and values.min() < 0:
+                raise ValueError('Formatting error in IP Address input. Negative address in array.')
+            if numpy.iinfo(values.dtype).max > numpy.iinfo(dtype).max and values.max() > numpy.iinfo(dtype).max:
+                raise ValueError('Formatting error in IP Address input. Address in array is out of range.')
+        values = values.astype(dtype, copy=False)
+
+        if ipv6:
+            shifts = numpy.arange(56, -8, -8, dtype=dtype)
+            high = (values[:, 0:1] >> shifts) & 255
+            low = (values[:, 1:2] >> shifts) & 255
+            return numpy.concatenate((high, low), axis=1).astype(numpy.intp)
+        shifts = numpy.arange(28, -4, -4, dtype=dtype)
+        return ((values[:, None] >> shifts) & 15).astype(numpy.intp)
+
+    # Array decoding, the reverse of encode_array. Returns a tuple of the
+    # decoded values and a mask of which rows decoded successfully. Rows
+    # that fail to decode, or decode to the other IP version, are left as
+    # zero and marked invalid instead of raising. If ipv6 isn't given it's
+    # taken from the first row that decodes.
+    @staticmethod
+    def decode_array(haikus, ipv6=None, max_length=None):
+        numpy = _import_numpy(required=False)
+        if numpy is None:
+            return Hipku.decode_array_python(haikus, ipv6, max_length)
+
+        ipv6, rows, valid = Hipku.decode_factor_rows(haikus, ipv6, max_length)
+        if ipv6:
+            dtype = numpy.uint64
+        else:
+            dtype = numpy.uint32
+        factor_array = numpy.array(rows, dtype=dtype).reshape(len(rows), len(Hipku.get_key(ipv6)))
+
+        # Recombine the factors with shifts rather than going through
+        # get_octets and get_ip_string
+        if ipv6:
+            shifts = numpy.arange(56, -8, -8, dtype=dtype)
+            high = (factor_array[:, :8] << shifts).sum(axis=1, dtype=dtype)
+            low = (factor_array[:, 8:] << shifts).sum(axis=1, dtype=dtype)
+            values = numpy.stack((high, low), axis=1)
+        else:
+            shifts = numpy.arange(28, -4, -4, dtype=dtype)
+            values = (factor_array << shifts).sum(axis=1, dtype=dtype)
+
+        return values, numpy.array(valid, dtype=bool)
+
+    @staticmethod
+    def decode_array_python(haikus, ipv6=None, max_length=None):
+        ipv6, rows, valid = Hipku.decode_factor_rows(haikus, ipv6, max_length)
+        values = []
+        for factor_array in rows:
+            value = Hipku.combine_factors(factor_array, ipv6)
+            if ipv6:
+                value = (value >> 64, value & 0xFFFFFFFFFFFFFFFF)
+            values.append(value)
+        return values, valid
+
+    @staticmethod
+    def decode_factor_rows(haikus, ipv6=None, max_length=None):
+        # Decode each haiku as far as its list of factors, substituting
+        # zeros for rows that can't be decoded
+        rows = []
+        valid = []
+        for haiku in haikus:
+            try:
+                word_array = Hipku.split_haiku(haiku, max_length)
+                haiku_ipv6 = Hipku.haiku_is_ipv6(word_array)
+                if ipv6 is not None and haiku_ipv6 != ipv6:
+                    raise ValueError('Decoding error: haiku encodes the wrong IP version')
+                factor_array = Hipku.get_factors(word_array, haiku_ipv6)
+                ipv6 = haiku_ipv6
+            except (ValueError, TypeError, AttributeError):
+                factor_array = None
+            rows.append(factor_array)
+            valid.append(factor_array is not None)
+
+        if ipv6 is None:
+            ipv6 = False
+        zeros = [0] * len(Hipku.get_key(ipv6))
+        rows = [zeros if factor_array is None else factor_array for factor_array in rows]
+        return ipv6, rows, valid
+
+    @staticmethod
+    def combine_factors(factor_array, ipv6):
+        # The reverse of factor_int
+        if ipv6:
+            return int.from_bytes(bytes(factor_array), 'big')
+        value = 0
+        for factor in factor_array:
+            value = (value << 4) | factor
+        return value
+
+    @staticmethod
+    def get_array_key(ipv6):
+        # The template's slot dictionaries as NumPy object arrays, so words
+        # can be gathered for a whole column of factors with one index
+        # operation
+        array_key = _array_keys.get(ipv6)
+        if array_key is None:
+            numpy = _import_numpy()
+            slot_dictionaries = Hipku.get_template(ipv6)[1]
+            array_key = tuple(numpy.array(dictionary, dtype=object) for dictionary in slot_dictionaries)
+            _array_keys[ipv6] = array_key
+        return array_key
+
+    # Arrow and pandas columns. Columns are converted chunk by chunk. A
+    # column of addresses or haiku is dictionary encoded, so each distinct
+    # value is converted once, and the results are gathered back into a
+    # column by Arrow. Integer and packed address columns are factored
+    # with Arrow or NumPy and their haiku built with Arrow string
+    # functions, so no Python object is made per row. Nulls stay null.
+    # errors is 'raise', or 'null' to turn values that can't be converted
+    # into nulls.
+    @staticmethod
+    def encode_arrow(column, errors='raise'):
+        # column is a pyarrow Array or ChunkedArray of address strings,
+        # IPv4 addresses as integers, or packed addresses as 4 or 16 byte
+        # fixed-size binary. Returns a string column of the same kind.
+        pyarrow = _import_pyarrow()
+        Hipku.check_column_errors(errors)
+        if isinstance(column, pyarrow.ChunkedArray):
+            return pyarrow.chunked_array([Hipku.encode_arrow_chunk(chunk, errors) for chunk in column.chunks],
+                                         type=pyarrow.string())
+        return Hipku.encode_arrow_chunk(column, errors)
+
+    @staticmethod
+    def decode_arrow(column, errors='raise', max_length=None):
+        # column is a pyarrow Array or ChunkedArray of haiku strings.
+        # Returns a string column of addresses of the same kind.
+        pyarrow = _import_pyarrow()
+        Hipku.check_column_errors(errors)
+
+        def decode(haiku):
+            return Hipku.decode(haiku, max_length)
+
+        if isinstance(column, pyarrow.ChunkedArray):
+            return pyarrow.chunked_array([Hipku.convert_arrow_strings(decode, chunk, errors)
+                                          for chunk in column.chunks], type=pyarrow.string())
+        return Hipku.convert_arrow_strings(decode, column, errors)
+
+    @staticmethod
+    def encode_arrow_chunk(chunk, errors):
+        pyarrow = _import_pyarrow()
+        numpy = _import_numpy()
+        column_type = chunk.type
+        if pyarrow.types.is_dictionary(column_type):
+            column_type = column_type.value_type
+
+        if pyarrow.types.is_string(column_type) or pyarrow.types.is_large_string(column_type):
+            return Hipku.convert_arrow_strings(Hipku.encode, chunk, errors)
+        if pyarrow.types.is_dictionary(chunk.type):
+            # Integers and packed addresses are read from the values
+            # buffer, which a dictionary column doesn't have
+            chunk = chunk.dictionary_decode()
+
+        if pyarrow.types.is_integer(column_type):
+            # Integers are IPv4 addresses. Widen so the range check and the
+            # shifts can't overflow.
+            values = chunk.cast(pyarrow.int64())
+            in_range = pyarrow.compute.and_(pyarrow.compute.greater_equal(values, 0),
+                                            pyarrow.compute.less_equal(values, 0xFFFFFFFF))
+            if pyarrow.compute.any(pyarrow.compute.invert(in_range)).as_py():
+                if errors == 'raise':
+                    raise ValueError('Formatting error in IP Address input. Address in column is out of range.')
+                values = pyarrow.compute.if_else(in_range, values, None)
+            factor_columns = [pyarrow.compute.bit_wise_and(pyarrow.compute.shift_right(values, shift), 15)
+                              for shift in range(28, -4, -4)]
+            return Hipku.join_arrow_words(factor_columns, False)
+
+        if pyarrow.types.is_fixed_size_binary(column_type) and column_type.byte_width in (4, 16):
+            # Packed addresses: the bytes are the IPv6 factors, and each
+            # byte is two IPv4 factors
+            width = column_type.byte_width
+            data = numpy.frombuffer(chunk.buffers()[1], dtype=numpy.uint8,
+                                    count=len(chunk) * width, offset=chunk.offset * width)
+            data = data.reshape(len(chunk), width)
+            if width == 4:
+                data = numpy.stack((data >> 4, data & 15), axis=2).reshape(len(chunk), 8)
+            mask = None
+            if chunk.null_count:
+                mask = chunk.is_null().to_numpy(zero_copy_only=False)
+            factor_columns = [pyarrow.array(data[:, i], mask=mask) for i in range(data.shape[1])]
+            return Hipku.join_arrow_words(factor_columns, width == 16)
+
+        raise TypeError('Arrow columns must hold address strings, integers or packed addresses, not %s'
+                        % chunk.type)
+
+    @staticmethod
+    def convert_arrow_strings(function, chunk, errors):
+        # Convert each distinct string once, then gather the results into
+        # a column. Nulls aren't in the dictionary and have null indices,
+        # so they stay null.
+        pyarrow = _import_pyarrow()
+        if not pyarrow.types.is_dictionary(chunk.type):
+            chunk = chunk.dictionary_encode()
+        converted = Hipku.convert_unique(function, chunk.dictionary.to_pylist(), errors)
+        return pyarrow.compute.take(pyarrow.array(converted, type=pyarrow.string()), chunk.indices)
+
+    @staticmethod
+    def join_arrow_words(factor_columns, ipv6):
+        # Build a column of haiku from a column of factors per slot: each
+        # slot's words are gathered with take, and the template's text and
+        # the words are joined row by row
+        pyarrow = _import_pyarrow()
+        template = Hipku.get_template(ipv6)
+        literals = [literal.replace('{{', '{').replace('}}', '}') for literal in template[0].split('{}')]
+        arrow_key = Hipku.get_arrow_key(ipv6)
+
+        parts = [literals[0]]
+        for i in range(len(factor_columns)):
+            parts.append(pyarrow.compute.take(arrow_key[i], factor_columns[i]))
+            parts.append(literals[i + 1])
+        return pyarrow.compute.binary_join_element_wise(*parts, '')
+
+    @staticmethod
+    def get_arrow_key(ipv6):
+        # The template's slot dictionaries as Arrow string arrays
+        arrow_key = _arrow_keys.get(ipv6)
+        if arrow_key is None:
+            pyarrow = _import_pyarrow()
+            slot_dictionaries = Hipku.get_template(ipv6)[1]
+            arrow_key = tuple(pyarrow.array(dictionary, type=pyarrow.string()) for dictionary in slot_dictionaries)
+            _arrow_keys[ipv6] = arrow_key
+        return arrow_key
+
+    @staticmethod
+    def encode_series(series, errors='raise'):
+        # series is a pandas Series of address strings or IPv4 addresses as
+        # integers. Returns a Series of haiku with the same index. Arrow
+        # backed Series are converted with encode_arrow and give an Arrow
+        # backed Series.
+        Hipku.check_column_errors(errors)
+        if Hipku.series_is_arrow(series):
+            column = Hipku.encode_arrow(_import_pyarrow().array(series.array), errors)
+            return Hipku.arrow_to_series(column, series)
+
+        if series.dtype.kind in 'iu':
+            def encode(value):
+                return Hipku.encode_int(int(value), 4)
+        else:
+            encode = Hipku.encode
+        return Hipku.convert_series(encode, series, errors)
+
+    @staticmethod
+    def decode_series(series, errors='raise', max_length=None):
+        # series is a pandas Series of haiku. Returns a Series of address
+        # strings with the same index.
+        Hipku.check_column_errors(errors)
+        if Hipku.series_is_arrow(series):
+            column = Hipku.decode_arrow(_import_pyarrow().array(series.array), errors, max_length)
+            return Hipku.arrow_to_series(column, series)
+
+        def decode(haiku):
+            return Hipku.decode(haiku, max_length)
+
+        return Hipku.convert_series(decode, series, errors)
+
+    @staticmethod
+    def convert_series(function, series, errors):
+        # Convert each distinct value once. Missing values get code -1,
+        # which picks the None on the end of the converted values.
+        pandas = _import_pandas()
+        numpy = _import_numpy()
+        codes, uniques = pandas.factorize(series)
+        converted = numpy.empty(len(uniques) + 1, dtype=object)
+        converted[:-1] = Hipku.convert_unique(function, list(uniques), errors)
+        return pandas.Series(converted[codes], index=series.index, name=series.name, dtype=object)
+
+    @staticmethod
+    def arrow_to_series(column, series):
+        # Wrap a string column in a Series like series. pandas string
+        # dtypes backed by Arrow are kept, so their missing value is too.
+        pandas = _import_pandas()
+        result = pandas.Series(pandas.arrays.ArrowExtensionArray(column), index=series.index, name=series.name)
+        if not isinstance(series.dtype, pandas.ArrowDtype):
+            result = result.astype(series.dtype)
+        return result
+
+    @staticmethod
+    def series_is_arrow(series):
+        pandas = _import_pandas()
+        return isinstance(series.dtype, pandas.ArrowDtype) or getattr(series.dtype, 'storage', None) == 'pyarrow'
+
+    @staticmethod
+    def convert_unique(function, values, errors):
+        if errors == 'raise':
+            return [function(value) for value in values]
+        return [None if isinstance(result, Exception) else result
+                for result in Hipku.iter_results(function, values, 'yield')]
+
+    @staticmethod
+    def check_column_errors(errors):
+        if errors not in ('raise', 'null'):
+            raise ValueError('errors must be "raise" or "null", not %r' % (errors,))
+
+    @staticmethod
+    def map_items(function, items, errors='raise', executor=None, workers=None):
+        if errors not in ('raise', 'skip', 'yield'):
+            raise ValueError('errors must be one of "raise", "skip" or "yield", not %r' % (errors,))
+        if executor is not None and workers is not None:
+            raise ValueError('Pass executor or workers, not both')
+        if executor is None and (workers is None or workers == 1):
+            return Hipku.iter_results(function, items, errors)
+        return Hipku.iter_results_threaded(function, items, errors, executor, workers)
+
+    @staticmethod
+    def iter_results_threaded(function, items, errors, executor, workers, batch_size=256):
+        # Convert batches of items in threads, keeping a couple of batches
+        # per thread in flight so memory use stays bounded
+        import concurrent.futures
+        if not workers:
+            workers = os.cpu_count() or 1
+        pool = None
+        if executor is None:
+            pool = executor = concurrent.futures.ThreadPoolExecutor(workers)
+
+        items = iter(items)
+        pending = collections.deque()
+        try:
+            while True:
+                batch = list(itertools.islice(items, batch_size))
+                if batch:
+                    pending.append(executor.submit(Hipku.convert_batch, function, batch))
+                if not pending:
+                    break
+                if not batch or len(pending) >= workers * 2:
+                    for result in pending.popleft().result():
+                        if isinstance(result, Exception):
+                            if errors == 'raise':
+                                raise result
+                            if errors == 'skip':
+                                continue
+                        yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            if pool is not None:
+                pool.shutdown()
+
+    @staticmethod
+    def convert_batch(function, batch):
+        return list(Hipku.iter_results(function, batch, 'yield'))
+
+    @staticmethod
+    def iter_results(function, items, errors):
+        for item in items:
+            try:
+                result = function(item)
+            except (ValueError, IndexError, TypeError) as error:
+                if errors == 'raise':
+                    raise
+                if errors == 'skip':
+                    continue
+                result = error
+            yield result
+
     # Helper functions for encoding
     @staticmethod
     def ip_is_ipv6(ip):
@@ -40,37 +1374,80 @@ class Hipku:
 
     @staticmethod
     def split_ip(ip, ipv6):
-        octet_array = []
-        decimal_octet_array = []
-        v6_base = 16
+        # Remove surrounding whitespace, such as the line ending of a CRLF
+        # file, and any newline and space characters inside
+        ip = ip.strip()
+        if ' ' in ip or '\n' in ip:
+            ip = ip.replace(' ', '').replace('\n', '')
 
         if ipv6:
-            separator = ':'
-            num_octets = 8
-        else:
-            separator = '.'
-            num_octets = 4
+            return Hipku.parse_ipv6(ip)
+        return Hipku.parse_ipv4(ip)
 
-        # Remove newline and space characters
-        ip = re.sub(r'[\n\ ]', '', ip)
-        octet_array = ip.split(separator)
-
-        # If IPv6 address is in abbreviated format, we need to replace missing octets with 0
-        if len(octet_array) < num_octets:
-            if ipv6:
-                num_missing_octets = (num_octets - len(octet_array))
-                octet_array = Hipku.pad_octets(octet_array, num_missing_octets)
-            else:
-                raise ValueError('Formatting error in IP Address input. IPv4 address has fewer than 4 octets.')
+    @staticmethod
+    def parse_ipv4(ip):
+        # Strictly parse a dotted-quad IPv4 address into 4 integer octets.
+        # Each octet is looked up in a table of every valid spelling of 0
+        # to 255, so a single lookup rejects empty octets, other
+        # characters, more than 3 digits and values over 255.
+        octet_array = ip.split('.')
+        if len(octet_array) == 4:
+            try:
+                return [_ipv4_octets[octet_array[0]], _ipv4_octets[octet_array[1]],
+                        _ipv4_octets[octet_array[2]], _ipv4_octets[octet_array[3]]]
+            except KeyError:
+                if not ip.strip(_ipv4_characters) and '' not in octet_array and max(map(len, octet_array)) <= 3:
+                    raise ValueError('Formatting error in IP Address input. IPv4 octets must be between 0 and 255.')
+        raise ValueError('Formatting error in IP Address input. %r is not a valid IPv4 address.' % ip)
 
-        # Convert IPv6 addresses from hex to decimal
-        if ipv6:
-            for i in range(len(octet_array)):
-                decimal_octet_array.append(int(octet_array[i], v6_base))
+    @staticmethod
+    def parse_ipv6(ip):
+        # Strictly parse an IPv6 address, with whitespace already removed
+        # by split_ip, into 8 integer hextets. A single '::' stands for one or
+        # more zero hextets, and the last 32 bits may be written as an IPv4
+        # address, as in ::ffff:192.0.2.1.
+        octet_array = None
+        if '.' in ip:
+            # The last group has to be an IPv4 address. Parse it and hold
+            # its place with two zero hextets.
+            head, colon, ipv4 = ip.rpartition(':')
+            if not colon or '.' not in ipv4:
+                raise ValueError('Formatting error in IP Address input. %r is not a valid IPv6 address.' % ip)
+            octet_array = Hipku.parse_ipv4(ipv4)
+            ip = head + ':0:0'
+
+        if '::' in ip:
+            head, gap, tail = ip.partition('::')
+            if '::' in tail:
+                raise ValueError('Formatting error in IP Address input. IPv6 address contains more than one "::".')
+            groups = head.split(':') if head else []
+            tail_groups = tail.split(':') if tail else []
+            num_missing_octets = 8 - len(groups) - len(tail_groups)
+            if num_missing_octets < 1:
+                raise ValueError('Formatting error in IP Address input. IPv6 address has too many hextets for "::".')
+            if '' in groups or '' in tail_groups:
+                raise ValueError('Formatting error in IP Address input. %r is not a valid IPv6 address.' % ip)
+            groups += _zero_hextets[:num_missing_octets]
+            groups += tail_groups
         else:
-            decimal_octet_array = [int(octet) for octet in octet_array]
-
-        return decimal_octet_array
+            # Without '::', an empty group can only be at either end
+            groups = ip.split(':')
+            if len(groups) != 8 or not groups[0] or not groups[7]:
+                raise ValueError('Formatting error in IP Address input. IPv6 address must have 8 hextets.')
+
+        # Pad every group to 4 digits and read all 16 bytes at once.
+        # fromhex rejects anything but hex digits, and unpack rejects the
+        # wrong number of bytes, from a group of more than 4 digits or
+        # whitespace that fromhex skipped.
+        try:
+            hextet_array = list(_hextets.unpack(bytes.fromhex((_hextets_format % tuple(groups)).replace(' ', '0'))))
+        except (ValueError, struct.error):
+            raise ValueError('Formatting error in IP Address input. %r is not a valid IPv6 address. '
+                             'IPv6 hextets must have 1 to 4 hex digits.' % ip)
+        if octet_array is not None:
+            hextet_array[6] = (octet_array[0] << 8) | octet_array[1]
+            hextet_array[7] = (octet_array[2] << 8) | octet_array[3]
+        return hextet_array
 
     @staticmethod
     def pad_octets(octet_array, num_missing_octets):
@@ -127,59 +1504,352 @@ class Hipku:
 
     @staticmethod
     def get_key(ipv6):
-        if ipv6:
-            key = [
-                adjectives,
-                nouns,
-                adjectives,
-                nouns,
-                verbs,
-                adjectives,
-                adjectives,
-                adjectives,
-                adjectives,
-                adjectives,
-                nouns,
-                adjectives,
-                nouns,
-                verbs,
-                adjectives,
-                nouns
-            ]
-        else:
-            key = [
-                animalAdjectives,
-                animalColors,
-                animalNouns,
-                animalVerbs,
-                natureAdjectives,
-                natureNouns,
-                plantNouns,
-                plantVerbs
-            ]
+        # Word lists are unpacked the first time their key is needed, so a
+        # program that only handles IPv4 never builds the IPv6 lists
+        key = _keys.get(ipv6)
+        if key is None:
+            if ipv6:
+                names = [
+                    'adjectives',
+                    'nouns',
+                    'adjectives',
+                    'nouns',
+                    'verbs',
+                    'adjectives',
+                    'adjectives',
+                    'adjectives',
+                    'adjectives',
+                    'adjectives',
+                    'nouns',
+                    'adjectives',
+                    'nouns',
+                    'verbs',
+                    'adjectives',
+                    'nouns'
+                ]
+            else:
+                names = [
+                    'animalAdjectives',
+                    'animalColors',
+                    'animalNouns',
+                    'animalVerbs',
+                    'natureAdjectives',
+                    'natureNouns',
+                    'plantNouns',
+                    'plantVerbs'
+                ]
+            key = tuple(_get_word_list(name) for name in names)
+            _keys[ipv6] = key
         return key
 
+    @staticmethod
+    def get_reverse_key(ipv6):
+        # Reverse indexes are built once per key and shared between calls,
+        # so they are handed out as read-only mappings
+        reverse_key = _reverse_keys.get(ipv6)
+        if reverse_key is None:
+            reverse_key = tuple(Hipku.reverse_dictionary(dictionary) for dictionary in Hipku.get_key(ipv6))
+            _reverse_keys[ipv6] = reverse_key
+        return reverse_key
+
+    @staticmethod
+    def reverse_dictionary(dictionary):
+        # Map each dictionary entry to its offset, keeping the first offset
+        # if an entry is repeated. Entries such as 'autumn colors' span
+        # several words, so also record the distinct entry word counts.
+        word_index = {}
+        entry_lengths = set()
+        for j in range(len(dictionary)):
+            if dictionary[j] not in word_index:
+                word_index[dictionary[j]] = j
+            entry_lengths.add(len(dictionary[j].split(' ')))
+        return (MappingProxyType(word_index), tuple(sorted(entry_lengths)))
+
+    @staticmethod
+    def encode_factors(factor_array, ipv6):
+        # Fill the compiled template straight from the factors. The slot
+        # dictionaries are already capitalised where needed. The tables are
+        # read once, in case another thread unloads them.
+        tables = _ipv4_tables
+        if not ipv6 and tables is not None:
+            high = (factor_array[0] << 12) | (factor_array[1] << 8) | (factor_array[2] << 4) | factor_array[3]
+            low = (factor_array[4] << 12) | (factor_array[5] << 8) | (factor_array[6] << 4) | factor_array[7]
+            return tables[0][high] + tables[1][low]
+        if ipv6 and _ipv6_fragment_cache is not None:
+            hextet_array = [(factor_array[i] << 8) | factor_array[i + 1] for i in range(0, len(factor_array), 2)]
+            return Hipku.encode_from_ipv6_cache(hextet_array)
+
+        template = Hipku.get_template(ipv6)
+        slot_dictionaries = template[1]
+        words = [slot_dictionaries[i][factor_array[i]] for i in range(len(factor_array))]
+        return template[0].format(*words)
+
     @staticmethod
     def write_haiku(word_array, ipv6):
-        octet = 'OCTET'  # String to place in schema to show word slots
-        schema_results = Hipku.get_schema(ipv6, octet)
-        schema = schema_results[0]
-        non_words = schema_results[1]
-
-        # Replace each instance of 'octet' in the schema with a word from the encoded word array
-        word_index = 0
-        for i in range(len(schema)):
-            if schema[i] == octet:
-                schema[i] = word_array[word_index]
-                word_index += 1
-                if word_index >= len(word_array):
-                    break
+        template = Hipku.get_template(ipv6)
+        capitalized_slots = template[2]
 
-        # Capitalize appropriate words
-        schema = Hipku.capitalize_haiku(schema)
-        haiku = ''.join(schema)
+        # Capitalize words that start a sentence, then put each word in
+        # its slot in the template
+        word_array = list(word_array)
+        for i in capitalized_slots:
+            word_array[i] = Hipku.capitalize_word(word_array[i])
 
-        return haiku
+        return template[0].format(*word_array)
+
+    @staticmethod
+    def get_template(ipv6):
+        # Haiku layouts are compiled once per IP version and shared
+        template = _templates.get(ipv6)
+        if template is None:
+            template = Hipku.compile_template(ipv6)
+            _templates[ipv6] = template
+        return template
+
+    @staticmethod
+    def compile_template(ipv6):
+        # Compile the schema into a format string with a {} for each word
+        # slot. Run capitalize_haiku over the schema with the slots still
+        # blank to find which slots start a sentence, and give those slots
+        # a capitalized copy of their dictionary.
+        octet = 'octet'
+        schema = Hipku.capitalize_haiku(Hipku.get_schema(ipv6, octet)[0])
+        key = Hipku.get_key(ipv6)
+
+        haiku_format = []
+        slot_dictionaries = []
+        capitalized_slots = []
+        for entry in schema:
+            if entry.lower() == octet:
+                dictionary = key[len(slot_dictionaries)]
+                if entry != octet:
+                    capitalized_slots.append(len(slot_dictionaries))
+                    dictionary = tuple(Hipku.capitalize_word(word) for word in dictionary)
+                slot_dictionaries.append(dictionary)
+                haiku_format.append('{}')
+            else:
+                haiku_format.append(entry.replace('{', '{{').replace('}', '}}'))
+
+        return (''.join(haiku_format), tuple(slot_dictionaries), tuple(capitalized_slots))
+
+    @staticmethod
+    def get_canonical_decoder(ipv6):
+        # Canonical decoders are compiled once per IP version and shared
+        decoder = _canonical_decoders.get(ipv6)
+        if decoder is None:
+            decoder = Hipku.compile_canonical_decoder(ipv6)
+            _canonical_decoders[ipv6] = decoder
+        return decoder
+
+    @staticmethod
+    def compile_canonical_decoder(ipv6):
+        # Turn the haiku template into a regex that matches the literal text
+        # exactly and captures each word slot. Slot captures are no longer
+        # than the slot's longest word, so a failed match stays cheap however
+        # long the input is. Each slot maps its words, capitalized as the
+        # template writes them, to what they add to their octet, so a pair
+        # of lookups gives an octet.
+        if ipv6:
+            multiplier = 256
+            ip_format = ':'.join(['%x'] * 8)
+        else:
+            multiplier = 16
+            ip_format = '.'.join(['%d'] * 4)
+
+        template = Hipku.get_template(ipv6)
+        literals = template[0].split('{}')
+        slot_indexes = []
+        pattern = [re.escape(literals[0].replace('{{', '{').replace('}}', '}'))]
+        for i in range(len(template[1])):
+            dictionary = template[1][i]
+            longest = max(len(word) for word in dictionary)
+            if any(' ' in word for word in dictionary):
+                pattern.append('([A-Za-z -]{1,%d}?)' % longest)
+            else:
+                pattern.append('([A-Za-z-]{1,%d})' % longest)
+            pattern.append(re.escape(literals[i + 1].replace('{{', '{').replace('}}', '}')))
+
+            word_index = Hipku.reverse_dictionary(dictionary)[0]
+            if i % 2 == 0:
+                slot_indexes.append({word: j * multiplier for word, j in word_index.items()})
+            else:
+                slot_indexes.append(dict(word_index))
+        return (re.compile(''.join(pattern)), tuple(slot_indexes), ip_format)
+
+    # Precomputed IPv4 tables. Each half of an IPv4 address always maps to
+    # the same run of text: the first 16 bits to 'The <adj> <color>
+    # <animal>\n<verb>' and the last 16 bits to the rest of the haiku. With
+    # the tables loaded an IPv4 address is encoded with two lookups and a
+    # concatenation. The tables hold 131,072 strings, so they are only
+    # built when load_ipv4_tables is called.
+    @staticmethod
+    def load_ipv4_tables(path=None):
+        # Build the tables, or load them from a file written by
+        # save_ipv4_tables, and start using them. Returns a dict with the
+        # time taken in seconds and the approximate memory used in bytes.
+        global _ipv4_tables, _ipv4_table_stats
+        start = time.perf_counter()
+        if path is None:
+            tables = Hipku.build_ipv4_tables()
+            source = 'built'
+        else:
+            tables = Hipku.read_ipv4_tables(path)
+            source = path
+        seconds = time.perf_counter() - start
+
+        size = 0
+        for table in tables:
+            size += sys.getsizeof(table) + sum(sys.getsizeof(fragment) for fragment in table)
+
+        _ipv4_tables = tables
+        _ipv4_table_stats = {'source': source, 'seconds': seconds, 'bytes': size}
+        return dict(_ipv4_table_stats)
+
+    @staticmethod
+    def unload_ipv4_tables():
+        global _ipv4_tables, _ipv4_table_stats
+        _ipv4_tables = None
+        _ipv4_table_stats = None
+
+    @staticmethod
+    def ipv4_table_stats():
+        # The stats returned by load_ipv4_tables, or None if not loaded
+        if _ipv4_table_stats is None:
+            return None
+        return dict(_ipv4_table_stats)
+
+    @staticmethod
+    def build_ipv4_tables():
+        slot_dictionaries = Hipku.get_template(False)[1]
+        fragment_formats = Hipku.get_ipv4_fragment_formats()
+
+        # itertools.product varies the last slot fastest, so entries come
+        # out in order of the 16-bit value the four factors make up
+        tables = []
+        for half in range(2):
+            dictionaries = slot_dictionaries[half * 4:half * 4 + 4]
+            tables.append([fragment_formats[half].format(*words) for words in itertools.product(*dictionaries)])
+        return tables
+
+    @staticmethod
+    def get_ipv4_fragment_formats():
+        # Split the IPv4 template after the fourth word slot, leaving four
+        # slots in each half
+        literals = Hipku.get_template(False)[0].split('{}')
+        return ['{}'.join(literals[0:4]) + '{}', literals[4] + '{}' + '{}'.join(literals[5:9])]
+
+    @staticmethod
+    def save_ipv4_tables(path):
+        tables = _ipv4_tables
+        if tables is None:
+            tables = Hipku.build_ipv4_tables()
+        with open(path, 'w', encoding='utf-8') as table_file:
+            json.dump(tables, table_file)
+
+    @staticmethod
+    def read_ipv4_tables(path):
+        with open(path, encoding='utf-8') as table_file:
+            tables = json.load(table_file)
+
+        if len(tables) != 2 or len(tables[0]) != 65536 or len(tables[1]) != 65536:
+            raise ValueError('%s does not contain IPv4 tables' % path)
+
+        # Check the file matches the current dictionaries by rendering the
+        # first and last entries of each table
+        slot_dictionaries = Hipku.get_template(False)[1]
+        fragment_formats = Hipku.get_ipv4_fragment_formats()
+        for half in range(2):
+            dictionaries = slot_dictionaries[half * 4:half * 4 + 4]
+            first = fragment_formats[half].format(*[dictionary[0] for dictionary in dictionaries])
+            last = fragment_formats[half].format(*[dictionary[-1] for dictionary in dictionaries])
+            if tables[half][0] != first or tables[half][-1] != last:
+                raise ValueError('%s contains IPv4 tables for different dictionaries' % path)
+        return tables
+
+    @staticmethod
+    def encode_from_ipv4_tables(octet_array):
+        if len(octet_array) != 4 or min(octet_array) < 0 or max(octet_array) > 255:
+            raise ValueError('Formatting error in IP Address input. IPv4 address must have 4 octets between 0 and 255.')
+        # Read the tables once, in case another thread unloads them
+        tables = _ipv4_tables
+        if tables is None:
+            return Hipku.encode_factors(Hipku.factor_octets(octet_array, False), False)
+        return tables[0][(octet_array[0] << 8) | octet_array[1]] + tables[1][(octet_array[2] << 8) | octet_array[3]]
+
+    # IPv6 prefix cache. The leading hextets of an address always render
+    # to the same run of text, so the text for a prefix can be cached.
+    # Traffic from a few networks then costs one lookup for its prefix,
+    # and only the remaining hextets are looked up word by word.
+    @staticmethod
+    def enable_ipv6_cache(maxsize=4096, prefix_hextets=3):
+        # prefix_hextets is how many leading hextets are cached as one
+        # fragment: 3 caches the /48 each address is in, 4 the /64
+        global _ipv6_fragment_cache, _ipv6_fragment_formats
+        if not isinstance(prefix_hextets, int) or not 1 <= prefix_hextets <= 7:
+            raise ValueError('prefix_hextets must be between 1 and 7, not %r' % (prefix_hextets,))
+        # The prefix is the template up to the last cached word, so its
+        # length is the length of the literal text plus that of its words
+        literals = Hipku.get_template(True)[0].split('{}')
+        prefix_length = sum(len(literal) for literal in literals[:prefix_hextets * 2])
+        suffix_format = '{}'.join(literals[prefix_hextets * 2:])
+        _ipv6_fragment_formats = (prefix_hextets, prefix_length, suffix_format)
+        _ipv6_fragment_cache = FragmentCache(maxsize)
+
+    @staticmethod
+    def disable_ipv6_cache():
+        global _ipv6_fragment_cache
+        _ipv6_fragment_cache = None
+
+    @staticmethod
+    def ipv6_cache_stats():
+        # Hit, miss and eviction counts, or None if the cache is disabled
+        if _ipv6_fragment_cache is None:
+            return None
+        return _ipv6_fragment_cache.stats()
+
+    @staticmethod
+    def encode_from_ipv6_cache(hextet_array):
+        if len(hextet_array) != 8:
+            raise ValueError('Formatting error in IP Address input. IPv6 address must have 8 hextets.')
+
+        # Read the cache and formats once, in case another thread disables
+        # or re-enables the cache. Prefixes of different lengths never
+        # share a key, so stale formats can't put the wrong text in a new
+        # cache.
+        cache = _ipv6_fragment_cache
+        formats = _ipv6_fragment_formats
+        template = Hipku.get_template(True)
+        slot_dictionaries = template[1]
+        if cache is None or formats is None:
+            words = []
+            for position in range(8):
+                hextet = hextet_array[position]
+                words.append(slot_dictionaries[position * 2][hextet >> 8])
+                words.append(slot_dictionaries[position * 2 + 1][hextet & 255])
+            return template[0].format(*words)
+
+        prefix_hextets, prefix_length, suffix_format = formats
+        key = tuple(hextet_array[:prefix_hextets])
+        prefix = cache.get(key)
+        if prefix is None:
+            # Render the whole haiku in one go and cut the prefix out of it
+            words = []
+            for position in range(8):
+                hextet = hextet_array[position]
+                words.append(slot_dictionaries[position * 2][hextet >> 8])
+                words.append(slot_dictionaries[position * 2 + 1][hextet & 255])
+            haiku = template[0].format(*words)
+            for i in range(prefix_hextets * 2):
+                prefix_length += len(words[i])
+            cache.put(key, haiku[:prefix_length])
+            return haiku
+
+        words = []
+        for position in range(prefix_hextets, 8):
+            hextet = hextet_array[position]
+            words.append(slot_dictionaries[position * 2][hextet >> 8])
+            words.append(slot_dictionaries[position * 2 + 1][hextet & 255])
+        return prefix + suffix_format.format(*words)
 
     @staticmethod
     def get_schema(ipv6, octet):
@@ -202,27 +1872,15 @@ class Hipku:
                 octet, octet, period, new_line
             ]
 
-        # Add spaces before words except the first word
-        i = 1
-        while i < len(schema):
-            insert_space = True
-
-            # If the next entry is a nonWord, don't add a space
-            for non_word in non_words:
-                if schema[i] == non_word:
-                    insert_space = False
-                    break
-
-            # If the previous entry is a newLine, don't add a space
-            if schema[i - 1] == new_line:
-                insert_space = False
-
-            if insert_space:
-                schema.insert(i, space)
-                i += 1
-            i += 1
+        # Add spaces before words except the first word. If the entry is a
+        # nonWord, or the previous entry is a newLine, don't add a space.
+        spaced_schema = schema[:1]
+        for i in range(1, len(schema)):
+            if schema[i] not in non_words and schema[i - 1] != new_line:
+                spaced_schema.append(space)
+            spaced_schema.append(schema[i])
 
-        return [schema, non_words]
+        return [spaced_schema, non_words]
 
     @staticmethod
     def capitalize_haiku(haiku_array):
@@ -249,14 +1907,26 @@ class Hipku:
 
     # Helper functions for decoding
     @staticmethod
-    def split_haiku(haiku):
+    def check_haiku_length(haiku, max_length=None):
+        # Refuse input that isn't text, or is oversized, before anything
+        # else looks at it, so decoding time stays bounded
+        if not isinstance(haiku, str):
+            raise TypeError('Decoding error: input haiku must be a string, not %s' % type(haiku).__name__)
+        if max_length is None:
+            max_length = Hipku.max_haiku_length
+        if max_length is not None and len(haiku) > max_length:
+            raise ValueError('Decoding error: input haiku is longer than %d characters' % max_length)
+
+    @staticmethod
+    def split_haiku(haiku, max_length=None):
+        Hipku.check_haiku_length(haiku, max_length)
         haiku = haiku.lower()
 
         # Replace newline characters with spaces
-        haiku = re.sub(r'\n', ' ', haiku)
+        haiku = haiku.replace('\n', ' ')
 
         # Remove anything that's not a letter, a space or a dash
-        haiku = re.sub(r'[^a-z\ -]', '', haiku)
+        haiku = _haiku_non_word.sub('', haiku)
         word_array = haiku.split(' ')
 
         # Remove any blank entries
@@ -266,8 +1936,8 @@ class Hipku:
 
     @staticmethod
     def haiku_is_ipv6(word_array):
-        key = Hipku.get_key(False)
-        dictionary = key[0]
+        reverse_key = Hipku.get_reverse_key(False)
+        dictionary = reverse_key[0][0]
         ipv6 = True
 
         # Compare each word in the haiku against each word in the first
@@ -282,7 +1952,7 @@ class Hipku:
 
     @staticmethod
     def get_factors(word_array, ipv6):
-        key = Hipku.get_key(ipv6)
+        reverse_key = Hipku.get_reverse_key(ipv6)
         factor_array = []
         word_array_position = 0
 
@@ -293,8 +1963,8 @@ class Hipku:
         # match, keep the same dictionary but check the next word in the
         # array. Keep going till we have an offset for each dictionary in
         # the key.
-        for dictionary in key:
-            result = Hipku.get_factor_from_word(dictionary, len(key), word_array, word_array_position)
+        for reverse_dictionary in reverse_key:
+            result = Hipku.get_factor_from_word(reverse_dictionary, len(reverse_key), word_array, word_array_position)
             factor = result[0]
             word_array_position = result[1]
             factor_array.append(factor)
@@ -302,46 +1972,49 @@ class Hipku:
         return factor_array
 
     @staticmethod
-    def get_factor_from_word(dictionary, max_length, words, position):
-        factor = None
-        dict_entry_length = 0
-        word_to_check = ''
+    def get_factor_from_word(reverse_dictionary, max_length, words, position):
+        word_index = reverse_dictionary[0]
+        entry_lengths = reverse_dictionary[1]
+
+        # Walk forward from position until a word matches the dictionary.
+        # Each word is looked at once, so the work is linear in the input.
+        while True:
+            factor = None
+            dict_entry_length = 0
+
+            for entry_length in entry_lengths:
+                # build a string to compare against the dictionary entries
+                # by joining the appropriate number of word_array entries
+                if position + entry_length > len(words):
+                    continue
+
+                if entry_length == 1:
+                    word_to_check = words[position]
+                else:
+                    word_to_check = ' '.join(words[position:position + entry_length])
+
+                # If entries of different lengths match, the one earliest in
+                # the dictionary wins
+                j = word_index.get(word_to_check)
+                if j is not None and (factor is None or j < factor):
+                    factor = j
+                    dict_entry_length = entry_length
+
+            if factor is not None:
+                # Found the word - return the dictionary offset and the new
+                # word array position. If the dictionary entry word count is
+                # greater than one, skip the extra words we've already checked.
+                return [factor, position + dict_entry_length]
+
+            position += 1
 
-        for j in range(len(dictionary)):
-            # Get the number of words in the dictionary entry
-            dict_entry_words = dictionary[j].split(' ')
-            dict_entry_length = len(dict_entry_words)
-
-            # build a string to compare against the dictionary entry
-            # by joining the appropriate number of word_array entries
-            if position + dict_entry_length > len(words):
-                continue
-                
-            word_to_check = ' '.join(words[position:position + dict_entry_length])
-
-            if dictionary[j] == word_to_check:
-                factor = j
-                # If the dictionary entry word count is greater than one,
-                # increment the position counter by the difference to
-                # avoid rechecking words we've already checked
-                position += (dict_entry_length - 1)
-                break
-
-        position += 1
-
-        if factor is None:
             if position >= max_length:
                 # We've reached the entry of the haiku and still not matched
                 # all necessary dictionaries, so throw an error
                 raise ValueError('Decoding error: one or more dictionary words missing from input haiku')
-            else:
-                # Couldn't find the current word in the current dictionary,
-                # try the next word
-                return Hipku.get_factor_from_word(dictionary, max_length, words, position)
-        else:
-            # Found the word - return the dictionary offset and the new
-            # word array position
-            return [factor, position]
+
+            # Couldn't find the current word in the current dictionary,
+            # try the next word
 
     @staticmethod
     def get_octets(factor_array, ipv6):
@@ -375,911 +2048,637 @@ class Hipku:
 
 
 
+class LRUCache:
+    """
+    A mapping with at most maxsize entries. Once full, adding an entry
+    evicts the least recently used one. Hits, misses and evictions are
+    counted for stats(). Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1, not %r' % (maxsize,))
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            self.evict()
+
+    def resize(self, maxsize):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1, not %r' % (maxsize,))
+        with self.lock:
+            self.maxsize = maxsize
+            self.evict()
+
+    def evict(self):
+        # Called with the lock held
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        # Drop all entries and reset the counters
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.entries),
+                'maxsize': self.maxsize
+            }
+
+
+class FragmentCache:
+    """
+    A mapping with at most maxsize entries, for text that is cheap to
+    render again. Once full, adding an entry evicts the least recently
+    used one, like LRUCache, but lookups don't take the lock: a hit is a
+    dict read and an OrderedDict.move_to_end, each atomic on its own.
+    Adding an entry takes the lock. Hits, misses and evictions are
+    counted for stats(); hits counted by racing threads may occasionally
+    be lost. Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=4096):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1, not %r' % (maxsize,))
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        value = self.entries.get(key)
+        if value is None:
+            return default
+        try:
+            self.entries.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread since the read
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        # Called after a get missed, so the miss is counted here, off the
+        # hit path
+        with self.lock:
+            self.misses += 1
+            if key not in self.entries and len(self.entries) >= self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self.entries[key] = value
+
+    def clear(self):
+        # Drop all entries and reset the counters
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.entries),
+                'maxsize': self.maxsize
+            }
+
+
+class Profiler:
+    """
+    Call counts and total time for each stage of Hipku.encode and
+    Hipku.decode, kept separately for each IP version. See
+    Hipku.enable_profiling and Hipku.profile. Safe to share between
+    threads.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def record(self, family, stage, seconds):
+        with self.lock:
+            counter = self.stages.setdefault((family, stage), [0, 0.0])
+            counter[0] += 1
+            counter[1] += seconds
+
+    def time(self, family, stage, function, *args):
+        # Call function, recording the time it took even if it raises
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.record(family, stage, time.perf_counter() - start)
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+
+    def snapshot(self):
+        # {family: {stage: {'calls': n, 'seconds': total}}}
+        snapshot = {}
+        with self.lock:
+            for (family, stage), counter in self.stages.items():
+                snapshot.setdefault(family, {})[stage] = {'calls': counter[0], 'seconds': counter[1]}
+        return snapshot
+
+
+class CachedHipku:
+    """
+    Memoizes Hipku.encode and Hipku.decode, keeping up to maxsize results
+    for each in an LRUCache. Haiku are cached by their split_haiku words,
+    so the same haiku with different case, spacing or line breaks shares
+    one entry. Errors are not cached.
+    """
+
+    def __init__(self, maxsize=1024, max_length=None):
+        self.max_length = max_length
+        self.encode_cache = LRUCache(maxsize)
+        self.decode_cache = LRUCache(maxsize)
 
-animalAdjectives = ['agile',
-  'bashful',
-  'clever',
-  'clumsy',
-  'drowsy',
-  'fearful',
-  'graceful',
-  'hungry',
-  'lonely',
-  'morose',
-  'placid',
-  'ruthless',
-  'silent',
-  'thoughtful',
-  'vapid',
-  'weary']
-
-animalColors = ['beige',
-  'black',
-  'blue',
-  'bright',
-  'bronze',
-  'brown',
-  'dark',
-  'drab',
-  'green',
-  'gold',
-  'grey',
-  'jade',
-  'pale',
-  'pink',
-  'red',
-  'white']
-
-animalNouns = ['ape',
-  'bear',
-  'crow',
-  'dove',
-  'frog',
-  'goat',
-  'hawk',
-  'lamb',
-  'mouse',
-  'newt',
-  'owl',
-  'pig',
-  'rat',
-  'snake',
-  'toad',
-  'wolf']
-
-animalVerbs = ['aches',
-  'basks',
-  'cries',
-  'dives',
-  'eats',
-  'fights',
-  'groans',
-  'hunts',
-  'jumps',
-  'lies',
-  'prowls',
-  'runs',
-  'sleeps',
-  'thrives',
-  'wakes',
-  'yawns']
-
-natureAdjectives = ['ancient',
-  'barren',
-  'blazing',
-  'crowded',
-  'distant',
-  'empty',
-  'foggy',
-  'fragrant',
-  'frozen',
-  'moonlit',
-  'peaceful',
-  'quiet',
-  'rugged',
-  'serene',
-  'sunlit',
-  'wind-swept']
-
-natureNouns = ['canyon',
-  'clearing',
-  'desert',
-  'foothills',
-  'forest',
-  'grasslands',
-  'jungle',
-  'meadow',
-  'mountains',
-  'prairie',
-  'river',
-  'rockpool',
-  'sand-dune',
-  'tundra',
-  'valley',
-  'wetlands']
-
-plantNouns = ['autumn colors',
-  'cherry blossoms',
-  'chrysanthemums',
-  'crabapple blooms',
-  'the dry palm fronds',
-  'fat horse chestnuts',
-  'forget-me-nots',
-  'jasmine petals',
-  'lotus flowers',
-  'ripe blackberries',
-  'the maple seeds',
-  'the pine needles',
-  'tiger lillies',
-  'water lillies',
-  'willow branches',
-  'yellowwood leaves']
-
-plantVerbs = ['blow',
-  'crunch',
-  'dance',
-  'drift',
-  'drop',
-  'fall',
-  'grow',
-  'pile',
-  'rest',
-  'roll',
-  'show',
-  'spin',
-  'stir',
-  'sway',
-  'turn',
-  'twist']
-
-adjectives = ['ace',
-  'apt',
-  'arched',
-  'ash',
-  'bad',
-  'bare',
-  'beige',
-  'big',
-  'black',
-  'bland',
-  'bleak',
-  'blond',
-  'blue',
-  'blunt',
-  'blush',
-  'bold',
-  'bone',
-  'both',
-  'bound',
-  'brash',
-  'brass',
-  'brave',
-  'brief',
-  'brisk',
-  'broad',
-  'bronze',
-  'brushed',
-  'burned',
-  'calm',
-  'ceil',
-  'chaste',
-  'cheap',
-  'chilled',
-  'clean',
-  'coarse',
-  'cold',
-  'cool',
-  'corn',
-  'crass',
-  'crazed',
-  'cream',
-  'crisp',
-  'crude',
-  'cruel',
-  'cursed',
-  'cute',
-  'daft',
-  'damp',
-  'dark',
-  'dead',
-  'deaf',
-  'dear',
-  'deep',
-  'dense',
-  'dim',
-  'drab',
-  'dry',
-  'dull',
-  'faint',
-  'fair',
-  'fake',
-  'false',
-  'famed',
-  'far',
-  'fast',
-  'fat',
-  'fierce',
-  'fine',
-  'firm',
-  'flat',
-  'flawed',
-  'fond',
-  'foul',
-  'frail',
-  'free',
-  'fresh',
-  'full',
-  'fun',
-  'glum',
-  'good',
-  'grave',
-  'gray',
-  'great',
-  'green',
-  'grey',
-  'grim',
-  'gruff',
-  'hard',
-  'harsh',
-  'high',
-  'hoarse',
-  'hot',
-  'huge',
-  'hurt',
-  'ill',
-  'jade',
-  'jet',
-  'jinxed',
-  'keen',
-  'kind',
-  'lame',
-  'lank',
-  'large',
-  'last',
-  'late',
-  'lean',
-  'lewd',
-  'light',
-  'limp',
-  'live',
-  'loath',
-  'lone',
-  'long',
-  'loose',
-  'lost',
-  'louche',
-  'loud',
-  'low',
-  'lush',
-  'mad',
-  'male',
-  'masked',
-  'mean',
-  'meek',
-  'mild',
-  'mint',
-  'moist',
-  'mute',
-  'near',
-  'neat',
-  'new',
-  'nice',
-  'nude',
-  'numb',
-  'odd',
-  'old',
-  'pained',
-  'pale',
-  'peach',
-  'pear',
-  'peeved',
-  'pink',
-  'piqued',
-  'plain',
-  'plum',
-  'plump',
-  'plush',
-  'poor',
-  'posed',
-  'posh',
-  'prim',
-  'prime',
-  'prompt',
-  'prone',
-  'proud',
-  'prune',
-  'puce',
-  'pure',
-  'quaint',
-  'quartz',
-  'quick',
-  'rare',
-  'raw',
-  'real',
-  'red',
-  'rich',
-  'ripe',
-  'rough',
-  'rude',
-  'rushed',
-  'rust',
-  'sad',
-  'safe',
-  'sage',
-  'sane',
-  'scorched',
-  'shaped',
-  'sharp',
-  'sheared',
-  'short',
-  'shrewd',
-  'shrill',
-  'shrunk',
-  'shy',
-  'sick',
-  'skilled',
-  'slain',
-  'slick',
-  'slight',
-  'slim',
-  'slow',
-  'small',
-  'smart',
-  'smooth',
-  'smug',
-  'snide',
-  'snug',
-  'soft',
-  'sore',
-  'sought',
-  'sour',
-  'spare',
-  'sparse',
-  'spent',
-  'spoilt',
-  'spry',
-  'squat',
-  'staid',
-  'stale',
-  'stark',
-  'staunch',
-  'steep',
-  'stiff',
-  'strange',
-  'straw',
-  'stretched',
-  'strict',
-  'striped',
-  'strong',
-  'suave',
-  'sure',
-  'svelte',
-  'swank',
-  'sweet',
-  'swift',
-  'tall',
-  'tame',
-  'tan',
-  'tart',
-  'taut',
-  'teal',
-  'terse',
-  'thick',
-  'thin',
-  'tight',
-  'tiny',
-  'tired',
-  'toothed',
-  'torn',
-  'tough',
-  'trim',
-  'trussed',
-  'twin',
-  'used',
-  'vague',
-  'vain',
-  'vast',
-  'veiled',
-  'vexed',
-  'vile',
-  'warm',
-  'weak',
-  'webbed',
-  'wrong',
-  'wry',
-  'young']
-
-nouns = ['ants',
-  'apes',
-  'asps',
-  'balls',
-  'barb',
-  'barbs',
-  'bass',
-  'bats',
-  'beads',
-  'beaks',
-  'bears',
-  'bees',
-  'bells',
-  'belts',
-  'birds',
-  'blades',
-  'blobs',
-  'blooms',
-  'boars',
-  'boats',
-  'bolts',
-  'books',
-  'bowls',
-  'boys',
-  'bream',
-  'brides',
-  'broods',
-  'brooms',
-  'brutes',
-  'bucks',
-  'bulbs',
-  'bulls',
-  'burls',
-  'cakes',
-  'calves',
-  'capes',
-  'cats',
-  'char',
-  'chests',
-  'choirs',
-  'clams',
-  'clans',
-  'clouds',
-  'clowns',
-  'cod',
-  'coins',
-  'colts',
-  'cones',
-  'cords',
-  'cows',
-  'crabs',
-  'cranes',
-  'crows',
-  'cults',
-  'czars',
-  'darts',
-  'dates',
-  'deer',
-  'dholes',
-  'dice',
-  'discs',
-  'does',
-  'dogs',
-  'doors',
-  'dopes',
-  'doves',
-  'drakes',
-  'dreams',
-  'drones',
-  'ducks',
-  'dunes',
-  'eels',
-  'eggs',
-  'elk',
-  'elks',
-  'elms',
-  'elves',
-  'ewes',
-  'eyes',
-  'faces',
-  'facts',
-  'fawns',
-  'feet',
-  'ferns',
-  'fish',
-  'fists',
-  'flames',
-  'fleas',
-  'flocks',
-  'flutes',
-  'foals',
-  'foes',
-  'fools',
-  'fowl',
-  'frogs',
-  'fruits',
-  'gangs',
-  'gar',
-  'geese',
-  'gems',
-  'germs',
-  'ghosts',
-  'gnomes',
-  'goats',
-  'grapes',
-  'grooms',
-  'grouse',
-  'grubs',
-  'guards',
-  'gulls',
-  'hands',
-  'hares',
-  'hawks',
-  'heads',
-  'hearts',
-  'hens',
-  'herbs',
-  'hills',
-  'hogs',
-  'holes',
-  'hordes',
-  'ide',
-  'jars',
-  'jays',
-  'kids',
-  'kings',
-  'kites',
-  'lads',
-  'lakes',
-  'lambs',
-  'larks',
-  'lice',
-  'lights',
-  'limbs',
-  'looms',
-  'loons',
-  'mares',
-  'masks',
-  'mice',
-  'mimes',
-  'minks',
-  'mists',
-  'mites',
-  'mobs',
-  'molds',
-  'moles',
-  'moons',
-  'moths',
-  'newts',
-  'nymphs',
-  'orbs',
-  'orcs',
-  'owls',
-  'pearls',
-  'pears',
-  'peas',
-  'perch',
-  'pigs',
-  'pikes',
-  'pines',
-  'plains',
-  'plants',
-  'plums',
-  'pools',
-  'prawns',
-  'prunes',
-  'pugs',
-  'punks',
-  'quail',
-  'quails',
-  'queens',
-  'quills',
-  'rafts',
-  'rains',
-  'rams',
-  'rats',
-  'rays',
-  'ribs',
-  'rocks',
-  'rooks',
-  'ruffs',
-  'runes',
-  'sands',
-  'seals',
-  'seas',
-  'seeds',
-  'serfs',
-  'shards',
-  'sharks',
-  'sheep',
-  'shells',
-  'ships',
-  'shoals',
-  'shrews',
-  'shrimp',
-  'skate',
-  'skies',
-  'skunks',
-  'sloths',
-  'slugs',
-  'smew',
-  'smiles',
-  'snails',
-  'snakes',
-  'snipes',
-  'sole',
-  'songs',
-  'spades',
-  'sprats',
-  'sprouts',
-  'squabs',
-  'squads',
-  'squares',
-  'squid',
-  'stars',
-  'stoats',
-  'stones',
-  'storks',
-  'strays',
-  'suns',
-  'swans',
-  'swarms',
-  'swells',
-  'swifts',
-  'tars',
-  'teams',
-  'teeth',
-  'terns',
-  'thorns',
-  'threads',
-  'thrones',
-  'ticks',
-  'toads',
-  'tools',
-  'trees',
-  'tribes',
-  'trolls',
-  'trout',
-  'tunes',
-  'tusks',
-  'veins',
-  'verbs',
-  'vines',
-  'voles',
-  'wasps',
-  'waves',
-  'wells',
-  'whales',
-  'whelks',
-  'whiffs',
-  'winds',
-  'wolves',
-  'worms',
-  'wraiths',
-  'wrens',
-  'yaks']
-
-verbs = ['aid',
-  'arm',
-  'awe',
-  'axe',
-  'bag',
-  'bait',
-  'bare',
-  'bash',
-  'bathe',
-  'beat',
-  'bid',
-  'bilk',
-  'blame',
-  'bleach',
-  'bleed',
-  'bless',
-  'bluff',
-  'blur',
-  'boast',
-  'boost',
-  'boot',
-  'bore',
-  'botch',
-  'breed',
-  'brew',
-  'bribe',
-  'brief',
-  'brine',
-  'broil',
-  'browse',
-  'bruise',
-  'build',
-  'burn',
-  'burst',
-  'call',
-  'calm',
-  'carve',
-  'chafe',
-  'chant',
-  'charge',
-  'chart',
-  'cheat',
-  'check',
-  'cheer',
-  'chill',
-  'choke',
-  'chomp',
-  'choose',
-  'churn',
-  'cite',
-  'clamp',
-  'clap',
-  'clasp',
-  'claw',
-  'clean',
-  'cleanse',
-  'clip',
-  'cloak',
-  'clone',
-  'clutch',
-  'coax',
-  'crack',
-  'crave',
-  'crunch',
-  'cry',
-  'cull',
-  'cure',
-  'curse',
-  'cuss',
-  'dare',
-  'daze',
-  'dent',
-  'dig',
-  'ding',
-  'doubt',
-  'dowse',
-  'drag',
-  'drain',
-  'drape',
-  'draw',
-  'dread',
-  'dredge',
-  'drill',
-  'drink',
-  'drip',
-  'drive',
-  'drop',
-  'drown',
-  'dry',
-  'dump',
-  'eat',
-  'etch',
-  'face',
-  'fail',
-  'fault',
-  'fear',
-  'feed',
-  'feel',
-  'fetch',
-  'fight',
-  'find',
-  'fix',
-  'flap',
-  'flay',
-  'flee',
-  'fling',
-  'flip',
-  'float',
-  'foil',
-  'forge',
-  'free',
-  'freeze',
-  'frisk',
-  'gain',
-  'glimpse',
-  'gnaw',
-  'goad',
-  'gouge',
-  'grab',
-  'grasp',
-  'graze',
-  'grieve',
-  'grip',
-  'groom',
-  'guard',
-  'guards',
-  'guide',
-  'gulp',
-  'gush',
-  'halt',
-  'harm',
-  'hate',
-  'haul',
-  'haunt',
-  'have',
-  'heal',
-  'hear',
-  'help',
-  'herd',
-  'hex',
-  'hire',
-  'hit',
-  'hoist',
-  'hound',
-  'hug',
-  'hurl',
-  'irk',
-  'jab',
-  'jeer',
-  'join',
-  'jolt',
-  'keep',
-  'kick',
-  'kill',
-  'kiss',
-  'lash',
-  'leash',
-  'leave',
-  'lift',
-  'like',
-  'love',
-  'lug',
-  'lure',
-  'maim',
-  'make',
-  'mask',
-  'meet',
-  'melt',
-  'mend',
-  'miss',
-  'mould',
-  'move',
-  'nab',
-  'name',
-  'need',
-  'oust',
-  'paint',
-  'paw',
-  'pay',
-  'peck',
-  'peeve',
-  'pelt',
-  'please',
-  'pluck',
-  'poach',
-  'poll',
-  'praise',
-  'prick',
-  'print',
-  'probe',
-  'prod',
-  'prompt',
-  'punch',
-  'quash',
-  'quell',
-  'quote',
-  'raid',
-  'raise',
-  'raze',
-  'ride',
-  'roast',
-  'rouse',
-  'rule',
-  'scald',
-  'scalp',
-  'scar',
-  'scathe',
-  'score',
-  'scorn',
-  'scour',
-  'scuff',
-  'sear',
-  'see',
-  'seek',
-  'seize',
-  'send',
-  'sense',
-  'serve',
-  'shake',
-  'shear',
-  'shift',
-  'shoot',
-  'shun',
-  'slap',
-  'slay',
-  'slice',
-  'smack',
-  'smash',
-  'smell',
-  'smite',
-  'snare',
-  'snatch',
-  'sniff',
-  'snub',
-  'soak',
-  'spare',
-  'splash',
-  'split',
-  'spook',
-  'spray',
-  'squash',
-  'squeeze',
-  'stab',
-  'stain',
-  'starve',
-  'steal',
-  'steer',
-  'sting',
-  'strike',
-  'stun',
-  'tag',
-  'tame',
-  'taste',
-  'taunt',
-  'teach',
-  'tend']
+    def encode(self, ip):
+        haiku = self.encode_cache.get(ip)
+        if haiku is None:
+            haiku = Hipku.encode(ip)
+            self.encode_cache.put(ip, haiku)
+        return haiku
 
+    def decode(self, haiku):
+        word_array = Hipku.split_haiku(haiku, self.max_length)
+        key = ' '.join(word_array)
+        ip = self.decode_cache.get(key)
+        if ip is None:
+            ip = Hipku.decode_words(word_array)
+            self.decode_cache.put(key, ip)
+        return ip
+
+    def resize(self, maxsize):
+        self.encode_cache.resize(maxsize)
+        self.decode_cache.resize(maxsize)
+
+    def clear(self):
+        self.encode_cache.clear()
+        self.decode_cache.clear()
+
+    def stats(self):
+        return {'encode': self.encode_cache.stats(), 'decode': self.decode_cache.stats()}
+
+
+def _import_pyarrow():
+    # pyarrow is an optional dependency, only imported by the Arrow and
+    # pandas functions
+    try:
+        import pyarrow
+        import pyarrow.compute
+    except ImportError:
+        raise ImportError('pyarrow is required for Arrow column encoding and decoding')
+    return pyarrow
+
+
+def _import_pandas():
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError('pandas is required for Series encoding and decoding')
+    return pandas
+
+
+def _import_numpy(required=True):
+    # NumPy is an optional dependency, only imported by the array functions
+    try:
+        import numpy
+    except ImportError:
+        if required:
+            raise ImportError('NumPy is required for array encoding and decoding')
+        return None
+    return numpy
+
+# Command-line interface, run as `python -m hipku`. Input is read in large
+# chunks and split into records, and each chunk's results are written with
+# a single write, so nothing is flushed per line.
+def main(argv=None):
+    args = _parse_args(argv)
+    if args.command == 'rewrite':
+        return _rewrite(args)
+
+    if args.null:
+        terminator = '\0'
+    else:
+        terminator = '\n'
+
+    if args.separator is not None:
+        separator = args.separator.encode('latin-1', 'backslashreplace').decode('unicode_escape')
+    elif args.command == 'decode' and not args.single_line:
+        # Multi-line haiku are separated by a blank line
+        separator = '\n\n'
+    else:
+        separator = '\n'
+    if separator == '':
+        _exit_with_error('the record separator must not be empty')
+
+    outfile = _open_output(args.output, args.buffer_size)
+    failed = 0
+    try:
+        for path in args.files or ['-']:
+            infile = _open_input(path, args.buffer_size)
+            try:
+                failed += Hipku.convert_stream(
+                    infile, outfile, args.command, workers=args.workers, chunk_size=args.buffer_size,
+                    separator=separator, terminator=terminator, single_line=args.single_line,
+                    errors=args.errors, max_length=args.max_length)
+            finally:
+                if infile is not sys.stdin:
+                    infile.close()
+        outfile.flush()
+    except (ValueError, IndexError, TypeError) as error:
+        _exit_with_error(error)
+    except BrokenPipeError:
+        # The reader went away, e.g. `| head`. Point stdout at devnull so
+        # the interpreter doesn't complain again while shutting down.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        # Leave stdout open for the interpreter to close
+        if outfile.buffer is sys.stdout.buffer:
+            outfile.detach()
+        else:
+            outfile.close()
+
+    if failed:
+        return 1
+    return 0
+
+
+def _parse_args(argv):
+    # Imported here rather than at the top, so that importing hipku as a
+    # library doesn't pay for argparse
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog='python -m hipku',
+        description='Encode IP addresses as haiku, or decode haiku back to IP addresses.')
+    parser.add_argument('command', choices=['encode', 'decode', 'rewrite'],
+                        help='rewrite replaces every IP address in the input text with a single-line haiku')
+    parser.add_argument('files', nargs='*', metavar='FILE',
+                        help='files to read, or - for stdin (default: stdin)')
+    parser.add_argument('-o', '--output', default='-', metavar='FILE',
+                        help='file to write to (default: stdout)')
+    parser.add_argument('-s', '--separator', metavar='SEP',
+                        help='input record separator, with backslash escapes, e.g. \'\\0\' for NUL '
+                             '(default: a newline, or a blank line between multi-line haiku when decoding)')
+    parser.add_argument('-1', '--single-line', action='store_true',
+                        help='write each haiku on one line; when decoding, read one haiku per line')
+    parser.add_argument('-0', '--null', action='store_true',
+                        help='end each output record with a NUL character instead of a newline, '
+                             'as for xargs -0')
+    parser.add_argument('--errors', choices=['raise', 'skip', 'report'], default='raise',
+                        help='on a record that cannot be converted: stop, skip it silently, '
+                             'or report it on stderr and carry on (default: raise)')
+    parser.add_argument('--max-length', type=int, default=None, metavar='N',
+                        help='longest haiku to accept when decoding (default: %d)' % Hipku.max_haiku_length)
+    parser.add_argument('--buffer-size', type=int, default=1 << 20, metavar='BYTES',
+                        help='size of reads, of the chunks given to each worker and of the output buffer '
+                             '(default: 1 MiB)')
+    parser.add_argument('-j', '--workers', type=int, default=1, metavar='N',
+                        help='number of worker processes for encode and decode (default: 1, '
+                             '0 for one per CPU)')
+    return parser.parse_intermixed_args(argv)
+
+
+def _open_input(path, buffer_size):
+    if path == '-':
+        return sys.stdin
+    try:
+        return open(path, encoding='utf-8', buffering=buffer_size)
+    except OSError as error:
+        _exit_with_error(error)
+
+
+def _open_output(path, buffer_size):
+    return io.TextIOWrapper(_open_binary_output(path, buffer_size), encoding='utf-8', newline='\n')
+
+
+def _open_binary_output(path, buffer_size):
+    if path == '-':
+        return sys.stdout.buffer
+    try:
+        return open(path, 'wb', buffering=buffer_size)
+    except OSError as error:
+        _exit_with_error(error)
+
+
+def _rewrite(args):
+    outfile = _open_binary_output(args.output, args.buffer_size)
+    try:
+        for path in args.files or ['-']:
+            if path == '-':
+                Hipku.rewrite_stream(sys.stdin.buffer, outfile, args.buffer_size)
+            else:
+                try:
+                    Hipku.rewrite_file(path, outfile, args.buffer_size)
+                except OSError as error:
+                    _exit_with_error(error)
+        outfile.flush()
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if outfile is not sys.stdout.buffer:
+            outfile.close()
+    return 0
+
+
+def _read_chunks(infile, separator, chunk_size):
+    # Yield the text of infile in pieces of about chunk_size characters
+    # that end on a record separator
+    pending = ''
+    while True:
+        chunk = infile.read(chunk_size)
+        if not chunk:
+            break
+        chunk = pending + chunk
+        end = chunk.rfind(separator)
+        if end == -1:
+            pending = chunk
+            continue
+        end += len(separator)
+        pending = chunk[end:]
+        yield chunk[:end]
+    if pending:
+        yield pending
+
+
+def _convert_chunk(command, text, separator, terminator, single_line, errors, max_length):
+    # Convert the records in one chunk of text. This runs in the worker
+    # processes of convert_stream, so it lives at module level where it can
+    # be pickled. Returns the output text, the messages for records that
+    # couldn't be converted and, if errors is 'raise', the first error, with
+    # the output for the records before it.
+    if command == 'encode':
+        encode = Hipku.make_encoder()
+        if single_line:
+            def convert(ip):
+                return Hipku.to_single_line(encode(ip))
+        else:
+            convert = encode
+    elif command == 'decode':
+        def convert(haiku):
+            return Hipku.decode(haiku, max_length)
+    else:
+        raise ValueError('command must be "encode" or "decode", not %r' % (command,))
+
+    # Records are stripped of surrounding whitespace and blank records are
+    # dropped
+    records = [record.strip() for record in text.split(separator)]
+    records = [record for record in records if record]
+
+    results = []
+    messages = []
+    for result in Hipku.map_items(convert, records, 'yield'):
+        if isinstance(result, Exception):
+            if errors == 'raise':
+                return ''.join(results), messages, result
+            messages.append(str(result))
+            continue
+        results.append(result)
+        results.append(terminator)
+    return ''.join(results), messages, None
+
+
+def _exit_with_error(message):
+    sys.stderr.write('hipku: error: %s\n' % message)
+    sys.exit(1)
+
+
+# Patterns used to clean up IP and haiku input
+_ipv4_characters = '0123456789.'
+
+# Every way of writing 0 to 255 in 1 to 3 digits, for parse_ipv4, and the
+# filler, format and byte layout parse_ipv6 uses for the 8 hextets
+_ipv4_octets = {format(value, '0%dd' % width): value
+                for width in (1, 2, 3) for value in range(min(256, 10 ** width))}
+_zero_hextets = ['0'] * 8
+_hextets_format = '%4s' * 8
+_hextets = struct.Struct('>8H')
+_haiku_non_word = re.compile(r'[^a-z\ -]')
+
+# Finds candidate IPv4 and IPv6 addresses, including abbreviated IPv6
+# addresses and ones ending in an IPv4 address, in arbitrary text. Addresses
+# must not run into surrounding words, so version numbers, times and C++
+# names like std::vector aren't matched. IPv6 candidates need at least one
+# decimal digit, so separators like "INFO :: msg" and words like cafe:: are
+# left alone, at the cost of skipping addresses with no digits like ff::.
+# An IPv4 address may be followed by a port, as in 10.0.0.1:8080, but not by
+# anything else after a colon that would make it part of a longer run of
+# groups. split_ip rejects any candidates that aren't valid. The leading
+# lookahead lets the scanner skip characters that can't start an address
+# before trying the lookbehind.
+_ip_scanner = re.compile(r'''
+    (?=[0-9A-Fa-f:])
+    (?<![\w.:])
+    (?:
+        (?=[0-9A-Fa-f:]*[0-9])
+        (?P<ipv6>(?:[0-9A-Fa-f]{1,4}:|:){1,7}(?:(?:[0-9]{1,3}\.){3}[0-9]{1,3}|:|:?[0-9A-Fa-f]{1,4}))
+        (?![\w:]|\.\w)
+      | (?P<ipv4>(?:[0-9]{1,3}\.){3}[0-9]{1,3})
+        (?!\w|\.\w|:(?![0-9]+(?![\w:]|\.\w))(?=[\w:]))
+    )
+''', re.VERBOSE)
+
+# The caches below are built on first use and shared between threads
+# without a lock. Each value is built in full and never changed once it's
+# stored, so threads that race to build one just store equal values.
+
+# Word lists unpacked from _packed_words, and the encoding keys made from
+# them, built on first use by _get_word_list and get_key
+_word_lists = {}
+_keys = {}
+
+# Reverse indexes of the encoding keys, built on first use by get_reverse_key
+_reverse_keys = {}
+
+# The process-wide Profiler from enable_profiling, the Profilers of the
+# profile blocks each thread is in and how many blocks are running, and
+# whether any Profiler is active, which is all encode and decode check
+_profiler = None
+_thread_profilers = threading.local()
+_profile_blocks = 0
+_profiling = False
+_profiling_lock = threading.Lock()
+
+# IPv4 half-address tables, set by load_ipv4_tables
+_ipv4_tables = None
+_ipv4_table_stats = None
+
+# IPv6 prefix cache, and the number of hextets in a prefix, the length of
+# its literal text and the format for the rest of the haiku, set by
+# enable_ipv6_cache
+_ipv6_fragment_cache = None
+_ipv6_fragment_formats = None
+
+# Compiled haiku layouts, built on first use by get_template
+_templates = {}
+
+# Template regexes and slot indexes, built on first use by
+# get_canonical_decoder
+_canonical_decoders = {}
+
+# Haiku layouts and sorted slot entries for prefix search, built on first
+# use by get_prefix_index
+_prefix_indexes = {}
+
+# Deletion indexes for typo-tolerant decoding, built on first use by
+# get_fuzzy_index for each IP version and distance
+_fuzzy_indexes = {}
+
+# Templates and slot dictionaries as bytes, built on first use by
+# get_bytes_template
+_bytes_templates = {}
+
+# Template dictionaries as NumPy arrays, built on first use by get_array_key
+_array_keys = {}
+
+# Template dictionaries as Arrow arrays, built on first use by get_arrow_key
+_arrow_keys = {}
+
+# The word lists, packed into one string each with entries separated by
+# '|'. A single constant per list is much cheaper to compile and load
+# than hundreds of list items, and the lists are only split into tuples
+# by _get_word_list when an address family first needs them. They're
+# also available as module attributes, e.g. hipku.adjectives.
+_packed_words = {
+    'animalAdjectives': ('agile|bashful|clever|clumsy|drowsy|fearful|graceful|hungry|lonely|morose|'
+                         'placid|ruthless|silent|thoughtful|vapid|weary'),
+    'animalColors': ('beige|black|blue|bright|bronze|brown|dark|drab|green|gold|grey|jade|pale|pink|'
+                     'red|white'),
+    'animalNouns': 'ape|bear|crow|dove|frog|goat|hawk|lamb|mouse|newt|owl|pig|rat|snake|toad|wolf',
+    'animalVerbs': ('aches|basks|cries|dives|eats|fights|groans|hunts|jumps|lies|prowls|runs|sleeps|'
+                    'thrives|wakes|yawns'),
+    'natureAdjectives': ('ancient|barren|blazing|crowded|distant|empty|foggy|fragrant|frozen|'
+                         'moonlit|peaceful|quiet|rugged|serene|sunlit|wind-swept'),
+    'natureNouns': ('canyon|clearing|desert|foothills|forest|grasslands|jungle|meadow|mountains|'
+                    'prairie|river|rockpool|sand-dune|tundra|valley|wetlands'),
+    'plantNouns': ('autumn colors|cherry blossoms|chrysanthemums|crabapple blooms|'
+                   'the dry palm fronds|fat horse chestnuts|forget-me-nots|jasmine petals|'
+                   'lotus flowers|ripe blackberries|the maple seeds|the pine needles|tiger lillies|'
+                   'water lillies|willow branches|yellowwood leaves'),
+    'plantVerbs': ('blow|crunch|dance|drift|drop|fall|grow|pile|rest|roll|show|spin|stir|sway|turn|'
+                   'twist'),
+    'adjectives': ('ace|apt|arched|ash|bad|bare|beige|big|black|bland|bleak|blond|blue|blunt|blush|'
+                   'bold|bone|both|bound|brash|brass|brave|brief|brisk|broad|bronze|brushed|burned|'
+                   'calm|ceil|chaste|cheap|chilled|clean|coarse|cold|cool|corn|crass|crazed|cream|'
+                   'crisp|crude|cruel|cursed|cute|daft|damp|dark|dead|deaf|dear|deep|dense|dim|drab|'
+                   'dry|dull|faint|fair|fake|false|famed|far|fast|fat|fierce|fine|firm|flat|flawed|'
+                   'fond|foul|frail|free|fresh|full|fun|glum|good|grave|gray|great|green|grey|grim|'
+                   'gruff|hard|harsh|high|hoarse|hot|huge|hurt|ill|jade|jet|jinxed|keen|kind|lame|'
+                   'lank|large|last|late|lean|lewd|light|limp|live|loath|lone|long|loose|lost|'
+                   'louche|loud|low|lush|mad|male|masked|mean|meek|mild|mint|moist|mute|near|neat|'
+                   'new|nice|nude|numb|odd|old|pained|pale|peach|pear|peeved|pink|piqued|plain|plum|'
+                   'plump|plush|poor|posed|posh|prim|prime|prompt|prone|proud|prune|puce|pure|'
+                   'quaint|quartz|quick|rare|raw|real|red|rich|ripe|rough|rude|rushed|rust|sad|safe|'
+                   'sage|sane|scorched|shaped|sharp|sheared|short|shrewd|shrill|shrunk|shy|sick|'
+                   'skilled|slain|slick|slight|slim|slow|small|smart|smooth|smug|snide|snug|soft|'
+                   'sore|sought|sour|spare|sparse|spent|spoilt|spry|squat|staid|stale|stark|staunch|'
+                   'steep|stiff|strange|straw|stretched|strict|striped|strong|suave|sure|svelte|'
+                   'swank|sweet|swift|tall|tame|tan|tart|taut|teal|terse|thick|thin|tight|tiny|'
+                   'tired|toothed|torn|tough|trim|trussed|twin|used|vague|vain|vast|veiled|vexed|'
+                   'vile|warm|weak|webbed|wrong|wry|young'),
+    'nouns': ('ants|apes|asps|balls|barb|barbs|bass|bats|beads|beaks|bears|bees|bells|belts|birds|'
+              'blades|blobs|blooms|boars|boats|bolts|books|bowls|boys|bream|brides|broods|brooms|'
+              'brutes|bucks|bulbs|bulls|burls|cakes|calves|capes|cats|char|chests|choirs|clams|'
+              'clans|clouds|clowns|cod|coins|colts|cones|cords|cows|crabs|cranes|crows|cults|czars|'
+              'darts|dates|deer|dholes|dice|discs|does|dogs|doors|dopes|doves|drakes|dreams|drones|'
+              'ducks|dunes|eels|eggs|elk|elks|elms|elves|ewes|eyes|faces|facts|fawns|feet|ferns|'
+              'fish|fists|flames|fleas|flocks|flutes|foals|foes|fools|fowl|frogs|fruits|gangs|gar|'
+              'geese|gems|germs|ghosts|gnomes|goats|grapes|grooms|grouse|grubs|guards|gulls|hands|'
+              'hares|hawks|heads|hearts|hens|herbs|hills|hogs|holes|hordes|ide|jars|jays|kids|kings|'
+              'kites|lads|lakes|lambs|larks|lice|lights|limbs|looms|loons|mares|masks|mice|mimes|'
+              'minks|mists|mites|mobs|molds|moles|moons|moths|newts|nymphs|orbs|orcs|owls|pearls|'
+              'pears|peas|perch|pigs|pikes|pines|plains|plants|plums|pools|prawns|prunes|pugs|punks|'
+              'quail|quails|queens|quills|rafts|rains|rams|rats|rays|ribs|rocks|rooks|ruffs|runes|'
+              'sands|seals|seas|seeds|serfs|shards|sharks|sheep|shells|ships|shoals|shrews|shrimp|'
+              'skate|skies|skunks|sloths|slugs|smew|smiles|snails|snakes|snipes|sole|songs|spades|'
+              'sprats|sprouts|squabs|squads|squares|squid|stars|stoats|stones|storks|strays|suns|'
+              'swans|swarms|swells|swifts|tars|teams|teeth|terns|thorns|threads|thrones|ticks|toads|'
+              'tools|trees|tribes|trolls|trout|tunes|tusks|veins|verbs|vines|voles|wasps|waves|'
+              'wells|whales|whelks|whiffs|winds|wolves|worms|wraiths|wrens|yaks'),
+    'verbs': ('aid|arm|awe|axe|bag|bait|bare|bash|bathe|beat|bid|bilk|blame|bleach|bleed|bless|'
+              'bluff|blur|boast|boost|boot|bore|botch|breed|brew|bribe|brief|brine|broil|browse|'
+              'bruise|build|burn|burst|call|calm|carve|chafe|chant|charge|chart|cheat|check|cheer|'
+              'chill|choke|chomp|choose|churn|cite|clamp|clap|clasp|claw|clean|cleanse|clip|cloak|'
+              'clone|clutch|coax|crack|crave|crunch|cry|cull|cure|curse|cuss|dare|daze|dent|dig|'
+              'ding|doubt|dowse|drag|drain|drape|draw|dread|dredge|drill|drink|drip|drive|drop|'
+              'drown|dry|dump|eat|etch|face|fail|fault|fear|feed|feel|fetch|fight|find|fix|flap|'
+              'flay|flee|fling|flip|float|foil|forge|free|freeze|frisk|gain|glimpse|gnaw|goad|gouge|'
+              'grab|grasp|graze|grieve|grip|groom|guard|guards|guide|gulp|gush|halt|harm|hate|haul|'
+              'haunt|have|heal|hear|help|herd|hex|hire|hit|hoist|hound|hug|hurl|irk|jab|jeer|join|'
+              'jolt|keep|kick|kill|kiss|lash|leash|leave|lift|like|love|lug|lure|maim|make|mask|'
+              'meet|melt|mend|miss|mould|move|nab|name|need|oust|paint|paw|pay|peck|peeve|pelt|'
+              'please|pluck|poach|poll|praise|prick|print|probe|prod|prompt|punch|quash|quell|quote|'
+              'raid|raise|raze|ride|roast|rouse|rule|scald|scalp|scar|scathe|score|scorn|scour|'
+              'scuff|sear|see|seek|seize|send|sense|serve|shake|shear|shift|shoot|shun|slap|slay|'
+              'slice|smack|smash|smell|smite|snare|snatch|sniff|snub|soak|spare|splash|split|spook|'
+              'spray|squash|squeeze|stab|stain|starve|steal|steer|sting|strike|stun|tag|tame|taste|'
+              'taunt|teach|tend')
+}
+
+
+def _get_word_list(name):
+    # Unpack a word list into a tuple the first time it's asked for
+    word_list = _word_lists.get(name)
+    if word_list is None:
+        word_list = tuple(_packed_words[name].split('|'))
+        _word_lists[name] = word_list
+    return word_list
+
+
+def __getattr__(name):
+    # Word lists are module attributes, unpacked on first access
+    if name in _packed_words:
+        return _get_word_list(name)
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_packed_words))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+# A local network service for hipku, so programs that aren't written in
+# Python can encode and decode without starting an interpreter per call.
+#
+# The protocol is JSON lines over TCP or a Unix socket. Each request is one
+# line holding a batch:
+#
+#     {"id": 1, "op": "encode", "items": ["127.0.0.1", "::1"]}
+#
+# and each response is one line, in the same order as the requests:
+#
+#     {"id": 1, "results": ["The hungry white ape\n...", "Ace ants..."], "errors": [null, null]}
+#
+# An item that can't be converted, including one that isn't a string, has
+# null in results and a message in errors. A request that can't be handled
+# at all gets {"id": ..., "error": "..."}. Batches are converted in the
+# event loop's default executor, so a large batch doesn't hold up other
+# connections while it runs. Clients may pipeline requests without waiting
+# for responses. The server stops reading from a connection once
+# max_pending responses are waiting to be written, and stops writing when
+# the client stops reading.
+#
+#     python -m hipku_server serve --port 8765
+#     python -m hipku_server load --port 8765 --connections 8 --requests 1000
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from hipku import Hipku
+
+# Limits on what a client can ask of the server
+MAX_LINE = 1 << 20
+MAX_BATCH = 10000
+MAX_PENDING = 16
+
+
+class HipkuServer:
+    """
+    Serves encode and decode requests over TCP or a Unix socket. Requests
+    are run through Hipku.map_items in the event loop's default executor.
+    """
+
+    def __init__(self, max_line=MAX_LINE, max_batch=MAX_BATCH, max_pending=MAX_PENDING):
+        self.max_line = max_line
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+        # Listen on a Unix socket if path is given, otherwise on host:port.
+        # Returns the asyncio server.
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path, limit=self.max_line)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port, limit=self.max_line)
+        return self.server
+
+    async def serve_forever(self, host='127.0.0.1', port=8765, path=None):
+        server = await self.start(host, port, path)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        # Requests are handled by this task as they're read, and responses
+        # are written by a second task. The queue between them bounds how
+        # far the reader can get ahead of a slow client.
+        loop = asyncio.get_running_loop()
+        responses = asyncio.Queue(self.max_pending)
+        sender = asyncio.ensure_future(self.send(responses, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # The line is over the limit and can't be skipped safely
+                    await self.queue(responses, sender,
+                                     {'id': None, 'error': 'Request is longer than %d bytes' % self.max_line})
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    response = await loop.run_in_executor(None, self.respond, line)
+                    if not await self.queue(responses, sender, response):
+                        break
+        except ConnectionError:
+            pass
+        finally:
+            if not sender.done():
+                try:
+                    await self.queue(responses, sender, None)
+                except asyncio.CancelledError:
+                    sender.cancel()
+                    raise
+            await sender
+
+    async def queue(self, responses, sender, response):
+        # Queue a response for the sender. Returns False if the sender
+        # stopped first, because the client went away, rather than waiting
+        # on a full queue that nothing is draining.
+        put = asyncio.ensure_future(responses.put(response))
+        try:
+            await asyncio.wait((put, sender), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not put.done():
+                put.cancel()
+        return not sender.done()
+
+    async def send(self, responses, writer):
+        try:
+            while True:
+                response = await responses.get()
+                if response is None:
+                    break
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def respond(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'id': None, 'error': 'Request is not valid JSON'}
+        if not isinstance(request, dict):
+            return {'id': None, 'error': 'Request must be a JSON object'}
+
+        request_id = request.get('id')
+        op = request.get('op')
+        items = request.get('items')
+        if op not in ('encode', 'decode'):
+            return {'id': request_id, 'error': 'op must be "encode" or "decode"'}
+        if not isinstance(items, list):
+            return {'id': request_id, 'error': 'items must be a list'}
+        if len(items) > self.max_batch:
+            return {'id': request_id, 'error': 'Batch is larger than %d items' % self.max_batch}
+
+        # Anything else that goes wrong becomes an error response, rather
+        # than dropping the connection
+        try:
+            results, errors = self.convert(op, items)
+        except Exception as error:
+            return {'id': request_id, 'error': 'Request failed: %s' % error}
+        return {'id': request_id, 'results': results, 'errors': errors}
+
+    def convert(self, op, items):
+        function = Hipku.encode if op == 'encode' else Hipku.decode
+
+        def convert_item(item):
+            if not isinstance(item, str):
+                raise TypeError('Item must be a string, not %s' % type(item).__name__)
+            return function(item)
+
+        results = []
+        errors = []
+        for result in Hipku.map_items(convert_item, items, errors='yield'):
+            if isinstance(result, Exception):
+                results.append(None)
+                errors.append(str(result))
+            else:
+                results.append(result)
+                errors.append(None)
+        return results, errors
+
+
+class HipkuClient:
+    """
+    An asyncio client for HipkuServer. Requests can be pipelined: several
+    calls can be awaited at once on the same connection.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.waiting = {}
+        self.receiver = asyncio.ensure_future(self.receive())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765, path=None, limit=MAX_LINE):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=limit)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=limit)
+        return cls(reader, writer)
+
+    async def encode(self, ips):
+        return await self.request('encode', ips)
+
+    async def decode(self, haikus):
+        return await self.request('decode', haikus)
+
+    async def request(self, op, items):
+        # Returns the response's (results, errors) lists
+        if self.receiver.done():
+            raise ConnectionError('Connection to hipku server closed')
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[self.next_id] = future
+        request = {'id': self.next_id, 'op': op, 'items': list(items)}
+        self.writer.write(json.dumps(request).encode('utf-8') + b'\n')
+        await self.writer.drain()
+        response = await future
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return response['results'], response['errors']
+
+    async def receive(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self.waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            error = ConnectionError('Connection to hipku server closed')
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(error)
+            self.waiting.clear()
+
+    async def close(self):
+        self.writer.close()
+        await self.receiver
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def load(host='127.0.0.1', port=8765, path=None, connections=4, requests=1000, batch=100,
+               pipeline=4, op='encode', seed=0):
+    # Generate load against a running server. Each connection sends its
+    # share of the requests, keeping up to pipeline requests in flight.
+    # Returns throughput and latency figures.
+    rng = random.Random(seed)
+    ips = ['.'.join(str(rng.randrange(256)) for _ in range(4)) for _ in range(batch // 2)]
+    ips += [':'.join(format(rng.randrange(65536), 'x') for _ in range(8)) for _ in range(batch - len(ips))]
+    if op == 'encode':
+        items = ips
+    else:
+        items = [Hipku.encode(ip) for ip in ips]
+
+    latencies = []
+
+    async def run_connection(count):
+        client = await HipkuClient.connect(host, port, path)
+        slots = asyncio.Semaphore(pipeline)
+
+        async def one_request():
+            async with slots:
+                start = time.perf_counter()
+                await client.request(op, items)
+                latencies.append(time.perf_counter() - start)
+
+        try:
+            await asyncio.gather(*[one_request() for _ in range(count)])
+        finally:
+            await client.close()
+
+    shares = [requests // connections + (i < requests % connections) for i in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*[run_connection(count) for count in shares if count])
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'items': len(latencies) * len(items),
+        'seconds': seconds,
+        'requests_per_second': len(latencies) / seconds,
+        'items_per_second': len(latencies) * len(items) / seconds,
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else None,
+        'p99_ms': latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000 if latencies else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m hipku_server',
+                                     description='Serve hipku encode and decode requests on a local socket.')
+    parser.add_argument('command', choices=['serve', 'load'],
+                        help='serve requests, or generate load against a running server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help='use a Unix socket instead of TCP')
+    parser.add_argument('--max-line', type=int, default=MAX_LINE, help='longest request line in bytes')
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH, help='most items in one request')
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING,
+                        help='responses waiting to be written before a connection stops being read')
+    parser.add_argument('--connections', type=int, default=4, help='load: number of client connections')
+    parser.add_argument('--requests', type=int, default=1000, help='load: total number of requests')
+    parser.add_argument('--batch', type=int, default=100, help='load: items per request')
+    parser.add_argument('--pipeline', type=int, default=4, help='load: requests in flight per connection')
+    parser.add_argument('--op', choices=['encode', 'decode'], default='encode', help='load: request type')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        server = HipkuServer(args.max_line, args.max_batch, args.max_pending)
+        try:
+            asyncio.run(server.serve_forever(args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    result = asyncio.run(load(args.host, args.port, args.unix, args.connections, args.requests,
+                              args.batch, args.pipeline, args.op))
+    print('%d requests (%d items) in %.2fs: %.0f requests/s, %.0f items/s, p50 %.2f ms, p99 %.2f ms' % (
+        result['requests'], result['items'], result['seconds'], result['requests_per_second'],
+        result['items_per_second'], result['p50_ms'], result['p99_ms']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,3 @@
+# Tests for hipku. Run them with
+#
+#     python -m unittest discover tests
@@ -0,0 +1,123 @@
+import unittest
+
+from hipku import Hipku
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_ipv4_values = [0, 1, 2130706433, 0xC0000201, 0xFFFFFFFF]
+_ipv6_values = [0, 1, 0x20010DB8000000000000FF0000428329, (1 << 128) - 1, 1 << 64]
+
+
+def split(value):
+    return value >> 64, value & 0xFFFFFFFFFFFFFFFF
+
+
+class ArrayPythonTest(unittest.TestCase):
+    # The fallback used when NumPy isn't installed
+
+    def test_encode_ipv4(self):
+        self.assertEqual(Hipku.encode_array_python(_ipv4_values),
+                         [Hipku.encode_int(value, 4) for value in _ipv4_values])
+
+    def test_encode_ipv6(self):
+        self.assertEqual(Hipku.encode_array_python([split(value) for value in _ipv6_values]),
+                         [Hipku.encode_int(value, 6) for value in _ipv6_values])
+
+    def test_encode_out_of_range(self):
+        for values in ([-1], [1 << 32], [(0, -1)], [(1 << 64, 0)], [(0, 1 << 64)]):
+            with self.subTest(values=values):
+                with self.assertRaises(ValueError):
+                    Hipku.encode_array_python(values)
+
+    def test_empty(self):
+        self.assertEqual(Hipku.encode_array_python([]), [])
+        self.assertEqual(Hipku.decode_array_python([]), ([], []))
+
+    def test_decode(self):
+        haikus = [Hipku.encode_int(value, 4) for value in _ipv4_values]
+        self.assertEqual(Hipku.decode_array_python(haikus), (_ipv4_values, [True] * len(haikus)))
+        haikus = [Hipku.encode_int(value, 6) for value in _ipv6_values]
+        self.assertEqual(Hipku.decode_array_python(haikus),
+                         ([split(value) for value in _ipv6_values], [True] * len(haikus)))
+
+    def test_decode_mask(self):
+        # Rows that don't decode, or are the other IP version, are zero and
+        # masked out. The version comes from the first row that decodes.
+        haikus = ['not a haiku', Hipku.encode_int(7, 4), Hipku.encode_int(7, 6), None,
+                  Hipku.encode_int(9, 4)]
+        self.assertEqual(Hipku.decode_array_python(haikus), ([0, 7, 0, 0, 9], [False, True, False, False, True]))
+        self.assertEqual(Hipku.decode_array_python(haikus, ipv6=True),
+                         ([(0, 0), (0, 0), (0, 7), (0, 0), (0, 0)], [False, False, True, False, False]))
+
+
+@unittest.skipUnless(numpy, 'NumPy is not installed')
+class ArrayNumpyTest(unittest.TestCase):
+
+    def test_encode_ipv4(self):
+        expected = [Hipku.encode_int(value, 4) for value in _ipv4_values]
+        for dtype in (numpy.uint32, numpy.int64, numpy.uint64):
+            with self.subTest(dtype=dtype):
+                self.assertEqual(Hipku.encode_array(numpy.array(_ipv4_values, dtype=dtype)), expected)
+        self.assertEqual(Hipku.encode_array(_ipv4_values), expected)
+
+    def test_encode_ipv6(self):
+        values = numpy.array([split(value) for value in _ipv6_values], dtype=numpy.uint64)
+        self.assertEqual(Hipku.encode_array(values), [Hipku.encode_int(value, 6) for value in _ipv6_values])
+
+    def test_encode_out_of_range(self):
+        for values in (numpy.array([1, -1], dtype=numpy.int64), numpy.array([1 << 32], dtype=numpy.uint64),
+                       numpy.array([[0, -1]], dtype=numpy.int64)):
+            with self.subTest(values=values):
+                with self.assertRaises(ValueError):
+                    Hipku.encode_array(values)
+
+    def test_encode_bad_arrays(self):
+        with self.assertRaises(TypeError):
+            Hipku.encode_array(numpy.array([1.0, 2.0]))
+        with self.assertRaises(ValueError):
+            Hipku.encode_array(numpy.zeros((2, 3), dtype=numpy.uint64))
+        with self.assertRaises(ValueError):
+            Hipku.encode_array(numpy.zeros((2, 2), dtype=numpy.uint32), ipv6=False)
+
+    def test_empty(self):
+        self.assertEqual(Hipku.encode_array([]), [])
+        self.assertEqual(Hipku.encode_array(numpy.zeros((0, 2), dtype=numpy.uint64)), [])
+        values, valid = Hipku.decode_array([])
+        self.assertEqual((values.shape, valid.shape), ((0,), (0,)))
+
+    def test_decode(self):
+        haikus = [Hipku.encode_int(value, 4) for value in _ipv4_values]
+        values, valid = Hipku.decode_array(haikus)
+        self.assertEqual(values.dtype, numpy.uint32)
+        self.assertEqual(values.tolist(), [Hipku.decode_to_int(haiku)[0] for haiku in haikus])
+        self.assertTrue(valid.all())
+
+        haikus = [Hipku.encode_int(value, 6) for value in _ipv6_values]
+        values, valid = Hipku.decode_array(haikus)
+        self.assertEqual((values.dtype, values.shape), (numpy.uint64, (len(haikus), 2)))
+        self.assertEqual([(int(high) << 64) | int(low) for high, low in values.tolist()],
+                         [Hipku.decode_to_int(haiku)[0] for haiku in haikus])
+        self.assertTrue(valid.all())
+
+    def test_decode_mask(self):
+        haikus = ['not a haiku', Hipku.encode_int(7, 4), Hipku.encode_int(7, 6), None,
+                  Hipku.encode_int(9, 4)]
+        values, valid = Hipku.decode_array(haikus)
+        self.assertEqual(values.tolist(), [0, 7, 0, 0, 9])
+        self.assertEqual(valid.tolist(), [False, True, False, False, True])
+        values, valid = Hipku.decode_array(haikus, ipv6=True)
+        self.assertEqual(values.tolist(), [[0, 0], [0, 0], [0, 7], [0, 0], [0, 0]])
+        self.assertEqual(valid.tolist(), [False, False, True, False, False])
+
+    def test_matches_python(self):
+        values = numpy.array([split(value) for value in _ipv6_values], dtype=numpy.uint64)
+        self.assertEqual(Hipku.encode_array(values), Hipku.encode_array_python(values.tolist()))
+        haikus = Hipku.encode_array(numpy.array(_ipv4_values, dtype=numpy.uint32))
+        self.assertEqual(Hipku.decode_array(haikus)[0].tolist(), Hipku.decode_array_python(haikus)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import socket
+import unittest
+
+from hipku import Hipku
+
+# The Arrow functions need NumPy as well
+try:
+    import numpy
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+_ips = ['127.0.0.1', '::1', '10.0.0.1', '127.0.0.1', '2001:db8::ff00:42:8329']
+_ipv4_values = [0, 2130706433, 0xFFFFFFFF, 167772161]
+
+
+def packed(ip):
+    return socket.inet_pton(socket.AF_INET6 if ':' in ip else socket.AF_INET, ip)
+
+
+def encoded(values):
+    return [None if value is None else Hipku.encode(value) for value in values]
+
+
+@unittest.skipUnless(pyarrow, 'pyarrow and NumPy are not installed')
+class ArrowTest(unittest.TestCase):
+
+    def test_strings(self):
+        column = pyarrow.array(_ips + [None])
+        result = Hipku.encode_arrow(column)
+        self.assertEqual(result.type, pyarrow.string())
+        self.assertEqual(result.to_pylist(), encoded(_ips + [None]))
+        self.assertEqual(Hipku.encode_arrow(column.dictionary_encode()).to_pylist(), encoded(_ips + [None]))
+        self.assertEqual(Hipku.encode_arrow(column.cast(pyarrow.large_string())).to_pylist(),
+                         encoded(_ips + [None]))
+
+    def test_decode(self):
+        haikus = encoded(_ips) + [None]
+        self.assertEqual(Hipku.decode_arrow(pyarrow.array(haikus)).to_pylist(),
+                         [Hipku.decode(haiku) for haiku in haikus[:-1]] + [None])
+
+    def test_chunked(self):
+        column = pyarrow.chunked_array([_ips[:2], [None], _ips[2:]])
+        result = Hipku.encode_arrow(column)
+        self.assertIsInstance(result, pyarrow.ChunkedArray)
+        self.assertEqual([len(chunk) for chunk in result.chunks], [2, 1, 3])
+        self.assertEqual(result.to_pylist(), encoded(_ips[:2] + [None] + _ips[2:]))
+        decoded = Hipku.decode_arrow(result)
+        self.assertEqual([len(chunk) for chunk in decoded.chunks], [2, 1, 3])
+        self.assertEqual(decoded.to_pylist(), [None if ip is None else Hipku.decode(Hipku.encode(ip))
+                                               for ip in _ips[:2] + [None] + _ips[2:]])
+
+    def test_errors(self):
+        column = pyarrow.array(['127.0.0.1', 'not an address', None])
+        with self.assertRaises(ValueError):
+            Hipku.encode_arrow(column)
+        self.assertEqual(Hipku.encode_arrow(column, errors='null').to_pylist(),
+                         [Hipku.encode('127.0.0.1'), None, None])
+        haikus = pyarrow.array([Hipku.encode('::1'), 'not a haiku'])
+        with self.assertRaises(ValueError):
+            Hipku.decode_arrow(haikus)
+        self.assertEqual(Hipku.decode_arrow(haikus, errors='null').to_pylist(), ['0:0:0:0:0:0:0:1', None])
+        with self.assertRaises(ValueError):
+            Hipku.encode_arrow(column, errors='skip')
+
+    def test_integers(self):
+        expected = [Hipku.encode_int(value, 4) for value in _ipv4_values] + [None]
+        for arrow_type in (pyarrow.int64(), pyarrow.uint32(), pyarrow.uint64()):
+            with self.subTest(type=arrow_type):
+                column = pyarrow.array(_ipv4_values + [None], type=arrow_type)
+                self.assertEqual(Hipku.encode_arrow(column).to_pylist(), expected)
+        column = pyarrow.array(_ipv4_values + [None]).dictionary_encode()
+        self.assertEqual(Hipku.encode_arrow(column).to_pylist(), expected)
+        self.assertEqual(Hipku.encode_arrow(pyarrow.array([1, 2, 3], type=pyarrow.int8())).to_pylist(),
+                         [Hipku.encode_int(value, 4) for value in (1, 2, 3)])
+
+    def test_integers_out_of_range(self):
+        column = pyarrow.array([1, -1, 1 << 32, None])
+        with self.assertRaises(ValueError):
+            Hipku.encode_arrow(column)
+        self.assertEqual(Hipku.encode_arrow(column, errors='null').to_pylist(),
+                         [Hipku.encode_int(1, 4), None, None, None])
+
+    def test_packed(self):
+        for ips in (['127.0.0.1', '10.0.0.1', '255.255.255.255'], ['::1', '2001:db8::ff00:42:8329', '::']):
+            width = len(packed(ips[0]))
+            with self.subTest(width=width):
+                values = [packed(ip) for ip in ips] + [None]
+                column = pyarrow.array(values, type=pyarrow.binary(width))
+                expected = encoded(ips) + [None]
+                self.assertEqual(Hipku.encode_arrow(column).to_pylist(), expected)
+                # A slice starts part way into the values buffer
+                self.assertEqual(Hipku.encode_arrow(column.slice(1)).to_pylist(), expected[1:])
+                # A dictionary column's buffer holds indices, not values
+                self.assertEqual(Hipku.encode_arrow(column.dictionary_encode()).to_pylist(), expected)
+                self.assertEqual(Hipku.encode_arrow(pyarrow.chunked_array([column, column])).to_pylist(),
+                                 expected * 2)
+
+    def test_unsupported_type(self):
+        with self.assertRaises(TypeError):
+            Hipku.encode_arrow(pyarrow.array([1.5]))
+        with self.assertRaises(TypeError):
+            Hipku.encode_arrow(pyarrow.array([b'\x01\x02\x03'], type=pyarrow.binary(3)))
+
+
+@unittest.skipUnless(pyarrow and pandas, 'pandas, pyarrow and NumPy are not installed')
+class SeriesTest(unittest.TestCase):
+
+    def test_objects(self):
+        series = pandas.Series(_ips + [None], index=list('abcdef'), name='ip', dtype=object)
+        result = Hipku.encode_series(series)
+        self.assertEqual(list(result.index), list('abcdef'))
+        self.assertEqual(result.name, 'ip')
+        self.assertEqual(result.tolist(), encoded(_ips) + [None])
+        decoded = Hipku.decode_series(result.iloc[:-1])
+        self.assertEqual(decoded.tolist(), [Hipku.decode(Hipku.encode(ip)) for ip in _ips])
+
+    def test_integers(self):
+        series = pandas.Series(_ipv4_values, dtype='uint32')
+        self.assertEqual(Hipku.encode_series(series).tolist(), [Hipku.encode_int(value, 4) for value in _ipv4_values])
+
+    def test_arrow_backed(self):
+        series = pandas.Series(_ips + [None], dtype=pandas.ArrowDtype(pyarrow.string()))
+        result = Hipku.encode_series(series)
+        self.assertIsInstance(result.dtype, pandas.ArrowDtype)
+        self.assertEqual(result.iloc[:-1].tolist(), encoded(_ips))
+        self.assertTrue(pandas.isna(result.iloc[-1]))
+
+        # pandas string dtypes stored in Arrow keep their dtype
+        series = pandas.Series(_ips + [None], dtype=pandas.StringDtype('pyarrow'))
+        result = Hipku.encode_series(series)
+        self.assertEqual(result.dtype, series.dtype)
+        self.assertEqual(result.iloc[:-1].tolist(), encoded(_ips))
+        self.assertTrue(pandas.isna(result.iloc[-1]))
+
+    def test_errors(self):
+        series = pandas.Series(['127.0.0.1', 'not an address', None])
+        with self.assertRaises(ValueError):
+            Hipku.encode_series(series)
+        result = Hipku.encode_series(series, errors='null')
+        self.assertEqual(result.iloc[0], Hipku.encode('127.0.0.1'))
+        self.assertTrue(pandas.isna(result.iloc[1]))
+        self.assertTrue(pandas.isna(result.iloc[2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
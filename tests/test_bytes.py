@@ -0,0 +1,70 @@
+import unittest
+
+from hipku import Hipku
+
+_ips = ['127.0.0.1', '0.0.0.0', '255.255.255.255', '::1', '2001:db8::ff00:42:8329', ' 10.0.0.1\n']
+
+
+class EncodeBytesTest(unittest.TestCase):
+
+    def test_matches_encode(self):
+        for ip in _ips:
+            with self.subTest(ip=ip):
+                self.assertEqual(Hipku.encode_bytes(ip), Hipku.encode(ip).encode('ascii'))
+
+    def test_invalid(self):
+        for ip in ('1.2.3', 'fe80::g', 'localhost'):
+            with self.subTest(ip=ip):
+                with self.assertRaises(ValueError):
+                    Hipku.encode_bytes(ip)
+
+
+class EncodeIntoTest(unittest.TestCase):
+
+    def test_consecutive(self):
+        # Haiku written one after another, as into a shared output buffer
+        buffer = bytearray(4096)
+        offset = 0
+        for ip in _ips:
+            offset += Hipku.encode_into(ip, buffer, offset)
+        expected = b''.join(Hipku.encode_bytes(ip) for ip in _ips)
+        self.assertEqual(offset, len(expected))
+        self.assertEqual(bytes(buffer[:offset]), expected)
+        self.assertEqual(bytes(buffer[offset:]), bytes(4096 - offset))
+        self.assertEqual(len(buffer), 4096)
+
+    def test_memoryview(self):
+        data = bytearray(b'.' * 200)
+        view = memoryview(data)[10:]
+        written = Hipku.encode_into('::1', view, 5)
+        self.assertEqual(bytes(data[15:15 + written]), Hipku.encode_bytes('::1'))
+        self.assertEqual(bytes(data[:15]), b'.' * 15)
+        self.assertEqual(bytes(data[15 + written:]), b'.' * (185 - written))
+
+    def test_exact_fit(self):
+        haiku = Hipku.encode_bytes('127.0.0.1')
+        buffer = bytearray(len(haiku))
+        self.assertEqual(Hipku.encode_into('127.0.0.1', buffer), len(haiku))
+        self.assertEqual(bytes(buffer), haiku)
+
+    def test_too_small(self):
+        # Nothing is written, and a bytearray isn't grown
+        haiku = Hipku.encode_bytes('127.0.0.1')
+        for size, offset in ((len(haiku) - 1, 0), (len(haiku), 1), (10, 20)):
+            with self.subTest(size=size, offset=offset):
+                buffer = bytearray(size)
+                with self.assertRaises(ValueError):
+                    Hipku.encode_into('127.0.0.1', buffer, offset)
+                self.assertEqual(buffer, bytearray(size))
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            Hipku.encode_into('127.0.0.1', bytearray(100), -1)
+        with self.assertRaises(ValueError):
+            Hipku.encode_into('not an address', bytearray(100))
+        with self.assertRaises(TypeError):
+            Hipku.encode_into('127.0.0.1', bytes(100))
+
+
+if __name__ == '__main__':
+    unittest.main()
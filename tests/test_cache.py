@@ -0,0 +1,162 @@
+import random
+import threading
+import unittest
+
+from hipku import CachedHipku, FragmentCache, Hipku, LRUCache
+
+
+class IPv6CacheTest(unittest.TestCase):
+
+    def tearDown(self):
+        Hipku.disable_ipv6_cache()
+
+    def test_matches_encode(self):
+        rng = random.Random(0)
+        ips = [':'.join(format(rng.randrange(65536), 'x') for _ in range(8)) for _ in range(50)]
+        # Repeat prefixes so hits are checked as well as misses
+        ips += [ip.rsplit(':', 1)[0] + ':1' for ip in ips] + ['::', '::1', 'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff']
+        expected = [Hipku.encode(ip) for ip in ips]
+        for prefix_hextets in range(1, 8):
+            with self.subTest(prefix_hextets=prefix_hextets):
+                Hipku.enable_ipv6_cache(64, prefix_hextets)
+                self.assertEqual([Hipku.encode(ip) for ip in ips], expected)
+                self.assertEqual([Hipku.encode(ip) for ip in ips], expected)
+                self.assertGreater(Hipku.ipv6_cache_stats()['hits'], 0)
+
+    def test_stats(self):
+        Hipku.enable_ipv6_cache(2, 1)
+        for ip in ('1::', '2::', '1::', '3::', '2::'):
+            Hipku.encode(ip)
+        # The hit on 1:: keeps it, so 3:: evicts 2::, which then misses
+        self.assertEqual(Hipku.ipv6_cache_stats(),
+                         {'hits': 1, 'misses': 4, 'evictions': 2, 'size': 2, 'maxsize': 2})
+        Hipku.encode('1::')
+        self.assertEqual(Hipku.ipv6_cache_stats()['evictions'], 3)
+
+    def test_disabled(self):
+        self.assertIsNone(Hipku.ipv6_cache_stats())
+        Hipku.enable_ipv6_cache()
+        Hipku.disable_ipv6_cache()
+        self.assertIsNone(Hipku.ipv6_cache_stats())
+
+    def test_bad_prefix_hextets(self):
+        for prefix_hextets in (0, 8, 3.0, None):
+            with self.subTest(prefix_hextets=prefix_hextets):
+                with self.assertRaises(ValueError):
+                    Hipku.enable_ipv6_cache(prefix_hextets=prefix_hextets)
+
+
+class FragmentCacheTest(unittest.TestCase):
+
+    def test_least_recently_used(self):
+        cache = FragmentCache(2)
+        cache.put('a', 'A')
+        cache.put('b', 'B')
+        self.assertEqual(cache.get('a'), 'A')
+        cache.put('c', 'C')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('b', 'default'), 'default')
+        self.assertEqual((cache.get('a'), cache.get('c')), ('A', 'C'))
+        self.assertEqual(cache.stats(), {'hits': 3, 'misses': 3, 'evictions': 1, 'size': 2, 'maxsize': 2})
+
+    def test_clear(self):
+        cache = FragmentCache(2)
+        cache.put('a', 'A')
+        cache.get('a')
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'maxsize': 2})
+
+    def test_bad_maxsize(self):
+        with self.assertRaises(ValueError):
+            FragmentCache(0)
+
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2})
+
+    def test_resize(self):
+        cache = LRUCache(3)
+        for key in 'abc':
+            cache.put(key, key.upper())
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('c'), 'C')
+        self.assertEqual(cache.stats()['evictions'], 2)
+        with self.assertRaises(ValueError):
+            cache.resize(0)
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+
+class CachedHipkuTest(unittest.TestCase):
+
+    def test_encode(self):
+        cache = CachedHipku(maxsize=2)
+        for ip in ('127.0.0.1', '::1', '127.0.0.1', '10.0.0.1', '::1'):
+            self.assertEqual(cache.encode(ip), Hipku.encode(ip))
+        self.assertEqual(cache.stats()['encode'], {'hits': 1, 'misses': 4, 'evictions': 2, 'size': 2, 'maxsize': 2})
+
+    def test_decode_normalized(self):
+        # Differently written copies of the same haiku share an entry
+        cache = CachedHipku()
+        haiku = Hipku.encode('127.0.0.1')
+        for text in (haiku, haiku.upper(), Hipku.to_single_line(haiku), '  ' + haiku.replace(' ', '\n')):
+            self.assertEqual(cache.decode(text), '127.0.0.1')
+        self.assertEqual(cache.stats()['decode'], {'hits': 3, 'misses': 1, 'evictions': 0, 'size': 1,
+                                                   'maxsize': 1024})
+
+    def test_errors_not_cached(self):
+        cache = CachedHipku()
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                cache.encode('not an address')
+            with self.assertRaises(ValueError):
+                cache.decode('not a haiku')
+        self.assertEqual(cache.stats()['encode']['size'], 0)
+        self.assertEqual(cache.stats()['decode']['size'], 0)
+        with self.assertRaises(ValueError):
+            CachedHipku(max_length=10).decode(Hipku.encode('::1'))
+
+    def test_resize_and_clear(self):
+        cache = CachedHipku(maxsize=4)
+        for value in range(4):
+            cache.decode(cache.encode('10.0.0.%d' % value))
+        cache.resize(2)
+        self.assertEqual((cache.stats()['encode']['size'], cache.stats()['decode']['size']), (2, 2))
+        cache.clear()
+        self.assertEqual(cache.stats()['encode'], {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'maxsize': 2})
+
+    def test_threads(self):
+        cache = CachedHipku(maxsize=16)
+        ips = ['10.0.%d.%d' % (i, j) for i in range(4) for j in range(8)]
+        expected = {ip: Hipku.encode(ip) for ip in ips}
+        failures = []
+
+        def work():
+            for ip in ips * 10:
+                if cache.encode(ip) != expected[ip] or cache.decode(expected[ip]) != ip:
+                    failures.append(ip)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+        stats = cache.stats()['encode']
+        self.assertEqual(stats['hits'] + stats['misses'], len(ips) * 10 * 4)
+        self.assertLessEqual(stats['size'], 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import random
+import unittest
+
+from hipku import Hipku
+
+_ipv4 = ['0.0.0.0', '127.0.0.1', '254.53.93.114', '255.255.255.255']
+_ipv6 = ['0:0:0:0:0:0:0:0', '0:0:0:0:0:0:0:1', '2001:db8:0:0:0:ff00:42:8329',
+         'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff']
+
+
+def tolerant_decode(haiku):
+    # The decoder decode falls back to for non-canonical haiku
+    return Hipku.decode_words(Hipku.split_haiku(haiku))
+
+
+def random_addresses(count, seed=0):
+    rng = random.Random(seed)
+    addresses = []
+    for _ in range(count):
+        addresses.append('.'.join(str(rng.randrange(256)) for _ in range(4)))
+        addresses.append(':'.join(format(rng.randrange(65536), 'x') for _ in range(8)))
+    return addresses
+
+
+class CanonicalDecodeTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for ip in _ipv4 + _ipv6 + random_addresses(200):
+            with self.subTest(ip=ip):
+                haiku = Hipku.encode(ip)
+                ip_string = Hipku.decode_canonical(haiku, ':' in ip)
+                self.assertEqual(ip_string, ip)
+                self.assertEqual(Hipku.decode(haiku), ip)
+                self.assertEqual(Hipku.decode(haiku, strict=True), ip)
+                self.assertEqual(tolerant_decode(haiku), ip)
+
+    def test_non_canonical_falls_back(self):
+        # Each variant misses the fast path and decodes the same as the
+        # tolerant decoder
+        for ip in _ipv4 + _ipv6:
+            haiku = Hipku.encode(ip)
+            variants = [
+                Hipku.to_single_line(haiku),
+                haiku.upper(),
+                haiku.lower(),
+                '  ' + haiku.replace('\n', '  ') + ' ',
+                haiku.rstrip('\n'),
+                haiku.replace('.', '')
+            ]
+            if ':' in ip:
+                # IPv6 haiku can have extra words anywhere
+                words = haiku.split(' ')
+                variants.append(' '.join(words[:3] + ['so'] + words[3:]))
+            for variant in variants:
+                with self.subTest(ip=ip, haiku=variant):
+                    self.assertIsNone(Hipku.decode_canonical(variant, not variant.lower().startswith('the ')))
+                    self.assertEqual(Hipku.decode(variant), tolerant_decode(variant))
+                    self.assertEqual(Hipku.decode(variant), ip)
+
+    def test_strict_rejects_non_canonical(self):
+        haiku = Hipku.encode('254.53.93.114')
+        for variant in (Hipku.to_single_line(haiku), haiku.upper(), haiku.rstrip('\n'),
+                        haiku.replace('weary', 'wearx'), ''):
+            with self.subTest(haiku=variant):
+                with self.assertRaises(ValueError):
+                    Hipku.decode(variant, strict=True)
+
+    def test_unknown_word(self):
+        # A word that's in the layout but not the dictionary isn't decoded by
+        # either path
+        haiku = Hipku.encode('254.53.93.114').replace('weary', 'wearx')
+        self.assertIsNone(Hipku.decode_canonical(haiku, False))
+        with self.assertRaises(ValueError):
+            Hipku.decode(haiku)
+
+    def test_max_length(self):
+        haiku = Hipku.encode('254.53.93.114')
+        self.assertEqual(Hipku.decode(haiku, max_length=len(haiku)), '254.53.93.114')
+        for strict in (False, True):
+            with self.subTest(strict=strict):
+                with self.assertRaises(ValueError):
+                    Hipku.decode(haiku, max_length=len(haiku) - 1, strict=strict)
+                with self.assertRaises(ValueError):
+                    Hipku.decode(haiku + ' ' * Hipku.max_haiku_length, strict=strict)
+
+    def test_max_haiku_length_disabled(self):
+        haiku = Hipku.encode('254.53.93.114') + ' ' * Hipku.max_haiku_length
+        previous = Hipku.max_haiku_length
+        Hipku.max_haiku_length = None
+        try:
+            self.assertEqual(Hipku.decode(haiku), '254.53.93.114')
+        finally:
+            Hipku.max_haiku_length = previous
+
+    def test_not_a_string(self):
+        haiku = Hipku.encode('254.53.93.114')
+        for value in (haiku.encode('ascii'), None, 42, [haiku]):
+            for strict in (False, True):
+                with self.subTest(value=value, strict=strict):
+                    with self.assertRaises(TypeError):
+                        Hipku.decode(value, strict=strict)
+
+
+if __name__ == '__main__':
+    unittest.main()
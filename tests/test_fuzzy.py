@@ -0,0 +1,97 @@
+import unittest
+
+from hipku import Hipku
+
+_ipv4 = '254.53.93.114'
+_ipv4_haiku = 'The weary red dove\nfights in the empty tundra.\nJasmine petals dance.\n'
+_ipv6 = '2001:db8:0:0:0:ff00:42:8329'
+_ipv6_haiku = 'Chilled apes and blunt seas\naid ace ace ace ace ace yaks.\nAce ants cure nice clans.\n'
+
+
+class DecodeFuzzyTest(unittest.TestCase):
+
+    def assert_fuzzy(self, haiku, ip, corrections, confidence, **options):
+        result = Hipku.decode_fuzzy(haiku, **options)
+        self.assertEqual(result[:2], (ip, corrections))
+        self.assertAlmostEqual(result[2], confidence)
+
+    def test_haiku(self):
+        self.assertEqual(Hipku.encode(_ipv4), _ipv4_haiku)
+        self.assertEqual(Hipku.encode(_ipv6), _ipv6_haiku)
+
+    def test_no_typos(self):
+        self.assert_fuzzy(_ipv4_haiku, _ipv4, [], 1.0)
+        self.assert_fuzzy(_ipv6_haiku, _ipv6, [], 1.0)
+        # Off the canonical fast path, but still no corrections
+        self.assert_fuzzy(Hipku.to_single_line(_ipv4_haiku).lower(), _ipv4, [], 1.0)
+        self.assert_fuzzy(Hipku.to_single_line(_ipv6_haiku).upper(), _ipv6, [], 1.0)
+
+    def test_one_typo(self):
+        # Confidence drops by the share of the word's letters that changed
+        self.assert_fuzzy(_ipv4_haiku.replace('weary', 'weery'), _ipv4, [('weery', 'weary')], 0.8)
+        self.assert_fuzzy(_ipv6_haiku.replace('Chilled', 'Chiled'), _ipv6, [('chiled', 'chilled')], 6 / 7)
+        self.assert_fuzzy(_ipv6_haiku.replace('blunt', 'blnt'), _ipv6, [('blnt', 'blunt')], 0.8)
+
+    def test_two_typos(self):
+        self.assert_fuzzy(_ipv4_haiku.replace('weary', 'weery').replace('dance', 'dunce'), _ipv4,
+                          [('weery', 'weary'), ('dunce', 'dance')], 0.8 * 0.8)
+        self.assert_fuzzy(_ipv6_haiku.replace('Chilled', 'Chiled').replace('clans', 'clanz'), _ipv6,
+                          [('chiled', 'chilled'), ('clanz', 'clans')], 6 / 7 * 0.8)
+
+    def test_readme_example(self):
+        self.assert_fuzzy('The weery red dov\nfihgts in the empty tundra.\nJasmine petals dance.', _ipv4,
+                          [('weery', 'weary'), ('dov', 'dove'), ('fihgts', 'fights')], 0.4)
+
+    def test_beyond_max_distance(self):
+        # 'wxxxry' is 3 edits from 'weary'
+        haiku = _ipv4_haiku.replace('weary', 'wxxxry')
+        with self.assertRaises(ValueError):
+            Hipku.decode_fuzzy(haiku)
+        with self.assertRaises(ValueError):
+            Hipku.decode_fuzzy(_ipv4_haiku.replace('weary', 'weery'), max_distance=0)
+        self.assert_fuzzy(haiku, _ipv4, [('wxxxry', 'weary')], 0.5, max_distance=3)
+
+    def test_max_distance_bounds(self):
+        for max_distance in (-1, Hipku.max_fuzzy_distance + 1):
+            with self.subTest(max_distance=max_distance):
+                with self.assertRaises(ValueError):
+                    Hipku.decode_fuzzy(_ipv4_haiku, max_distance=max_distance)
+
+    def test_oversized_word(self):
+        # A word far longer than any dictionary word is skipped without
+        # generating its deletions, which would take minutes
+        word = ''.join(chr(ord('a') + i % 26) for i in range(4000))
+        with self.assertRaises(ValueError):
+            Hipku.decode_fuzzy(_ipv4_haiku.replace('weary', word), max_distance=3)
+        haiku = _ipv4_haiku.replace('Jasmine', word[:2000] + ' jasmine')
+        self.assert_fuzzy(haiku, _ipv4, [], 1.0)
+
+    def test_missing_word(self):
+        with self.assertRaises(ValueError):
+            Hipku.decode_fuzzy('The weary red dove\nfights in the empty.\nJasmine petals dance.')
+
+    def test_not_a_string(self):
+        with self.assertRaises(TypeError):
+            Hipku.decode_fuzzy(_ipv4_haiku.encode('ascii'))
+        with self.assertRaises(ValueError):
+            Hipku.decode_fuzzy(_ipv4_haiku, max_length=10)
+
+
+class EditDistanceTest(unittest.TestCase):
+
+    def test_distances(self):
+        for a, b, distance in (('abc', 'abc', 0), ('', 'ab', 2), ('weary', 'weery', 1), ('dove', 'dov', 1),
+                               ('fights', 'fihgts', 2), ('kitten', 'sitting', 3)):
+            with self.subTest(a=a, b=b):
+                self.assertEqual(Hipku.edit_distance(a, b, 5), distance)
+                self.assertEqual(Hipku.edit_distance(b, a, 5), distance)
+
+    def test_cut_off(self):
+        # Past max_distance, the distance is reported as max_distance + 1
+        self.assertEqual(Hipku.edit_distance('kitten', 'sitting', 2), 3)
+        self.assertEqual(Hipku.edit_distance('a', 'abcdef', 2), 3)
+        self.assertEqual(Hipku.edit_distance('abcd', 'wxyz', 1), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import ipaddress
+import socket
+import unittest
+
+from hipku import Hipku
+
+_ips = ['0.0.0.0', '127.0.0.1', '255.255.255.255', '::', '::1', '2001:db8::ff00:42:8329',
+        'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff']
+
+
+class IntegerTest(unittest.TestCase):
+
+    def test_encode_int(self):
+        for ip in _ips:
+            address = ipaddress.ip_address(ip)
+            with self.subTest(ip=ip):
+                self.assertEqual(Hipku.encode_int(int(address), address.version), Hipku.encode(ip))
+
+    def test_encode_int_out_of_range(self):
+        for value, version in ((-1, 4), (1 << 32, 4), (-1, 6), (1 << 128, 6)):
+            with self.subTest(value=value, version=version):
+                with self.assertRaises(ValueError):
+                    Hipku.encode_int(value, version)
+        with self.assertRaises(ValueError):
+            Hipku.encode_int(1, 5)
+
+    def test_decode_to_int(self):
+        for ip in _ips:
+            address = ipaddress.ip_address(ip)
+            with self.subTest(ip=ip):
+                self.assertEqual(Hipku.decode_to_int(Hipku.encode(ip)), (int(address), address.version))
+                # Off the canonical layout too
+                self.assertEqual(Hipku.decode_to_int(Hipku.to_single_line(Hipku.encode(ip)).upper()),
+                                 (int(address), address.version))
+        with self.assertRaises(ValueError):
+            Hipku.decode_to_int('not a haiku')
+        with self.assertRaises(ValueError):
+            Hipku.decode_to_int(Hipku.encode('::1'), max_length=10)
+
+    def test_encode_address(self):
+        for ip in _ips:
+            with self.subTest(ip=ip):
+                self.assertEqual(Hipku.encode_address(ipaddress.ip_address(ip)), Hipku.encode(ip))
+
+
+class PackedTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for ip in _ips:
+            packed = socket.inet_pton(socket.AF_INET6 if ':' in ip else socket.AF_INET, ip)
+            with self.subTest(ip=ip):
+                haiku = Hipku.encode_packed(packed)
+                self.assertEqual(haiku, Hipku.encode(ip))
+                self.assertEqual(Hipku.encode_packed(bytearray(packed)), haiku)
+                self.assertEqual(Hipku.encode_packed(memoryview(packed)), haiku)
+                self.assertEqual(Hipku.decode_to_packed(haiku), packed)
+
+    def test_bad_length(self):
+        for packed in (b'', b'\x01\x02\x03', b'\x00' * 5, b'\x00' * 15, b'\x00' * 17):
+            with self.subTest(packed=packed):
+                with self.assertRaises(ValueError):
+                    Hipku.encode_packed(packed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import concurrent.futures
+import itertools
+import threading
+import unittest
+
+from hipku import Hipku
+
+_ips = ['10.%d.%d.%d' % (i, j, k) for i in range(2) for j in range(16) for k in range(32)] + ['::1', '2001:db8::1']
+
+
+def pool_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('ThreadPoolExecutor')]
+
+
+class ManyTest(unittest.TestCase):
+
+    def test_encode_and_decode(self):
+        expected = [Hipku.encode(ip) for ip in _ips]
+        for workers in (None, 1, 3, 0):
+            with self.subTest(workers=workers):
+                haikus = list(Hipku.encode_many(iter(_ips), workers=workers))
+                self.assertEqual(haikus, expected)
+                self.assertEqual(list(Hipku.decode_many(haikus, workers=workers)),
+                                 [Hipku.decode(haiku) for haiku in haikus])
+
+    def test_executor(self):
+        # A caller's executor is used, and left running afterwards
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            self.assertEqual(list(Hipku.encode_many(_ips, executor=executor)), [Hipku.encode(ip) for ip in _ips])
+            self.assertEqual(executor.submit(len, 'abc').result(), 3)
+        with self.assertRaises(ValueError):
+            Hipku.encode_many(_ips, executor=executor, workers=2)
+
+    def test_errors(self):
+        ips = ['127.0.0.1', 'not an address', None, '::1']
+        for workers in (None, 2):
+            with self.subTest(workers=workers):
+                with self.assertRaises(ValueError):
+                    list(Hipku.encode_many(ips, workers=workers))
+                self.assertEqual(list(Hipku.encode_many(ips, errors='skip', workers=workers)),
+                                 [Hipku.encode('127.0.0.1'), Hipku.encode('::1')])
+                results = list(Hipku.encode_many(ips, errors='yield', workers=workers))
+                self.assertEqual(len(results), 4)
+                self.assertIsInstance(results[1], ValueError)
+                self.assertIsInstance(results[2], TypeError)
+                self.assertEqual(results[3], Hipku.encode('::1'))
+        with self.assertRaises(ValueError):
+            Hipku.encode_many(ips, errors='ignore')
+
+    def test_decode_max_length(self):
+        haiku = Hipku.encode('::1')
+        results = list(Hipku.decode_many([haiku, 'x' * 100], errors='yield', max_length=len(haiku), workers=2))
+        self.assertEqual(results[0], '0:0:0:0:0:0:0:1')
+        self.assertIsInstance(results[1], ValueError)
+
+    def test_early_close(self):
+        # Closing the generator part way through an endless input shuts
+        # down the pool it made
+        before = len(pool_threads())
+        results = Hipku.encode_many(itertools.cycle(_ips), workers=2)
+        self.assertEqual(list(itertools.islice(results, 5)), [Hipku.encode(ip) for ip in _ips[:5]])
+        self.assertGreater(len(pool_threads()), before)
+        results.close()
+        self.assertEqual(len(pool_threads()), before)
+
+    def test_early_close_with_executor(self):
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            results = Hipku.encode_many(itertools.cycle(_ips), executor=executor)
+            next(results)
+            results.close()
+            self.assertEqual(executor.submit(len, 'abc').result(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+
+from hipku import Hipku
+
+# (address, expected octets or hextets)
+_valid_ipv4 = [
+    ('0.0.0.0', [0, 0, 0, 0]),
+    ('127.0.0.1', [127, 0, 0, 1]),
+    ('255.255.255.255', [255, 255, 255, 255]),
+    ('010.001.0.00', [10, 1, 0, 0]),
+    (' 1.2.3.4\n', [1, 2, 3, 4]),
+    # Surrounding whitespace, as in lines read from a CRLF file
+    ('1.2.3.4\r\n', [1, 2, 3, 4]),
+    ('\t1.2.3.4', [1, 2, 3, 4])
+]
+
+_invalid_ipv4 = [
+    '1.2.3',
+    '1.2.3.4.5',
+    '1.2.3.',
+    '1..3.4',
+    '256.0.0.1',
+    '1.2.3.1000',
+    '0001.2.3.4',
+    '1.2.3.4a',
+    '1.2.-3.4',
+    '+1.2.3.4',
+    '1.2.3.\t4',
+    '1.2.3.4_0',
+    '1.2.3.\u0661'
+]
+
+_valid_ipv6 = [
+    ('::', [0] * 8),
+    ('::1', [0, 0, 0, 0, 0, 0, 0, 1]),
+    ('1::', [1, 0, 0, 0, 0, 0, 0, 0]),
+    ('1:2:3:4:5:6:7:8', [1, 2, 3, 4, 5, 6, 7, 8]),
+    ('fe80::1:2', [0xfe80, 0, 0, 0, 0, 0, 1, 2]),
+    ('FFFF:abcd::0000:0', [0xffff, 0xabcd, 0, 0, 0, 0, 0, 0]),
+    # '::' standing for a single zero hextet, at either end or inside
+    ('1:2:3:4:5:6:7::', [1, 2, 3, 4, 5, 6, 7, 0]),
+    ('::2:3:4:5:6:7:8', [0, 2, 3, 4, 5, 6, 7, 8]),
+    ('1:2:3::5:6:7:8', [1, 2, 3, 0, 5, 6, 7, 8]),
+    # The last 32 bits written as an IPv4 address
+    ('::ffff:192.0.2.1', [0, 0, 0, 0, 0, 0xffff, 0xc000, 0x0201]),
+    ('::1.2.3.4', [0, 0, 0, 0, 0, 0, 0x0102, 0x0304]),
+    ('1:2:3:4:5:6:1.2.3.4', [1, 2, 3, 4, 5, 6, 0x0102, 0x0304]),
+    ('1::1.2.3.4', [1, 0, 0, 0, 0, 0, 0x0102, 0x0304]),
+    # Surrounding whitespace, and spaces and newlines inside
+    ('fe80::1\r', [0xfe80, 0, 0, 0, 0, 0, 0, 1]),
+    (' ::1\t', [0, 0, 0, 0, 0, 0, 0, 1]),
+    ('\t\t12::', [0x12, 0, 0, 0, 0, 0, 0, 0]),
+    ('fe80:: 1\n:2', [0xfe80, 0, 0, 0, 0, 0, 1, 2])
+]
+
+_invalid_ipv6 = [
+    ':',
+    ':::',
+    '1:2:3:4:5:6:7',
+    '1:2:3:4:5:6:7:8:9',
+    '1::2::3',
+    '1:2:3:4::5:6:7:8',
+    '12345::',
+    '1:2:3:4:5:6:7:',
+    ':1:2:3:4:5:6:7',
+    'fe80::g',
+    'fe80::1%eth0',
+    '::ffff:1.2.3',
+    '::ffff:256.0.0.1',
+    '1:2:3:4:5:6:7:1.2.3.4',
+    '1.2.3.4::',
+    ':1::2',
+    '1::2:',
+    '00001::',
+    '0x1::',
+    '+1::',
+    '1_2::',
+    '12:\t:1',
+    '1:2:3:4:5:6:7:\u0661'
+]
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_valid_ipv4(self):
+        for ip, octets in _valid_ipv4:
+            with self.subTest(ip=ip):
+                self.assertFalse(Hipku.ip_is_ipv6(ip))
+                self.assertEqual(Hipku.split_ip(ip, False), octets)
+
+    def test_invalid_ipv4(self):
+        for ip in _invalid_ipv4:
+            with self.subTest(ip=ip):
+                with self.assertRaises(ValueError):
+                    Hipku.split_ip(ip, False)
+
+    def test_valid_ipv6(self):
+        for ip, hextets in _valid_ipv6:
+            with self.subTest(ip=ip):
+                self.assertTrue(Hipku.ip_is_ipv6(ip))
+                self.assertEqual(Hipku.split_ip(ip, True), hextets)
+
+    def test_invalid_ipv6(self):
+        for ip in _invalid_ipv6:
+            with self.subTest(ip=ip):
+                with self.assertRaises(ValueError):
+                    Hipku.split_ip(ip, True)
+
+    def test_zone_index_is_not_read_as_ipv4(self):
+        with self.assertRaisesRegex(ValueError, 'not a valid IPv6 address'):
+            Hipku.split_ip('fe80::1%eth0', True)
+
+    def test_neither_version(self):
+        with self.assertRaises(ValueError):
+            Hipku.ip_is_ipv6('localhost')
+
+    def test_encode_round_trip(self):
+        # Every accepted spelling of an address encodes to the same haiku
+        self.assertEqual(Hipku.encode('::ffff:192.0.2.1'), Hipku.encode('::ffff:c000:201'))
+        self.assertEqual(Hipku.decode(Hipku.encode('1:2:3:4:5:6:7::')), '1:2:3:4:5:6:7:0')
+        self.assertEqual(Hipku.decode(Hipku.encode('010.001.0.00')), '10.1.0.0')
+
+
+if __name__ == '__main__':
+    unittest.main()
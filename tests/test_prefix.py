@@ -0,0 +1,70 @@
+import ipaddress
+import unittest
+
+from hipku import Hipku
+
+
+def networks(*names):
+    return [ipaddress.ip_network(name) for name in names]
+
+
+class MatchPrefixTest(unittest.TestCase):
+
+    def test_readme_examples(self):
+        self.assertEqual(list(Hipku.match_prefix('The weary red dove')), networks('254.48.0.0/12'))
+        # 'The' is the start of three plant nouns, one of them two words long
+        self.assertEqual(list(Hipku.match_prefix('The weary red dove fights in the empty tundra. The')),
+                         networks('254.53.93.64/28', '254.53.93.160/28', '254.53.93.176/28'))
+
+    def test_partial_last_word(self):
+        # 'plum' is a word of its own and the start of 'plump'
+        self.assertEqual(list(Hipku.match_prefix('Plum')), networks('9000::/8', '9100::/8'))
+        self.assertEqual(list(Hipku.match_prefix('Chilled apes and blu')),
+                         networks('2001:c00::/24', '2001:d00::/24', '2001:e00::/24'))
+        self.assertEqual(list(Hipku.match_prefix('The weary red do')), networks('254.48.0.0/12'))
+
+    def test_complete_last_word(self):
+        # Anything but a letter after the last word makes it complete
+        for text in ('Plum ', 'Plum.', 'plum,'):
+            with self.subTest(text=text):
+                self.assertEqual(list(Hipku.match_prefix(text)), networks('9000::/8'))
+        self.assertEqual(list(Hipku.match_prefix('Chilled elk')), networks('2049::/16', '204a::/16'))
+        self.assertEqual(list(Hipku.match_prefix('Chilled elk.')), networks('2049::/16'))
+
+    def test_whole_haiku(self):
+        for ip in ('254.53.93.114', '2001:db8::ff00:42:8329'):
+            with self.subTest(ip=ip):
+                self.assertEqual(list(Hipku.match_prefix(Hipku.encode(ip))), [ipaddress.ip_network(ip)])
+
+    def test_every_prefix_contains_the_address(self):
+        for ip in ('127.0.0.1', '254.53.93.114', '::1', '2001:db8::ff00:42:8329'):
+            address = ipaddress.ip_address(ip)
+            words = Hipku.encode(ip).split()
+            for count in range(1, len(words) + 1):
+                with self.subTest(ip=ip, count=count):
+                    matches = list(Hipku.match_prefix(' '.join(words[:count]) + ' '))
+                    self.assertTrue(any(address in network for network in matches))
+
+    def test_list(self):
+        # A list is read like a string whose last word may be cut short
+        self.assertEqual(list(Hipku.match_prefix(['The', 'weary', 'red', 'do'])), networks('254.48.0.0/12'))
+        self.assertEqual(list(Hipku.match_prefix(['Chilled', 'elk'])), networks('2049::/16', '204a::/16'))
+        words = Hipku.encode('254.53.93.114').split()
+        self.assertEqual(list(Hipku.match_prefix(words[:10])), networks('254.53.93.112/28'))
+
+    def test_ipv6(self):
+        self.assertEqual(list(Hipku.match_prefix('Chilled apes and blunt')), networks('2001:d00::/24'))
+        self.assertEqual(list(Hipku.match_prefix('Chilled apes')), networks('2001::/16'))
+
+    def test_empty(self):
+        self.assertEqual(list(Hipku.match_prefix('')), networks('0.0.0.0/0', '::/0'))
+        self.assertEqual(list(Hipku.match_prefix([])), networks('0.0.0.0/0', '::/0'))
+
+    def test_no_match(self):
+        self.assertEqual(list(Hipku.match_prefix('zzz')), [])
+        self.assertEqual(list(Hipku.match_prefix('The weary red dove fights in the empty tundra. Jasmine petals '
+                                                 'dance. Extra')), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
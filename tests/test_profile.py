@@ -0,0 +1,87 @@
+import threading
+import unittest
+
+import hipku
+from hipku import Hipku
+
+
+class ProfileTest(unittest.TestCase):
+
+    def tearDown(self):
+        Hipku.disable_profiling()
+
+    def test_block(self):
+        with Hipku.profile() as profiler:
+            Hipku.decode(Hipku.encode('1.2.3.4'))
+        snapshot = profiler.snapshot()
+        self.assertEqual(snapshot['ipv4']['encode']['calls'], 1)
+        self.assertEqual(snapshot['ipv4']['decode_canonical']['calls'], 1)
+        self.assertIsNone(Hipku.active_profiler())
+        self.assertFalse(hipku._profiling)
+
+    def test_overlapping_threads(self):
+        # A enters, B enters, A exits, B exits
+        a_entered = threading.Event()
+        b_entered = threading.Event()
+        a_exited = threading.Event()
+        profilers = {}
+
+        def block_a():
+            with Hipku.profile() as profiler:
+                profilers['a'] = profiler
+                a_entered.set()
+                b_entered.wait()
+                Hipku.encode('1.2.3.4')
+            a_exited.set()
+
+        def block_b():
+            a_entered.wait()
+            with Hipku.profile() as profiler:
+                profilers['b'] = profiler
+                b_entered.set()
+                a_exited.wait()
+                Hipku.encode('::1')
+                Hipku.encode('::2')
+
+        threads = [threading.Thread(target=block_a), threading.Thread(target=block_b)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Each block only saw its own thread's calls, and nothing is left
+        # profiling afterwards
+        self.assertEqual(list(profilers['a'].snapshot()), ['ipv4'])
+        self.assertEqual(profilers['b'].snapshot()['ipv6']['encode']['calls'], 2)
+        self.assertIsNone(Hipku.active_profiler())
+        self.assertFalse(hipku._profiling)
+
+    def test_nested_and_process_wide(self):
+        profiler = Hipku.enable_profiling()
+        with Hipku.profile() as outer:
+            with Hipku.profile() as inner:
+                Hipku.encode('1.2.3.4')
+            Hipku.encode('1.2.3.5')
+        Hipku.encode('1.2.3.6')
+        self.assertEqual(inner.snapshot()['ipv4']['encode']['calls'], 1)
+        self.assertEqual(outer.snapshot()['ipv4']['encode']['calls'], 1)
+        self.assertEqual(Hipku.profiling_snapshot()['ipv4']['encode']['calls'], 1)
+        self.assertIs(Hipku.active_profiler(), profiler)
+        Hipku.disable_profiling()
+        self.assertFalse(hipku._profiling)
+
+    def test_canonical_miss(self):
+        # A haiku on one line misses the canonical decoder, which is
+        # recorded apart from split_haiku
+        haiku = Hipku.to_single_line(Hipku.encode('1.2.3.4'))
+        with Hipku.profile() as profiler:
+            self.assertEqual(Hipku.decode(haiku), '1.2.3.4')
+        stages = profiler.snapshot()['ipv4']
+        self.assertNotIn('decode_canonical', stages)
+        self.assertEqual(stages['canonical_miss']['calls'], 1)
+        self.assertEqual(stages['split_haiku']['calls'], 1)
+        self.assertEqual(stages['decode']['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
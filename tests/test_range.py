@@ -0,0 +1,77 @@
+import ipaddress
+import unittest
+
+from hipku import Hipku
+
+
+class RangeTest(unittest.TestCase):
+
+    def assert_range(self, start, end, step, version):
+        # Compare every haiku encode_range yields with encode_int, and check
+        # it yields exactly the expected addresses
+        start_value = int(ipaddress.ip_address(start))
+        end_value = int(ipaddress.ip_address(end))
+        expected = list(range(start_value, end_value + 1, step))
+        results = list(Hipku.encode_range(start, end, step))
+        self.assertEqual([int(ipaddress.ip_address(address)) for address, haiku in results], expected)
+        for address, haiku in results:
+            self.assertEqual(haiku, Hipku.encode_int(int(ipaddress.ip_address(address)), version))
+
+    def test_ipv4_carries(self):
+        # Steps of 1 carry through the last nibble, the last octet and two
+        # octets at once
+        self.assert_range('10.0.0.250', '10.0.1.20', 1, 4)
+        self.assert_range('10.0.255.250', '10.1.0.5', 1, 4)
+        self.assert_range('255.255.255.240', '255.255.255.255', 1, 4)
+
+    def test_ipv4_steps(self):
+        for step in (2, 3, 16, 17, 255, 256, 4099):
+            with self.subTest(step=step):
+                self.assert_range('1.2.250.7', '1.4.3.2', step, 4)
+
+    def test_ipv6_carries(self):
+        self.assert_range('::fff0', '::1:10', 1, 6)
+        self.assert_range('1:2:3:4:5:6:ffff:fffe', '1:2:3:4:5:7::2', 1, 6)
+        self.assert_range('ffff:ffff:ffff:ffff:ffff:ffff:ffff:fff0', 'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff', 1, 6)
+
+    def test_ipv6_steps(self):
+        for step in (3, 255, 257, 65537, 1 << 40):
+            with self.subTest(step=step):
+                self.assert_range('2001:db8::fff0', '2001:db8::2:3', step, 6)
+
+    def test_single_address(self):
+        self.assert_range('1.2.3.4', '1.2.3.4', 1, 4)
+        self.assert_range('1.2.3.4', '1.2.3.4', 1000, 4)
+
+    def test_ipaddress_objects(self):
+        start = ipaddress.ip_address('192.0.2.254')
+        results = list(Hipku.encode_range(start, ipaddress.ip_address('192.0.3.1')))
+        self.assertEqual([address for address, haiku in results],
+                         [start + offset for offset in range(4)])
+        self.assertEqual([haiku for address, haiku in results],
+                         [Hipku.encode(str(start + offset)) for offset in range(4)])
+
+    def test_network(self):
+        for network, step in (('192.0.2.0/23', 1), ('10.0.0.0/16', 251), ('2001:db8::fe00/119', 1),
+                              ('2001:db8::/96', 65537)):
+            with self.subTest(network=network, step=step):
+                network = ipaddress.ip_network(network)
+                results = list(Hipku.encode_network(network, step))
+                self.assertEqual([address for address, haiku in results], list(network)[::step]
+                                 if network.num_addresses <= 1 << 16 else
+                                 [network.network_address + offset
+                                  for offset in range(0, network.num_addresses, step)])
+                for address, haiku in results:
+                    self.assertEqual(haiku, Hipku.encode_int(int(address), network.version))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Hipku.encode_range('1.2.3.5', '1.2.3.4')
+        with self.assertRaises(ValueError):
+            Hipku.encode_range('1.2.3.4', '::1')
+        with self.assertRaises(ValueError):
+            Hipku.encode_range('1.2.3.4', '1.2.3.5', 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import io
+import unittest
+
+from hipku import Hipku
+
+
+def haiku(ip):
+    return Hipku.to_single_line(Hipku.encode(ip))
+
+
+# (text, the addresses in it that should be rewritten)
+_rewritten = [
+    ('127.0.0.1 - - "GET / HTTP/1.1" 200', ['127.0.0.1']),
+    ('client 10.0.0.1:8080 closed', ['10.0.0.1']),
+    ('upstream: "10.0.0.1:80"', ['10.0.0.1']),
+    ('connect to 192.0.2.1:443.', ['192.0.2.1']),
+    ('peer 192.0.2.1: connection reset', ['192.0.2.1']),
+    ('[2001:db8::1]:443', ['2001:db8::1']),
+    ('from fe80::1 to ::ffff:192.0.2.1', ['fe80::1', '::ffff:192.0.2.1']),
+    ('ends with an address 1.2.3.4', ['1.2.3.4']),
+    ('1:2:3:4:5:6:7:8,1.2.3.4', ['1:2:3:4:5:6:7:8', '1.2.3.4']),
+    # The zone ID is left after the haiku
+    ('fe80::1%eth0', ['fe80::1']),
+    ('fe80:: and ::1', ['fe80::', '::1']),
+    ('::ffff:a00:1 ::', ['::ffff:a00:1'])
+]
+
+# Text with nothing that should be rewritten
+_unchanged = [
+    'std::vector<int> v;',
+    'a::b::c',
+    'started at 12:30:45',
+    'finished at 12:30:45.123',
+    'ether 00:1a:2b:3c:4d:5e',
+    'ether 00:1A:2B:3C:4D:5E txqueuelen 1000',
+    'version 1.2.3.4.5',
+    'libfoo-1.2.3.4a',
+    'v1.2.3.4',
+    'release 2.0.1',
+    '10.0.0.1:8080:9090',
+    '10.0.0.1::1',
+    '10.0.0.1:80ab',
+    '999.1.1.1',
+    # IPv6 candidates without a decimal digit
+    'x :: Int',
+    'INFO :: msg',
+    'add:: x',
+    'namespace cafe:: {',
+    'dead:beef::'
+]
+
+
+class RewriteTest(unittest.TestCase):
+
+    def test_rewritten(self):
+        for text, addresses in _rewritten:
+            with self.subTest(text=text):
+                expected = text
+                for address in addresses:
+                    expected = expected.replace(address, haiku(address), 1)
+                self.assertEqual(Hipku.rewrite_text(text), expected)
+
+    def test_unchanged(self):
+        for text in _unchanged:
+            with self.subTest(text=text):
+                self.assertEqual(Hipku.rewrite_text(text), text)
+
+    def test_ip_port(self):
+        # The port is kept after the haiku
+        self.assertEqual(Hipku.rewrite_text('10.0.0.1:8080'), haiku('10.0.0.1') + ':8080')
+        self.assertEqual(Hipku.rewrite_text('[::1]:8080'), '[' + haiku('::1') + ']:8080')
+
+    def test_stream(self):
+        # Lines split across chunks are rewritten the same as whole text
+        text = '\n'.join(text for text, addresses in _rewritten) + '\n' + '\n'.join(_unchanged)
+        outfile = io.BytesIO()
+        Hipku.rewrite_stream(io.BytesIO(text.encode('utf-8')), outfile, chunk_size=7)
+        self.assertEqual(outfile.getvalue().decode('utf-8'), Hipku.rewrite_text(text))
+
+
+if __name__ == '__main__':
+    unittest.main()
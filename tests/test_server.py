@@ -0,0 +1,152 @@
+import asyncio
+import json
+import socket
+import unittest
+
+from hipku import Hipku
+from hipku_server import HipkuClient, HipkuServer
+
+
+class TrackingServer(HipkuServer):
+    # Records when each connection's handler has finished
+
+    def __init__(self, **limits):
+        super().__init__(**limits)
+        self.handled = asyncio.Event()
+
+    async def handle(self, reader, writer):
+        try:
+            await super().handle(reader, writer)
+        finally:
+            self.handled.set()
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def start_server(self, **limits):
+        # Listen on a free port, closed again when the test ends
+        server = await HipkuServer(**limits).start(port=0)
+        self.addAsyncCleanup(self.stop_server, server)
+        return server.sockets[0].getsockname()[1]
+
+    async def stop_server(self, server):
+        server.close()
+        await server.wait_closed()
+
+    async def connect(self, port):
+        client = await HipkuClient.connect(port=port)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_encode_and_decode(self):
+        client = await self.connect(await self.start_server())
+        ips = ['127.0.0.1', '::1']
+        haikus, errors = await client.encode(ips)
+        self.assertEqual(haikus, [Hipku.encode(ip) for ip in ips])
+        self.assertEqual(errors, [None, None])
+        self.assertEqual(await client.decode(haikus), (['127.0.0.1', '0:0:0:0:0:0:0:1'], [None, None]))
+
+    async def test_pipelined_requests(self):
+        # Many requests in flight on one connection each get their own
+        # response
+        client = await self.connect(await self.start_server())
+        ips = ['10.0.0.%d' % i for i in range(50)]
+        responses = await asyncio.gather(*[client.encode([ip]) for ip in ips])
+        self.assertEqual([results[0] for results, errors in responses], [Hipku.encode(ip) for ip in ips])
+
+    async def test_pipelined_lines(self):
+        # Requests written in one go are answered in order
+        port = await self.start_server()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        requests = [{'id': i, 'op': 'encode', 'items': ['10.0.0.%d' % i]} for i in range(10)]
+        writer.write(b''.join(json.dumps(request).encode('utf-8') + b'\n' for request in requests))
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in requests]
+        writer.close()
+        await writer.wait_closed()
+        self.assertEqual([response['id'] for response in responses], list(range(10)))
+        self.assertEqual([response['results'][0] for response in responses],
+                         [Hipku.encode('10.0.0.%d' % i) for i in range(10)])
+
+    async def test_item_errors(self):
+        # Items that can't be converted, including ones that aren't
+        # strings, don't stop the rest of the batch
+        client = await self.connect(await self.start_server())
+        results, errors = await client.encode(['1.2.3.4', 'bad', 5, None, ['1.2.3.4'], '::1'])
+        self.assertEqual(results, [Hipku.encode('1.2.3.4'), None, None, None, None, Hipku.encode('::1')])
+        self.assertIsNone(errors[0])
+        self.assertIn('neither', errors[1])
+        self.assertEqual(errors[2:5], ['Item must be a string, not int', 'Item must be a string, not NoneType',
+                                       'Item must be a string, not list'])
+        self.assertIsNone(errors[5])
+
+        results, errors = await client.decode(['not a haiku', 7])
+        self.assertEqual(results, [None, None])
+        self.assertEqual(errors[1], 'Item must be a string, not int')
+
+    async def test_bad_requests(self):
+        port = await self.start_server()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for line, error in ((b'not json', 'Request is not valid JSON'),
+                            (b'[1, 2]', 'Request must be a JSON object'),
+                            (b'{"id": 3, "op": "reverse", "items": []}', 'op must be "encode" or "decode"'),
+                            (b'{"id": 4, "op": "encode", "items": "1.2.3.4"}', 'items must be a list')):
+            writer.write(line + b'\n')
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            self.assertEqual(response['error'], error)
+        writer.close()
+        await writer.wait_closed()
+
+    async def test_max_batch(self):
+        client = await self.connect(await self.start_server(max_batch=2))
+        self.assertEqual(len((await client.encode(['1.2.3.4', '::1']))[0]), 2)
+        with self.assertRaisesRegex(ValueError, 'Batch is larger than 2 items'):
+            await client.encode(['1.2.3.4', '::1', '10.0.0.1'])
+        # The connection is still usable afterwards
+        self.assertEqual((await client.encode(['1.2.3.4']))[1], [None])
+
+    async def test_max_line(self):
+        # An overlong request gets an error and the connection is closed
+        port = await self.start_server(max_line=100)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        request = {'id': 1, 'op': 'encode', 'items': ['1.2.3.4'] * 20}
+        writer.write(json.dumps(request).encode('utf-8') + b'\n')
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        self.assertEqual(response, {'id': None, 'error': 'Request is longer than 100 bytes'})
+        self.assertEqual(await reader.read(), b'')
+        writer.close()
+
+    async def test_client_closed(self):
+        client = await HipkuClient.connect(port=await self.start_server())
+        await client.encode(['1.2.3.4'])
+        await client.close()
+        with self.assertRaises(ConnectionError):
+            await client.encode(['1.2.3.4'])
+
+
+    async def test_client_aborts(self):
+        # A client that pipelines requests without reading until the server
+        # stops reading, then drops the connection, doesn't leave the
+        # handler waiting on a full queue
+        server = TrackingServer(max_pending=2)
+        listener = await server.start(port=0)
+        self.addAsyncCleanup(self.stop_server, listener)
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.connect(listener.sockets[0].getsockname())
+        reader, writer = await asyncio.open_connection(sock=sock)
+        request = json.dumps({'id': 1, 'op': 'encode', 'items': ['10.0.0.1'] * 5000}).encode('utf-8') + b'\n'
+        for _ in range(1000):
+            writer.write(request)
+            try:
+                await asyncio.wait_for(writer.drain(), 1)
+            except asyncio.TimeoutError:
+                break
+        writer.transport.abort()
+        await asyncio.wait_for(server.handled.wait(), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
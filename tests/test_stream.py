@@ -0,0 +1,73 @@
+import concurrent.futures
+import io
+import os
+import subprocess
+import sys
+import unittest
+
+from hipku import Hipku
+
+
+class ConvertStreamTest(unittest.TestCase):
+
+    def convert(self, text, **options):
+        outfile = io.StringIO()
+        failed = Hipku.convert_stream(io.StringIO(text), outfile, 'encode', single_line=True, **options)
+        return outfile.getvalue(), failed
+
+    def expected(self, *ips):
+        return ''.join(Hipku.to_single_line(Hipku.encode(ip)) + '\n' for ip in ips)
+
+    def test_round_trip(self):
+        ips = ['1.2.3.4', '::1', '10.0.0.1']
+        output, failed = self.convert('\n'.join(ips) + '\n', chunk_size=4)
+        self.assertEqual((output, failed), (self.expected(*ips), 0))
+        decoded = io.StringIO()
+        Hipku.convert_stream(io.StringIO(output), decoded, 'decode', separator='\n', single_line=True)
+        self.assertEqual(decoded.getvalue(), '1.2.3.4\n0:0:0:0:0:0:0:1\n10.0.0.1\n')
+
+    def test_raise_keeps_earlier_records(self):
+        # The records before a bad one in the same chunk are written before
+        # the error is raised
+        outfile = io.StringIO()
+        with self.assertRaises(ValueError):
+            Hipku.convert_stream(io.StringIO('1.2.3.4\n::1\nbad\n5.6.7.8\n'), outfile, 'encode', single_line=True)
+        self.assertEqual(outfile.getvalue(), self.expected('1.2.3.4', '::1'))
+
+    def test_raise_keeps_earlier_records_in_a_pool(self):
+        outfile = io.StringIO()
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            with self.assertRaises(ValueError):
+                Hipku.convert_stream(io.StringIO('1.2.3.4\n::1\nbad\n5.6.7.8\n'), outfile, 'encode',
+                                     workers=2, chunk_size=8, single_line=True, executor=executor)
+        self.assertEqual(outfile.getvalue(), self.expected('1.2.3.4', '::1'))
+
+    def test_skip(self):
+        output, failed = self.convert('1.2.3.4\nbad\n5.6.7.8\n', errors='skip')
+        self.assertEqual((output, failed), (self.expected('1.2.3.4', '5.6.7.8'), 1))
+
+
+
+class MainTest(unittest.TestCase):
+
+    def run_hipku(self, arguments, text):
+        result = subprocess.run([sys.executable, '-m', 'hipku'] + arguments, input=text.encode('utf-8'),
+                                capture_output=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout.decode('utf-8')
+
+    def test_null_output(self):
+        # --null only changes how output records end, so newline separated
+        # input can be fed to xargs -0
+        output = self.run_hipku(['encode', '--null', '--single-line'], '127.0.0.1\n::1\n')
+        self.assertEqual(output, Hipku.to_single_line(Hipku.encode('127.0.0.1')) + '\0'
+                         + Hipku.to_single_line(Hipku.encode('::1')) + '\0')
+
+    def test_null_input(self):
+        output = self.run_hipku(['encode', '--separator', '\\0', '--single-line'], '127.0.0.1\0::1\0')
+        self.assertEqual(output, Hipku.to_single_line(Hipku.encode('127.0.0.1')) + '\n'
+                         + Hipku.to_single_line(Hipku.encode('::1')) + '\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from hipku import Hipku
+
+_rng = random.Random(0)
+_ips = ['0.0.0.0', '255.255.255.255', '127.0.0.1'] + ['%d.%d.%d.%d' % tuple(_rng.randrange(256) for _ in range(4))
+                                                      for _ in range(200)]
+
+
+class IPv4TablesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Hipku.unload_ipv4_tables()
+        cls.expected = [Hipku.encode(ip) for ip in _ips]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'tables.json')
+
+    def tearDown(self):
+        Hipku.unload_ipv4_tables()
+        self.directory.cleanup()
+
+    def test_built(self):
+        stats = Hipku.load_ipv4_tables()
+        self.assertEqual(stats['source'], 'built')
+        self.assertGreater(stats['bytes'], 0)
+        self.assertEqual(Hipku.ipv4_table_stats(), stats)
+        self.assertEqual([Hipku.encode(ip) for ip in _ips], self.expected)
+        # IPv6 addresses don't use the tables
+        self.assertEqual(Hipku.decode(Hipku.encode('::1')), '0:0:0:0:0:0:0:1')
+
+    def test_save_and_load(self):
+        Hipku.save_ipv4_tables(self.path)
+        stats = Hipku.load_ipv4_tables(self.path)
+        self.assertEqual(stats['source'], self.path)
+        self.assertEqual([Hipku.encode(ip) for ip in _ips], self.expected)
+
+        # Saving the loaded tables writes the same file again
+        copy = os.path.join(self.directory.name, 'copy.json')
+        Hipku.save_ipv4_tables(copy)
+        with open(self.path, encoding='utf-8') as original, open(copy, encoding='utf-8') as saved:
+            self.assertEqual(json.load(original), json.load(saved))
+
+    def test_unload(self):
+        Hipku.load_ipv4_tables()
+        Hipku.unload_ipv4_tables()
+        self.assertIsNone(Hipku.ipv4_table_stats())
+        self.assertEqual([Hipku.encode(ip) for ip in _ips], self.expected)
+
+    def test_bad_files(self):
+        tables = Hipku.build_ipv4_tables()
+        reordered = [list(reversed(tables[0])), tables[1]]
+        for contents in ([], [tables[0]], [tables[0][:100], tables[1]], reordered):
+            with self.subTest(lengths=[len(table) for table in contents]):
+                with open(self.path, 'w', encoding='utf-8') as table_file:
+                    json.dump(contents, table_file)
+                with self.assertRaises(ValueError):
+                    Hipku.load_ipv4_tables(self.path)
+                self.assertIsNone(Hipku.ipv4_table_stats())
+
+
+if __name__ == '__main__':
+    unittest.main()